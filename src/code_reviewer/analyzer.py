@@ -2,14 +2,38 @@
 Code analysis and review system
 """
 import ast
-import re
-from typing import Dict, List, Any
-from langchain_google_genai import ChatGoogleGenerativeAI
+import asyncio
+import hashlib
+from typing import Dict, Iterator, List, Any, Optional, Tuple
 from langchain.prompts import PromptTemplate
+from startup_timing import startup_timer
+from code_reviewer.rule_engine import RuleEngine
 
 class CodeAnalyzer:
-    def __init__(self):
-        self.llm = ChatGoogleGenerativeAI(model="gemini-2.0-flash-exp", temperature=0.1)
+    def __init__(self, model_name: str = "gemini-2.0-flash-exp", rules: Optional[List[str]] = None,
+                 review_cache_dir: Optional[str] = None, review_cache_bytes: int = 20 * 1024 * 1024,
+                 max_review_sessions: int = 1000, review_session_ttl: Optional[float] = 3600,
+                 chunked_review_chars: Optional[int] = 8000, review_unit_chars: int = 3000,
+                 review_concurrency: int = 4, summary_model_name: Optional[str] = None):
+        self.model_name = model_name
+        self._llm = None
+        # Static analysis rules, all registered rules unless a subset is named
+        self.rule_engine = RuleEngine(rules)
+        # Reviews of equivalent code are reused when a cache directory is given
+        self.review_cache_dir = review_cache_dir
+        self.review_cache_bytes = review_cache_bytes
+        self._review_cache = None
+        # Per-session reviews of the last submission's units, for incremental re-review
+        self.max_review_sessions = max_review_sessions
+        self.review_session_ttl = review_session_ttl
+        self._review_sessions = None
+        # Files longer than chunked_review_chars are reviewed as units of up to
+        # review_unit_chars in parallel, then summarized (by a cheaper model if configured)
+        self.chunked_review_chars = chunked_review_chars
+        self.review_unit_chars = review_unit_chars
+        self.review_concurrency = review_concurrency
+        self.summary_model_name = summary_model_name
+        self._summary_llm = None
         self.review_prompt = PromptTemplate(
             template="""You are an expert code reviewer and programming tutor. 
             Analyze the following {language} code and provide educational feedback.
@@ -31,66 +55,138 @@ class CodeAnalyzer:
             Review:""",
             input_variables=["code", "language"]
         )
+        self.unit_review_prompt = PromptTemplate(
+            template="""You are an expert code reviewer and programming tutor.
+            The following {kind} `{name}` is one part of a larger {language} file
+            that a student is working on. Review only this part.
+            
+            Code:
+            ```{language}
+            {code}
+            ```
+            
+            Briefly list the issues found, why each matters, and a suggested fix.
+            Focus on being educational and encouraging.
+            
+            Review:""",
+            input_variables=["code", "language", "kind", "name"]
+        )
+        self.summary_prompt = PromptTemplate(
+            template="""You are an expert code reviewer and programming tutor.
+            Below are reviews of consecutive parts of one {language} file ({line_count} lines).
+            Write the overall review of the file:
+            1. **Code Quality Assessment** (1-10 score)
+            2. **Most Important Issues** across the whole file
+            3. **Learning Opportunities** (concepts the student should study)
+            
+            Keep it short and do not repeat every detail of the part reviews.
+            
+            Part reviews:
+            {reviews}
+            
+            Overall review:""",
+            input_variables=["language", "line_count", "reviews"]
+        )
+    
+    @property
+    def llm(self):
+        """Shared gateway chat model, created on first use"""
+        if self._llm is None:
+            with startup_timer.measure("llm client (code analyzer)"):
+                from llm_gateway.chat_model import get_chat_model
+                self._llm = get_chat_model(self.model_name, temperature=0.1)
+        return self._llm
+    
+    @property
+    def summary_llm(self):
+        """Model for the final pass of a chunked review; the main model unless configured"""
+        if self.summary_model_name is None:
+            return self.llm
+        if self._summary_llm is None:
+            with startup_timer.measure("llm client (review summary)"):
+                from llm_gateway.chat_model import get_chat_model
+                self._summary_llm = get_chat_model(self.summary_model_name, temperature=0.1)
+        return self._summary_llm
+    
+    @property
+    def review_cache(self):
+        if self._review_cache is None and self.review_cache_dir:
+            from code_reviewer.review_cache import ReviewCache
+            self._review_cache = ReviewCache(self.review_cache_dir, max_bytes=self.review_cache_bytes)
+        return self._review_cache
+    
+    @property
+    def prompt_version(self) -> str:
+        """Changes whenever the model or review prompt does, so old reviews stop matching"""
+        payload = "\0".join([self.model_name, self.summary_model_name or "", self.review_prompt.template,
+                              self.unit_review_prompt.template, self.summary_prompt.template])
+        return hashlib.sha1(payload.encode("utf-8")).hexdigest()[:12]
+    
+    @property
+    def review_sessions(self):
+        if self._review_sessions is None:
+            from rag_system.query_cache import LRUCache
+            self._review_sessions = LRUCache(self.max_review_sessions, self.review_session_ttl)
+        return self._review_sessions
+    
+    def review_cache_stats(self) -> Dict[str, float]:
+        return self.review_cache.stats() if self.review_cache else {}
     
     def analyze_python_syntax(self, code: str) -> Dict[str, Any]:
-        """Basic Python syntax analysis"""
-        issues = []
-        suggestions = []
-        
+        """Python static analysis: syntax check plus the rule engine's findings"""
+        return self.rule_engine.analyze(code)
+    
+    @staticmethod
+    def _review_outcome(result) -> Tuple[str, bool]:
+        """(review text, failed?) for an LLM result or the exception raised in its place"""
+        if isinstance(result, Exception):
+            return f"Error generating review: {str(result)}", True
+        return result.content, False
+    
+    def _ai_review(self, code: str, language: str) -> Tuple[str, bool]:
         try:
-            # Parse the code to check for syntax errors
-            ast.parse(code)
-            syntax_valid = True
-        except SyntaxError as e:
-            syntax_valid = False
-            issues.append({
-                "type": "syntax_error",
-                "message": f"Syntax error at line {e.lineno}: {e.msg}",
-                "line": e.lineno,
-                "severity": "high"
+            chain = self.review_prompt | self.llm
+            result = chain.invoke({
+                "code": code,
+                "language": language
             })
-        
-        # Basic style checks
-        lines = code.split('\n')
-        for i, line in enumerate(lines, 1):
-            # Check for long lines
-            if len(line) > 100:
-                issues.append({
-                    "type": "style",
-                    "message": "Line too long (>100 characters)",
-                    "line": i,
-                    "severity": "low"
-                })
-            
-            # Check for missing spaces around operators
-            if re.search(r'\w[+\-*/=]\w', line):
-                suggestions.append({
-                    "type": "style",
-                    "message": "Consider adding spaces around operators",
-                    "line": i,
-                    "severity": "low"
-                })
-        
-        return {
-            "syntax_valid": syntax_valid,
-            "issues": issues,
-            "suggestions": suggestions
-        }
+        except Exception as e:
+            result = e
+        return self._review_outcome(result)
+    
+    async def _aai_review(self, code: str, language: str) -> Tuple[str, bool]:
+        try:
+            chain = self.review_prompt | self.llm
+            result = await chain.ainvoke({
+                "code": code,
+                "language": language
+            })
+        except Exception as e:
+            result = e
+        return self._review_outcome(result)
     
     def get_ai_review(self, code: str, language: str = "python") -> str:
         """Get AI-powered code review"""
+        return self._ai_review(code, language)[0]
+    
+    async def aget_ai_review(self, code: str, language: str = "python") -> str:
+        """Async get_ai_review"""
+        return (await self._aai_review(code, language))[0]
+    
+    def get_ai_review_stream(self, code: str, language: str = "python") -> Iterator[str]:
+        """Stream the AI-powered code review as it is generated"""
         try:
             chain = self.review_prompt | self.llm
-            result = chain.invoke({
+            for chunk in chain.stream({
                 "code": code,
                 "language": language
-            })
-            return result.content
+            }):
+                if chunk.content:
+                    yield chunk.content
         except Exception as e:
-            return f"Error generating review: {str(e)}"
+            yield f"Error generating review: {str(e)}"
     
-    def comprehensive_review(self, code: str, language: str = "python") -> Dict[str, Any]:
-        """Comprehensive code review combining static analysis and AI"""
+    def _static_review(self, code: str, language: str) -> Dict[str, Any]:
         review_result = {
             "language": language,
             "code_length": len(code),
@@ -102,8 +198,395 @@ class CodeAnalyzer:
             static_analysis = self.analyze_python_syntax(code)
             review_result.update(static_analysis)
         
+        return review_result
+    
+    def _review_key(self, code: str, language: str) -> Optional[str]:
+        if self.review_cache is None:
+            return None
+        from code_reviewer.review_cache import code_fingerprint
+        return code_fingerprint(code, language, self.prompt_version)
+    
+    def _cached_review(self, key: Optional[str], code: str, language: str) -> Optional[Dict[str, Any]]:
+        """
+        Cached review of equivalent code. Static findings are recomputed when
+        the text differs, since their line numbers and names follow the text.
+        """
+        if key is None:
+            return None
+        cached = self.review_cache.get(key)
+        if cached is None:
+            return None
+        
+        if cached["code_sha"] == hashlib.sha256(code.encode("utf-8")).hexdigest():
+            review_result = dict(cached["review"])
+        else:
+            review_result = self._static_review(code, language)
+            review_result["ai_review"] = cached["review"]["ai_review"]
+        review_result["cache_hit"] = True
+        return review_result
+    
+    def _store_review(self, key: Optional[str], code: str, review_result: Dict[str, Any]):
+        # Reviews with any failed LLM call are not cached, so the next submission retries them
+        if key is None or review_result["review_failed"]:
+            return
+        self.review_cache.put(key, {
+            "code_sha": hashlib.sha256(code.encode("utf-8")).hexdigest(),
+            "review": dict(review_result)
+        })
+    
+    def comprehensive_review(self, code: str, language: str = "python") -> Dict[str, Any]:
+        """Comprehensive code review combining static analysis and AI"""
+        key = self._review_key(code, language)
+        cached = self._cached_review(key, code, language)
+        if cached is not None:
+            return cached
+        
+        review_result = self._static_review(code, language)
+        
+        # AI-powered review
+        if self._use_chunked_review(code):
+            review_result.update(self.get_chunked_ai_review(code, language))
+        else:
+            ai_review, failed = self._ai_review(code, language)
+            review_result["ai_review"] = ai_review
+            review_result["review_failed"] = failed
+        
+        self._store_review(key, code, review_result)
+        review_result["cache_hit"] = False
+        return review_result
+    
+    async def acomprehensive_review(self, code: str, language: str = "python") -> Dict[str, Any]:
+        """Async comprehensive_review; static analysis is quick and runs inline"""
+        key = self._review_key(code, language)
+        cached = self._cached_review(key, code, language)
+        if cached is not None:
+            return cached
+        
+        review_result = self._static_review(code, language)
+        
         # AI-powered review
-        ai_review = self.get_ai_review(code, language)
-        review_result["ai_review"] = ai_review
+        if self._use_chunked_review(code):
+            review_result.update(await self.aget_chunked_ai_review(code, language))
+        else:
+            review_result["ai_review"], review_result["review_failed"] = await self._aai_review(code, language)
         
-        return review_result
\ No newline at end of file
+        await asyncio.to_thread(self._store_review, key, code, review_result)
+        review_result["cache_hit"] = False
+        return review_result
+    
+    def _review_units(self, code: str, language: str) -> List[Dict[str, Any]]:
+        """
+        Functions, methods and the module and class-body code between them,
+        each with a content hash. Python units carry the headers of their
+        enclosing classes as context, so each one parses on its own.
+        """
+        from rag_system.code_chunker import CodeChunker
+        # No size limit: no unit is cut into parts, while classes are always split into members
+        units = CodeChunker(max_chunk_chars=len(code) + 1, split_classes=True).chunk(code, language)
+        if language.lower() == "python":
+            units = self._with_class_context(code, units)
+        for unit in units:
+            payload = "\0".join([language.lower(), self.prompt_version, unit.get("context", ""), unit["content"]])
+            unit["hash"] = hashlib.sha256(payload.encode("utf-8")).hexdigest()
+        return units
+    
+    @staticmethod
+    def _class_headers(code: str) -> Dict[str, Tuple[int, int]]:
+        """First and last line of every class header (decorators through the line before its body), by qualified name"""
+        headers = {}
+        
+        def visit(body: List[ast.stmt], prefix: str):
+            for node in body:
+                if isinstance(node, ast.ClassDef):
+                    first = node.body[0]
+                    body_start = min([d.lineno for d in getattr(first, "decorator_list", [])] + [first.lineno])
+                    start = min([d.lineno for d in node.decorator_list] + [node.lineno])
+                    headers[prefix + node.name] = (start, body_start - 1)
+                    visit(node.body, prefix + node.name + ".")
+        
+        visit(ast.parse(code).body, "")
+        return headers
+    
+    def _with_class_context(self, code: str, units: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Give each unit the header lines of the classes around it, and fold bare class headers into the next unit"""
+        lines = code.splitlines(keepends=True)
+        headers = self._class_headers(code)
+        result, pending = [], None
+        for unit in units:
+            if pending is not None:
+                unit = dict(unit, content=pending["content"] + unit["content"], start_line=pending["start_line"])
+                pending = None
+            
+            # A class header with no statements of its own only parses together with its first member
+            header = headers.get(unit["qualified_name"])
+            if unit["kind"] == "class" and header is not None and unit["end_line"] <= header[1]:
+                pending = unit
+                continue
+            
+            parts = unit["qualified_name"].split(".")
+            context = []
+            for depth in range(1, len(parts) + 1):
+                header = headers.get(".".join(parts[:depth]))
+                if header is not None and header[0] < unit["start_line"]:
+                    context.extend(lines[header[0] - 1:min(header[1], unit["start_line"] - 1)])
+            result.append(dict(unit, context="".join(context)))
+        
+        if pending is not None:
+            result.append(dict(pending, context=""))
+        return result
+    
+    def _unit_static(self, unit: Dict[str, Any], language: str) -> Dict[str, List]:
+        """Static findings for one unit, with line numbers relative to the unit"""
+        if language.lower() != "python":
+            return {"issues": [], "suggestions": []}
+        
+        # Findings on the class header context belong to the unit that owns the header
+        context_lines = unit.get("context", "").count("\n")
+        analysis = self.analyze_python_syntax(unit.get("context", "") + unit["content"])
+        return {
+            category: [
+                dict(finding, line=finding["line"] - context_lines) if finding["line"] else finding
+                for finding in analysis[category]
+                if not finding["line"] or finding["line"] > context_lines
+            ]
+            for category in ("issues", "suggestions")
+        }
+    
+    def _unit_review_input(self, unit: Dict[str, Any], language: str) -> Dict[str, str]:
+        return {
+            "code": unit["content"],
+            "language": language,
+            "kind": unit["kind"],
+            "name": unit["qualified_name"]
+        }
+    
+    def _unit_ai_reviews(self, units: List[Dict[str, Any]], language: str) -> List[Tuple[str, bool]]:
+        """(review, failed?) for several units, at most review_concurrency at a time"""
+        if not units:
+            return []
+        chain = self.unit_review_prompt | self.llm
+        results = chain.batch([self._unit_review_input(unit, language) for unit in units],
+                              config={"max_concurrency": self.review_concurrency}, return_exceptions=True)
+        return [self._review_outcome(result) for result in results]
+    
+    async def _aunit_ai_reviews(self, units: List[Dict[str, Any]], language: str) -> List[Tuple[str, bool]]:
+        """Async _unit_ai_reviews"""
+        if not units:
+            return []
+        chain = self.unit_review_prompt | self.llm
+        results = await chain.abatch([self._unit_review_input(unit, language) for unit in units],
+                                     config={"max_concurrency": self.review_concurrency}, return_exceptions=True)
+        return [self._review_outcome(result) for result in results]
+    
+    @staticmethod
+    def _unit_section(unit: Dict[str, Any], ai_review: str) -> str:
+        return f"### {unit['qualified_name']} (lines {unit['start_line']}-{unit['end_line']})\n\n{ai_review}"
+    
+    def _split_for_incremental(self, code: str, language: str, session_id: str):
+        """
+        (units, the session's previous state or None, distinct units needing
+        review), or None to review in full
+        """
+        if language.lower() == "python":
+            try:
+                ast.parse(code)
+            except SyntaxError:
+                return None
+        
+        units = self._review_units(code, language)
+        previous = self.review_sessions.get(session_id)
+        known = previous["units"] if previous is not None else {}
+        changed = {}
+        for unit in units:
+            if unit["hash"] not in known:
+                changed.setdefault(unit["hash"], unit)
+        return units, previous, list(changed.values())
+    
+    def _seed_session(self, session_id: str, units: List[Dict[str, Any]],
+                      review_result: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Start a session from a whole-file review: static findings are split
+        across the units, and the file's AI review stands for every unit
+        until that unit changes.
+        """
+        # A failed review is not remembered, so the next submission is reviewed in full again
+        if not review_result.get("review_failed"):
+            results, owners = {}, {}
+            for unit in units:
+                owners.setdefault(unit["hash"], unit)
+                results[unit["hash"]] = {"issues": [], "suggestions": [], "ai_review": None, "review_failed": False}
+            
+            for category in ("issues", "suggestions"):
+                for finding in review_result.get(category, []):
+                    line = finding["line"]
+                    unit = next((unit for unit in reversed(units) if line and unit["start_line"] <= line), None)
+                    unit = unit or (units[0] if units else None)
+                    # Identical units share one entry, which the first of them fills
+                    if unit is None or owners[unit["hash"]] is not unit:
+                        continue
+                    results[unit["hash"]][category].append(
+                        dict(finding, line=line - unit["start_line"] + 1) if line else finding
+                    )
+            
+            self.review_sessions.put(session_id, {"units": results, "file_review": review_result["ai_review"]})
+        
+        reused = len(units) if review_result.get("cache_hit") else 0
+        return dict(review_result, reviewed_units=len(units) - reused, reused_units=reused)
+    
+    def _merge_unit_reviews(self, code: str, language: str, session_id: str, units: List[Dict[str, Any]],
+                            results: Dict[str, Dict[str, Any]], file_review: Optional[str],
+                            reviewed: int) -> Dict[str, Any]:
+        """Combine per-unit results into the comprehensive_review shape and remember them for the session"""
+        review_result = {
+            "language": language,
+            "code_length": len(code),
+            "line_count": len(code.split('\n'))
+        }
+        if language.lower() == "python":
+            review_result.update({"syntax_valid": True, "issues": [], "suggestions": []})
+        
+        sections = []
+        for unit in units:
+            result = results[unit["hash"]]
+            offset = unit["start_line"] - 1
+            for category in ("issues", "suggestions"):
+                if category in review_result:
+                    review_result[category].extend(
+                        dict(finding, line=finding["line"] + offset if finding["line"] else finding["line"])
+                        for finding in result[category]
+                    )
+            if result["ai_review"] is not None:
+                sections.append(self._unit_section(unit, result["ai_review"]))
+        
+        # Units unchanged since the session's whole-file review are still covered by it
+        covered = any(results[unit["hash"]]["ai_review"] is None for unit in units)
+        if not covered:
+            file_review = None
+        review_result["ai_review"] = "\n\n".join(([file_review] if file_review else []) + sections)
+        review_result["units"] = [
+            {key: unit[key] for key in ("qualified_name", "kind", "start_line", "end_line")}
+            for unit in units
+        ]
+        review_result["reviewed_units"] = reviewed
+        review_result["reused_units"] = len(units) - reviewed
+        
+        review_result["review_failed"] = any(results[unit["hash"]]["review_failed"] for unit in units)
+        
+        # Failed AI reviews are not remembered, so the next submission retries them
+        self.review_sessions.put(session_id, {
+            "units": {key: result for key, result in results.items() if not result["review_failed"]},
+            "file_review": file_review
+        })
+        return review_result
+    
+    def incremental_review(self, code: str, language: str = "python", session_id: str = "default") -> Dict[str, Any]:
+        """
+        comprehensive_review that only re-analyzes the functions, methods and
+        module code that changed since the session's previous submission,
+        reusing earlier findings for the rest. A session's first submission
+        is a comprehensive_review (answered from the review cache when
+        possible) that later submissions build on.
+        """
+        split = self._split_for_incremental(code, language, session_id)
+        if split is None:
+            return self.comprehensive_review(code, language)
+        units, previous, changed = split
+        if previous is None:
+            return self._seed_session(session_id, units, self.comprehensive_review(code, language))
+        
+        results = {unit["hash"]: previous["units"][unit["hash"]] for unit in units if unit["hash"] in previous["units"]}
+        for unit, (ai_review, failed) in zip(changed, self._unit_ai_reviews(changed, language)):
+            results[unit["hash"]] = dict(self._unit_static(unit, language), ai_review=ai_review, review_failed=failed)
+        
+        return self._merge_unit_reviews(code, language, session_id, units, results,
+                                        previous["file_review"], len(changed))
+    
+    async def aincremental_review(self, code: str, language: str = "python",
+                                  session_id: str = "default") -> Dict[str, Any]:
+        """Async incremental_review; changed units are reviewed concurrently"""
+        split = self._split_for_incremental(code, language, session_id)
+        if split is None:
+            return await self.acomprehensive_review(code, language)
+        units, previous, changed = split
+        if previous is None:
+            return self._seed_session(session_id, units, await self.acomprehensive_review(code, language))
+        
+        results = {unit["hash"]: previous["units"][unit["hash"]] for unit in units if unit["hash"] in previous["units"]}
+        for unit, (ai_review, failed) in zip(changed, await self._aunit_ai_reviews(changed, language)):
+            results[unit["hash"]] = dict(self._unit_static(unit, language), ai_review=ai_review, review_failed=failed)
+        
+        return self._merge_unit_reviews(code, language, session_id, units, results,
+                                        previous["file_review"], len(changed))
+    
+    def _use_chunked_review(self, code: str) -> bool:
+        return self.chunked_review_chars is not None and len(code) > self.chunked_review_chars
+    
+    def _chunked_review_units(self, code: str, language: str) -> List[Dict[str, Any]]:
+        """
+        Units of at most about review_unit_chars along function and class
+        boundaries, with small neighbouring units grouped into one request.
+        """
+        from rag_system.code_chunker import CodeChunker
+        units, first_names = [], []
+        for chunk in CodeChunker(max_chunk_chars=self.review_unit_chars).chunk(code, language):
+            name = chunk["qualified_name"] + (f" (part {chunk['part']})" if "part" in chunk else "")
+            last = units[-1] if units else None
+            if last is not None and len(last["content"]) + len(chunk["content"]) <= self.review_unit_chars:
+                last["content"] += chunk["content"]
+                last["qualified_name"] = f"{first_names[-1]} ... {name}"
+                last["kind"] = "section"
+                last["end_line"] = chunk["end_line"]
+            else:
+                units.append(dict(chunk, qualified_name=name))
+                first_names.append(name)
+        return units
+    
+    def _summary_input(self, code: str, language: str, units: List[Dict[str, Any]],
+                       reviews: List[Tuple[str, bool]]) -> Dict[str, Any]:
+        return {
+            "language": language,
+            "line_count": len(code.split('\n')),
+            "reviews": "\n\n".join(self._unit_section(unit, ai_review)
+                                   for unit, (ai_review, _) in zip(units, reviews))
+        }
+    
+    def _chunked_result(self, units: List[Dict[str, Any]], reviews: List[Tuple[str, bool]],
+                        summary: Optional[str]) -> Dict[str, Any]:
+        sections = [self._unit_section(unit, ai_review) for unit, (ai_review, _) in zip(units, reviews)]
+        return {
+            "ai_review": "\n\n".join(([summary] if summary else []) + sections),
+            "units": [
+                {key: unit[key] for key in ("qualified_name", "kind", "start_line", "end_line")}
+                for unit in units
+            ],
+            # A missing summary or any failed unit makes the review incomplete
+            "review_failed": summary is None or any(failed for _, failed in reviews)
+        }
+    
+    def get_chunked_ai_review(self, code: str, language: str = "python") -> Dict[str, Any]:
+        """
+        AI review of a large file: units are reviewed concurrently, then a
+        summary pass writes the overall assessment ahead of the unit reviews.
+        Returns ai_review, the units reviewed and whether any call failed.
+        """
+        units = self._chunked_review_units(code, language)
+        reviews = self._unit_ai_reviews(units, language)
+        try:
+            chain = self.summary_prompt | self.summary_llm
+            summary = chain.invoke(self._summary_input(code, language, units, reviews)).content
+        except Exception as e:
+            print(f"Error summarizing review: {e}")
+            summary = None
+        return self._chunked_result(units, reviews, summary)
+    
+    async def aget_chunked_ai_review(self, code: str, language: str = "python") -> Dict[str, Any]:
+        """Async get_chunked_ai_review"""
+        units = self._chunked_review_units(code, language)
+        reviews = await self._aunit_ai_reviews(units, language)
+        try:
+            chain = self.summary_prompt | self.summary_llm
+            summary = (await chain.ainvoke(self._summary_input(code, language, units, reviews))).content
+        except Exception as e:
+            print(f"Error summarizing review: {e}")
+            summary = None
+        return self._chunked_result(units, reviews, summary)
@@ -0,0 +1,212 @@
+"""
+Persistent cache of code reviews keyed by a normalized fingerprint of the code
+"""
+import ast
+import hashlib
+import json
+import os
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+
+class _LocalNameNormalizer(ast.NodeTransformer):
+    """Rename function arguments and locals to positional placeholders"""
+
+    def __init__(self):
+        self.scopes: List[Dict[str, str]] = []
+
+    def _local_names(self, node) -> List[str]:
+        declared = set()
+        names = [arg.arg for arg in ast.walk(node.args) if isinstance(arg, ast.arg)]
+        for child in ast.walk(node):
+            if isinstance(child, (ast.Global, ast.Nonlocal)):
+                declared.update(child.names)
+            elif isinstance(child, ast.Name) and isinstance(child.ctx, ast.Store):
+                names.append(child.id)
+            elif isinstance(child, ast.ExceptHandler) and child.name:
+                names.append(child.name)
+        return [name for name in dict.fromkeys(names) if name not in declared]
+
+    def _visit_function(self, node):
+        depth = len(self.scopes)
+        self.scopes.append({name: f"_v{depth}_{i}" for i, name in enumerate(self._local_names(node))})
+        self.generic_visit(node)
+        self.scopes.pop()
+        return node
+
+    visit_FunctionDef = visit_AsyncFunctionDef = visit_Lambda = _visit_function
+
+    def _rename(self, name: str) -> str:
+        for scope in reversed(self.scopes):
+            if name in scope:
+                return scope[name]
+        return name
+
+    def visit_Name(self, node: ast.Name):
+        node.id = self._rename(node.id)
+        return node
+
+    def visit_arg(self, node: ast.arg):
+        node.arg = self._rename(node.arg)
+        self.generic_visit(node)
+        return node
+
+    def visit_ExceptHandler(self, node: ast.ExceptHandler):
+        if node.name:
+            node.name = self._rename(node.name)
+        self.generic_visit(node)
+        return node
+
+
+def normalize_code(code: str, language: str = "python") -> str:
+    """
+    Canonical form of a submission. For Python that is the AST with
+    function-local names replaced, so whitespace, comments and local
+    renames don't change it; other languages (and Python that does not
+    parse) are compared line by line with surrounding whitespace removed.
+    """
+    if language.lower() == "python":
+        try:
+            tree = _LocalNameNormalizer().visit(ast.parse(code))
+            return ast.dump(tree, annotate_fields=False, include_attributes=False)
+        except (SyntaxError, ValueError, RecursionError):
+            pass
+    return "\n".join(line.strip() for line in code.splitlines() if line.strip())
+
+
+def code_fingerprint(code: str, language: str = "python", prompt_version: str = "") -> str:
+    payload = "\0".join([language.lower(), prompt_version, normalize_code(code, language)])
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class ReviewCache:
+    """
+    Reviews keyed by ``code_fingerprint``, persisted as a JSON-lines log.
+
+    New reviews are appended to the log, which is compacted to the live
+    entries once it grows past twice ``max_bytes``. The least recently
+    used entries are evicted once the serialized reviews exceed
+    ``max_bytes``. Hits and misses are counted for ``stats()``.
+    """
+
+    def __init__(self, cache_dir: str, max_bytes: int = 20 * 1024 * 1024):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.path = os.path.join(cache_dir, "reviews.jsonl")
+        self.entries: Dict[str, Dict[str, Any]] = {}
+        self.total_bytes = 0
+        self._log_bytes = 0
+        # Entries and file writes are locked separately so lookups never wait on disk
+        self._lock = threading.Lock()
+        self._file_lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self._load()
+
+    def _load(self):
+        """Replay the log; later lines for a key replace earlier ones, and a torn last line is cut off"""
+        if not os.path.exists(self.path):
+            return
+
+        try:
+            with open(self.path, "rb") as f:
+                for line in f:
+                    if not line.endswith(b"\n"):
+                        break
+                    record = json.loads(line)
+                    self._log_bytes += len(line)
+                    previous = self.entries.pop(record["key"], None)
+                    if previous is not None:
+                        self.total_bytes -= previous["size"]
+                    self.entries[record["key"]] = {"review": record["review"], "size": record["size"],
+                                                   "last_used": record["last_used"]}
+                    self.total_bytes += record["size"]
+            if os.path.getsize(self.path) > self._log_bytes:
+                os.truncate(self.path, self._log_bytes)
+            self._evict()
+        except Exception as e:
+            print(f"Error loading review cache: {e}")
+            self.entries, self.total_bytes = {}, 0
+
+    @staticmethod
+    def _line(key: str, entry: Dict[str, Any]) -> str:
+        return json.dumps({"key": key, **entry}) + "\n"
+
+    def save(self):
+        """Rewrite the log with only the live entries"""
+        try:
+            with self._file_lock:
+                with self._lock:
+                    entries = list(self.entries.items())
+                data = "".join(self._line(key, entry) for key, entry in entries)
+                os.makedirs(self.cache_dir, exist_ok=True)
+                tmp_path = self.path + ".tmp"
+                with open(tmp_path, "w", encoding="utf-8") as f:
+                    f.write(data)
+                os.replace(tmp_path, self.path)
+                self._log_bytes = len(data.encode("utf-8"))
+        except Exception as e:
+            print(f"Error saving review cache: {e}")
+
+    def _append(self, line: str):
+        """Log one new entry, compacting once superseded and evicted lines pile up"""
+        if self._log_bytes >= 2 * self.max_bytes:
+            self.save()
+            return
+
+        try:
+            with self._file_lock:
+                os.makedirs(self.cache_dir, exist_ok=True)
+                with open(self.path, "a", encoding="utf-8") as f:
+                    f.write(line)
+                self._log_bytes += len(line.encode("utf-8"))
+        except Exception as e:
+            print(f"Error saving review cache: {e}")
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            entry["last_used"] = time.time()
+            return entry["review"]
+
+    def put(self, key: str, review: Dict[str, Any]):
+        entry = {"review": review, "size": len(json.dumps(review)), "last_used": time.time()}
+        line = self._line(key, entry)
+        with self._lock:
+            previous = self.entries.pop(key, None)
+            if previous is not None:
+                self.total_bytes -= previous["size"]
+            self.entries[key] = entry
+            self.total_bytes += entry["size"]
+            self._evict()
+        self._append(line)
+
+    def _evict(self):
+        if self.total_bytes <= self.max_bytes:
+            return
+
+        for key in sorted(self.entries, key=lambda k: self.entries[k]["last_used"]):
+            if self.total_bytes <= self.max_bytes or len(self.entries) == 1:
+                break
+            self.total_bytes -= self.entries.pop(key)["size"]
+
+    def clear(self):
+        with self._file_lock:
+            with self._lock:
+                self.entries, self.total_bytes = {}, 0
+            try:
+                if os.path.exists(self.path):
+                    os.remove(self.path)
+                self._log_bytes = 0
+            except OSError as e:
+                print(f"Error clearing review cache: {e}")
+
+    def stats(self) -> Dict[str, float]:
+        total = self.hits + self.misses
+        return {"size": len(self.entries), "bytes": self.total_bytes, "hits": self.hits,
+                "misses": self.misses, "hit_rate": self.hits / total if total else 0.0}
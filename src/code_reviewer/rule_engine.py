@@ -0,0 +1,161 @@
+"""
+Single-pass static analysis engine with pluggable rules
+"""
+import ast
+import io
+import tokenize
+from typing import Any, Callable, Dict, Iterable, List, Optional, Type
+
+
+class Rule:
+    """
+    Base class for static analysis rules.
+
+    A rule hooks into the shared passes by defining any of:
+
+    - ``visit_<NodeType>(node, ctx)`` / ``leave_<NodeType>(node, ctx)``,
+      called when the AST traversal enters / leaves a node of that type
+    - ``visit_token(token, ctx)``, called for every token
+    - ``visit_line(lineno, line, ctx)``, called for every source line
+    - ``finish(ctx)``, called once at the end
+
+    A fresh instance is created for each analysed source, so rules may keep
+    per-file state on ``self``. Findings are reported with ``ctx.report``.
+    """
+
+    name = ""
+    kind = "suggestion"     # "issue" or "suggestion"
+    type = "style"
+    severity = "low"
+
+    def finish(self, ctx: "AnalysisContext"):
+        pass
+
+
+_registry: Dict[str, Type[Rule]] = {}
+
+
+def register_rule(rule_class: Type[Rule]) -> Type[Rule]:
+    """Class decorator adding a rule to the default registry under its ``name``"""
+    if not rule_class.name:
+        raise ValueError(f"Rule {rule_class.__name__} has no name")
+    _registry[rule_class.name] = rule_class
+    return rule_class
+
+
+def registered_rules() -> Dict[str, Type[Rule]]:
+    """All registered rules, including the built-in ones"""
+    import code_reviewer.rules  # noqa: F401  (registers the built-in rules)
+    return dict(_registry)
+
+
+class AnalysisContext:
+    """Source being analysed and the findings collected so far"""
+
+    def __init__(self, code: str):
+        self.code = code
+        self.lines = code.split('\n')
+        self.issues: List[Dict[str, Any]] = []
+        self.suggestions: List[Dict[str, Any]] = []
+
+    def report(self, rule: Rule, line: Optional[int], message: str, severity: Optional[str] = None):
+        finding = {
+            "type": rule.type,
+            "rule": rule.name,
+            "message": message,
+            "line": line,
+            "severity": severity or rule.severity
+        }
+        (self.issues if rule.kind == "issue" else self.suggestions).append(finding)
+
+
+class _Dispatcher(ast.NodeVisitor):
+    """One traversal of the tree, fanning each node out to the rules that handle it"""
+
+    def __init__(self, enter: Dict[str, List[Callable]], leave: Dict[str, List[Callable]],
+                 ctx: AnalysisContext):
+        self.enter = enter
+        self.leave = leave
+        self.ctx = ctx
+
+    def visit(self, node: ast.AST):
+        node_type = type(node).__name__
+        for handler in self.enter.get(node_type, ()):
+            handler(node, self.ctx)
+        self.generic_visit(node)
+        for handler in self.leave.get(node_type, ()):
+            handler(node, self.ctx)
+
+
+class RuleEngine:
+    """
+    Run a set of rules over Python source in one AST traversal, one
+    tokenize pass and one pass over the lines, so cost stays linear in the
+    size of the file however many rules are enabled.
+    """
+
+    def __init__(self, rules: Optional[Iterable[str]] = None,
+                 registry: Optional[Dict[str, Type[Rule]]] = None):
+        registry = registry if registry is not None else registered_rules()
+        names = list(rules) if rules is not None else list(registry)
+        unknown = [name for name in names if name not in registry]
+        if unknown:
+            raise ValueError(f"Unknown rules: {', '.join(unknown)}")
+        self.rule_classes = [registry[name] for name in names]
+
+    def analyze(self, code: str) -> Dict[str, Any]:
+        """Syntax check plus every enabled rule, in the analyzer's result format"""
+        ctx = AnalysisContext(code)
+        rules = [rule_class() for rule_class in self.rule_classes]
+
+        try:
+            tree = ast.parse(code)
+            syntax_valid = True
+        except SyntaxError as e:
+            tree = None
+            syntax_valid = False
+            ctx.issues.append({
+                "type": "syntax_error",
+                "rule": "syntax_error",
+                "message": f"Syntax error at line {e.lineno}: {e.msg}",
+                "line": e.lineno,
+                "severity": "high"
+            })
+
+        if tree is not None:
+            enter: Dict[str, List[Callable]] = {}
+            leave: Dict[str, List[Callable]] = {}
+            for rule in rules:
+                for attribute in dir(rule):
+                    if attribute.startswith("visit_") and attribute not in ("visit_token", "visit_line"):
+                        enter.setdefault(attribute[6:], []).append(getattr(rule, attribute))
+                    elif attribute.startswith("leave_"):
+                        leave.setdefault(attribute[6:], []).append(getattr(rule, attribute))
+            if enter or leave:
+                _Dispatcher(enter, leave, ctx).visit(tree)
+
+            # Tokens are only meaningful for source that parses
+            token_handlers = [rule.visit_token for rule in rules if hasattr(rule, "visit_token")]
+            if token_handlers:
+                try:
+                    for token in tokenize.generate_tokens(io.StringIO(code).readline):
+                        for handler in token_handlers:
+                            handler(token, ctx)
+                except (tokenize.TokenError, SyntaxError):
+                    pass
+
+        line_handlers = [rule.visit_line for rule in rules if hasattr(rule, "visit_line")]
+        if line_handlers:
+            for lineno, line in enumerate(ctx.lines, 1):
+                for handler in line_handlers:
+                    handler(lineno, line, ctx)
+
+        for rule in rules:
+            rule.finish(ctx)
+
+        order = lambda finding: finding["line"] or 0
+        return {
+            "syntax_valid": syntax_valid,
+            "issues": sorted(ctx.issues, key=order),
+            "suggestions": sorted(ctx.suggestions, key=order)
+        }
@@ -0,0 +1,240 @@
+"""
+Built-in static analysis rules for Python submissions
+"""
+import ast
+import builtins
+import tokenize
+from typing import Dict, List, Optional, Set
+
+from code_reviewer.rule_engine import AnalysisContext, Rule, register_rule
+
+# Builtin functions and types a student might accidentally rebind
+_BUILTIN_NAMES = {name for name in dir(builtins) if not name.startswith("_") and not name[0].isupper()}
+
+
+@register_rule
+class LineTooLong(Rule):
+    name = "line_too_long"
+    kind = "issue"
+    max_length = 100
+
+    def visit_line(self, lineno: int, line: str, ctx: AnalysisContext):
+        if len(line) > self.max_length:
+            ctx.report(self, lineno, f"Line too long (>{self.max_length} characters)")
+
+
+@register_rule
+class OperatorSpacing(Rule):
+    """Binary and assignment operators written with no space on either side"""
+
+    name = "operator_spacing"
+    OPERATORS = {"=", "==", "!=", "<", ">", "<=", ">=", "+", "-", "*", "/", "//", "%",
+                 "+=", "-=", "*=", "/=", "//=", "%=", "**=", "&=", "|=", "^="}
+    # Tokens that can end / start an operand; anything else makes the operator unary or unpacking
+    _OPERAND_END = {tokenize.NAME, tokenize.NUMBER, tokenize.STRING}
+    _OPERAND_START = {tokenize.NAME, tokenize.NUMBER, tokenize.STRING}
+
+    def __init__(self):
+        self.before: Optional[tokenize.TokenInfo] = None
+        self.operator: Optional[tokenize.TokenInfo] = None
+        self.depth = 0
+        self.reported_lines: Set[int] = set()
+
+    def _ends_operand(self, token: tokenize.TokenInfo) -> bool:
+        return token.type in self._OPERAND_END or token.string in (")", "]", "}")
+
+    def _starts_operand(self, token: tokenize.TokenInfo) -> bool:
+        return token.type in self._OPERAND_START or token.string in ("(", "[", "{")
+
+    def visit_token(self, token: tokenize.TokenInfo, ctx: AnalysisContext):
+        operator, before = self.operator, self.before
+        if operator is not None and before is not None \
+                and before.end == operator.start and operator.end == token.start \
+                and self._ends_operand(before) and self._starts_operand(token) \
+                and operator.start[0] not in self.reported_lines:
+            self.reported_lines.add(operator.start[0])
+            ctx.report(self, operator.start[0], "Consider adding spaces around operators")
+
+        # '=' inside brackets is a keyword argument or default value
+        is_operator = token.type == tokenize.OP and token.string in self.OPERATORS \
+            and not (token.string == "=" and self.depth > 0)
+        if token.type == tokenize.OP and token.string in "([{":
+            self.depth += 1
+        elif token.type == tokenize.OP and token.string in ")]}":
+            self.depth = max(0, self.depth - 1)
+
+        if is_operator:
+            self.operator = token
+        else:
+            self.operator = None
+            self.before = token
+
+
+@register_rule
+class UnusedVariable(Rule):
+    """Local variables assigned in a function body and never read"""
+
+    name = "unused_variable"
+    kind = "issue"
+    type = "correctness"
+
+    def __init__(self):
+        # One entry per enclosing scope: function scopes collect assignments, class bodies are None
+        self.scopes: List[Optional[Dict]] = []
+
+    def _enter_function(self, node, ctx):
+        self.scopes.append({"stores": {}, "loads": set(), "declared": set(), "dynamic": False})
+
+    def _leave_function(self, node, ctx):
+        scope = self.scopes.pop()
+        if scope["dynamic"]:
+            return
+        for name, line in scope["stores"].items():
+            if name not in scope["loads"] and name not in scope["declared"] and not name.startswith("_"):
+                ctx.report(self, line, f"Variable '{name}' is assigned but never used")
+
+    visit_FunctionDef = visit_AsyncFunctionDef = visit_Lambda = _enter_function
+    leave_FunctionDef = leave_AsyncFunctionDef = leave_Lambda = _leave_function
+
+    def visit_ClassDef(self, node, ctx):
+        self.scopes.append(None)
+
+    def leave_ClassDef(self, node, ctx):
+        self.scopes.pop()
+
+    def _store(self, target: ast.AST):
+        scope = self.scopes[-1] if self.scopes else None
+        if scope is not None and isinstance(target, ast.Name):
+            scope["stores"].setdefault(target.id, target.lineno)
+
+    def visit_Assign(self, node: ast.Assign, ctx):
+        # Only plain `name = value`; unpacking and loop targets are often deliberately unused
+        for target in node.targets:
+            self._store(target)
+
+    def visit_AnnAssign(self, node: ast.AnnAssign, ctx):
+        if node.value is not None:
+            self._store(node.target)
+
+    def visit_AugAssign(self, node: ast.AugAssign, ctx):
+        self._load(getattr(node.target, "id", None))
+
+    def visit_NamedExpr(self, node: ast.NamedExpr, ctx):
+        self._store(node.target)
+
+    def _load(self, name: Optional[str]):
+        # A read in a nested function counts for every enclosing scope (closures)
+        if name is None:
+            return
+        for scope in self.scopes:
+            if scope is not None:
+                scope["loads"].add(name)
+
+    def visit_Name(self, node: ast.Name, ctx):
+        if not isinstance(node.ctx, ast.Store):
+            self._load(node.id)
+
+    def visit_Global(self, node, ctx):
+        if self.scopes and self.scopes[-1] is not None:
+            self.scopes[-1]["declared"].update(node.names)
+
+    visit_Nonlocal = visit_Global
+
+    def visit_Call(self, node: ast.Call, ctx):
+        if isinstance(node.func, ast.Name) and node.func.id in ("locals", "vars", "eval", "exec"):
+            for scope in self.scopes:
+                if scope is not None:
+                    scope["dynamic"] = True
+
+
+@register_rule
+class MutableDefaultArgument(Rule):
+    name = "mutable_default_argument"
+    kind = "issue"
+    type = "correctness"
+    severity = "medium"
+
+    def _check(self, node, ctx):
+        for default in node.args.defaults + [d for d in node.args.kw_defaults if d is not None]:
+            mutable = isinstance(default, (ast.List, ast.Dict, ast.Set, ast.ListComp, ast.DictComp, ast.SetComp)) \
+                or (isinstance(default, ast.Call) and isinstance(default.func, ast.Name)
+                    and default.func.id in ("list", "dict", "set"))
+            if mutable:
+                ctx.report(self, default.lineno,
+                           "Mutable default argument is shared between calls; use None and create it inside")
+
+    visit_FunctionDef = visit_AsyncFunctionDef = visit_Lambda = _check
+
+
+@register_rule
+class BareExcept(Rule):
+    name = "bare_except"
+    kind = "issue"
+    type = "correctness"
+    severity = "medium"
+
+    def visit_ExceptHandler(self, node: ast.ExceptHandler, ctx):
+        if node.type is None:
+            ctx.report(self, node.lineno,
+                       "Bare 'except:' also catches KeyboardInterrupt and SystemExit; catch a specific exception")
+
+
+@register_rule
+class ShadowedBuiltin(Rule):
+    name = "shadowed_builtin"
+    kind = "issue"
+    type = "correctness"
+
+    def _check(self, name: str, line: int, ctx: AnalysisContext):
+        if name in _BUILTIN_NAMES:
+            ctx.report(self, line, f"'{name}' shadows the built-in of the same name")
+
+    def visit_Name(self, node: ast.Name, ctx):
+        if isinstance(node.ctx, ast.Store):
+            self._check(node.id, node.lineno, ctx)
+
+    def visit_arg(self, node: ast.arg, ctx):
+        self._check(node.arg, node.lineno, ctx)
+
+    def visit_FunctionDef(self, node, ctx):
+        self._check(node.name, node.lineno, ctx)
+
+    visit_AsyncFunctionDef = visit_ClassDef = visit_FunctionDef
+
+
+@register_rule
+class NestedLoops(Rule):
+    """Loops nested deeper than ``max_depth``, usually a sign of quadratic or worse work"""
+
+    name = "nested_loops"
+    type = "complexity"
+    severity = "medium"
+    max_depth = 2
+
+    def __init__(self):
+        self.depth = 0
+
+    def _enter(self, node, ctx):
+        self.depth += 1
+        if self.depth == self.max_depth + 1:
+            ctx.report(self, node.lineno,
+                       f"Loops nested {self.depth} deep; consider a helper function or a better data structure")
+
+    def _leave(self, node, ctx):
+        self.depth -= 1
+
+    visit_For = visit_AsyncFor = visit_While = _enter
+    leave_For = leave_AsyncFor = leave_While = _leave
+
+
+@register_rule
+class NoneComparison(Rule):
+    name = "none_comparison"
+
+    def visit_Compare(self, node: ast.Compare, ctx):
+        operands = [node.left] + node.comparators
+        for op, left, right in zip(node.ops, operands, operands[1:]):
+            if isinstance(op, (ast.Eq, ast.NotEq)) and any(
+                    isinstance(side, ast.Constant) and side.value is None for side in (left, right)):
+                ctx.report(self, node.lineno, "Compare with None using 'is' / 'is not' instead of '==' / '!='")
+                return
@@ -0,0 +1 @@
+# Shared LLM Gateway
\ No newline at end of file
@@ -0,0 +1,120 @@
+"""
+LangChain chat model that routes another chat model's calls through the gateway
+"""
+import hashlib
+import json
+import os
+import threading
+from typing import Any, AsyncIterator, Dict, Iterator, List, Optional
+
+from langchain_core.callbacks import AsyncCallbackManagerForLLMRun, CallbackManagerForLLMRun
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import BaseMessage
+from langchain_core.outputs import ChatGenerationChunk, ChatResult
+
+from llm_gateway.gateway import get_gateway
+
+
+class GatewayChatModel(BaseChatModel):
+    """
+    Wrap a chat model so every call goes through an LLMGateway.
+
+    Identical requests (same model, messages, stop words and options) that
+    overlap in time are coalesced into one upstream call. Streaming calls
+    are rate limited and retried but never coalesced.
+    """
+
+    inner: BaseChatModel
+    gateway: Any = None
+
+    @property
+    def _llm_type(self) -> str:
+        return f"gateway-{self.inner._llm_type}"
+
+    @property
+    def _gateway(self):
+        return self.gateway or get_gateway()
+
+    def _request_key(self, messages: List[BaseMessage], stop: Optional[List[str]], kwargs: Dict) -> str:
+        payload = json.dumps({
+            "model": self.inner._identifying_params,
+            "messages": [message.model_dump() for message in messages],
+            "stop": stop,
+            "kwargs": kwargs
+        }, sort_keys=True, default=str)
+        return hashlib.sha1(payload.encode("utf-8")).hexdigest()
+
+    def _generate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None,
+                  run_manager: Optional[CallbackManagerForLLMRun] = None, **kwargs: Any) -> ChatResult:
+        return self._gateway.call(
+            lambda: self.inner._generate(messages, stop=stop, **kwargs),
+            key=self._request_key(messages, stop, kwargs)
+        )
+
+    async def _agenerate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None,
+                         run_manager: Optional[AsyncCallbackManagerForLLMRun] = None,
+                         **kwargs: Any) -> ChatResult:
+        return await self._gateway.acall(
+            lambda: self.inner._agenerate(messages, stop=stop, **kwargs),
+            key=self._request_key(messages, stop, kwargs)
+        )
+
+    def _stream(self, messages: List[BaseMessage], stop: Optional[List[str]] = None,
+                run_manager: Optional[CallbackManagerForLLMRun] = None,
+                **kwargs: Any) -> Iterator[ChatGenerationChunk]:
+        for chunk in self._gateway.stream(lambda: self.inner._stream(messages, stop=stop, **kwargs)):
+            if run_manager:
+                run_manager.on_llm_new_token(chunk.text, chunk=chunk)
+            yield chunk
+
+    async def _astream(self, messages: List[BaseMessage], stop: Optional[List[str]] = None,
+                       run_manager: Optional[AsyncCallbackManagerForLLMRun] = None,
+                       **kwargs: Any) -> AsyncIterator[ChatGenerationChunk]:
+        async for chunk in self._gateway.astream(lambda: self.inner._astream(messages, stop=stop, **kwargs)):
+            if run_manager:
+                await run_manager.on_llm_new_token(chunk.text, chunk=chunk)
+            yield chunk
+
+
+_models: Dict[tuple, GatewayChatModel] = {}
+_models_lock = threading.Lock()
+
+
+PROVIDERS = ("gemini", "fake")
+
+
+def llm_provider() -> str:
+    """Configured LLM backend: LLM_PROVIDER, "gemini" by default"""
+    provider = os.getenv("LLM_PROVIDER", "gemini").lower()
+    if provider not in PROVIDERS:
+        raise ValueError(f"Unknown LLM provider: {provider}")
+    return provider
+
+
+def get_chat_model(model_name: str = "gemini-2.0-flash-exp", temperature: float = 0.1,
+                   provider: Optional[str] = None) -> GatewayChatModel:
+    """
+    Shared gateway-wrapped chat model for a (provider, model, temperature).
+
+    Components asking for the same settings get the same client. Retries
+    are left to the gateway, so the client makes a single attempt per call.
+    With the "fake" provider the model name and temperature are ignored and
+    an offline FakeChatModel configured from FAKE_LLM_* is used instead.
+    """
+    provider = provider or llm_provider()
+    key = (provider, model_name, temperature)
+    with _models_lock:
+        if key not in _models:
+            if provider == "fake":
+                from llm_gateway.fake_provider import fake_model_from_env
+                inner = fake_model_from_env()
+            else:
+                from langchain_google_genai import ChatGoogleGenerativeAI
+                inner = ChatGoogleGenerativeAI(
+                    model=model_name,
+                    temperature=temperature,
+                    google_api_key=os.getenv("GOOGLE_API_KEY"),
+                    max_retries=1
+                )
+            _models[key] = GatewayChatModel(inner=inner)
+        return _models[key]
@@ -0,0 +1,162 @@
+"""
+Offline stand-in chat model for load testing and profiling
+"""
+import asyncio
+import hashlib
+import math
+import os
+import random
+import re
+import threading
+import time
+from typing import Any, AsyncIterator, Iterator, List, Optional
+
+from langchain_core.callbacks import AsyncCallbackManagerForLLMRun, CallbackManagerForLLMRun
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk, BaseMessage
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+from pydantic import PrivateAttr, field_validator
+
+_FILLER = (
+    "the", "a", "function", "list", "value", "loop", "returns", "each", "element", "index",
+    "variable", "example", "step", "first", "then", "finally", "because", "we", "can", "use",
+    "to", "of", "in", "this", "code", "result", "check", "call", "input", "output"
+)
+
+LATENCY_DISTRIBUTIONS = ("fixed", "uniform", "lognormal")
+
+
+class FakeProviderError(Exception):
+    """Simulated API failure carrying an HTTP status, like the real clients' errors"""
+
+    def __init__(self, code: int):
+        super().__init__(f"Simulated LLM provider error {code}")
+        self.code = code
+
+
+class FakeChatModel(BaseChatModel):
+    """
+    Deterministic, prompt-derived responses with simulated timing.
+
+    The same prompt always produces the same text. Time to first token is
+    drawn from a "fixed", "uniform" or "lognormal" distribution around
+    ``latency_ms``; the rest of the response arrives at
+    ``tokens_per_second``. A fraction ``error_rate`` of calls fail with a
+    429 or 503 before producing output.
+    """
+
+    latency_ms: float = 500.0
+    latency_distribution: str = "lognormal"
+    latency_sigma: float = 0.5
+    tokens_per_second: float = 80.0
+    min_tokens: int = 40
+    max_tokens: int = 200
+    error_rate: float = 0.0
+    seed: Optional[int] = None
+
+    _rng: Any = PrivateAttr(default=None)
+    _lock: Any = PrivateAttr(default_factory=threading.Lock)
+
+    @field_validator("latency_distribution")
+    @classmethod
+    def _check_distribution(cls, value: str) -> str:
+        if value not in LATENCY_DISTRIBUTIONS:
+            raise ValueError(f"Unknown latency distribution: {value}")
+        return value
+
+    @property
+    def _llm_type(self) -> str:
+        return "fake"
+
+    def _random(self) -> random.Random:
+        if self._rng is None:
+            self._rng = random.Random(self.seed)
+        return self._rng
+
+    def _sample_latency(self) -> float:
+        with self._lock:
+            rng = self._random()
+            if self.latency_distribution == "fixed":
+                latency = self.latency_ms
+            elif self.latency_distribution == "uniform":
+                latency = rng.uniform(0, 2 * self.latency_ms)
+            else:
+                # Median latency_ms with a long right tail
+                latency = self.latency_ms * math.exp(rng.gauss(0, self.latency_sigma))
+            return latency / 1000.0
+
+    def _maybe_fail(self):
+        with self._lock:
+            rng = self._random()
+            if self.error_rate and rng.random() < self.error_rate:
+                raise FakeProviderError(rng.choice((429, 503)))
+
+    def response_tokens(self, messages: List[BaseMessage]) -> List[str]:
+        """The deterministic response to a prompt, as whitespace-joined tokens"""
+        prompt = "\n".join(str(message.content) for message in messages)
+        rng = random.Random(hashlib.sha256(prompt.encode("utf-8")).digest())
+        keywords = re.findall(r"[A-Za-z_][A-Za-z0-9_]{3,}", prompt[-500:]) or list(_FILLER)
+        length = rng.randint(self.min_tokens, self.max_tokens)
+        tokens = []
+        for i in range(length):
+            word = rng.choice(keywords) if rng.random() < 0.3 else rng.choice(_FILLER)
+            tokens.append(word + ("." if i % 12 == 11 else ""))
+        return tokens
+
+    def _generate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None,
+                  run_manager: Optional[CallbackManagerForLLMRun] = None, **kwargs: Any) -> ChatResult:
+        time.sleep(self._sample_latency())
+        self._maybe_fail()
+        tokens = self.response_tokens(messages)
+        time.sleep(len(tokens) / self.tokens_per_second)
+        message = AIMessage(content=" ".join(tokens))
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+    async def _agenerate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None,
+                         run_manager: Optional[AsyncCallbackManagerForLLMRun] = None,
+                         **kwargs: Any) -> ChatResult:
+        await asyncio.sleep(self._sample_latency())
+        self._maybe_fail()
+        tokens = self.response_tokens(messages)
+        await asyncio.sleep(len(tokens) / self.tokens_per_second)
+        message = AIMessage(content=" ".join(tokens))
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+    def _stream(self, messages: List[BaseMessage], stop: Optional[List[str]] = None,
+                run_manager: Optional[CallbackManagerForLLMRun] = None,
+                **kwargs: Any) -> Iterator[ChatGenerationChunk]:
+        time.sleep(self._sample_latency())
+        self._maybe_fail()
+        for i, token in enumerate(self.response_tokens(messages)):
+            if i:
+                time.sleep(1 / self.tokens_per_second)
+            chunk = ChatGenerationChunk(message=AIMessageChunk(content=(" " if i else "") + token))
+            if run_manager:
+                run_manager.on_llm_new_token(chunk.text, chunk=chunk)
+            yield chunk
+
+    async def _astream(self, messages: List[BaseMessage], stop: Optional[List[str]] = None,
+                       run_manager: Optional[AsyncCallbackManagerForLLMRun] = None,
+                       **kwargs: Any) -> AsyncIterator[ChatGenerationChunk]:
+        await asyncio.sleep(self._sample_latency())
+        self._maybe_fail()
+        for i, token in enumerate(self.response_tokens(messages)):
+            if i:
+                await asyncio.sleep(1 / self.tokens_per_second)
+            chunk = ChatGenerationChunk(message=AIMessageChunk(content=(" " if i else "") + token))
+            if run_manager:
+                await run_manager.on_llm_new_token(chunk.text, chunk=chunk)
+            yield chunk
+
+
+def fake_model_from_env() -> FakeChatModel:
+    """FakeChatModel configured from FAKE_LLM_* environment variables"""
+    seed = os.getenv("FAKE_LLM_SEED")
+    return FakeChatModel(
+        latency_ms=float(os.getenv("FAKE_LLM_LATENCY_MS", "500")),
+        latency_distribution=os.getenv("FAKE_LLM_LATENCY_DISTRIBUTION", "lognormal"),
+        latency_sigma=float(os.getenv("FAKE_LLM_LATENCY_SIGMA", "0.5")),
+        tokens_per_second=float(os.getenv("FAKE_LLM_TOKENS_PER_SECOND", "80")),
+        error_rate=float(os.getenv("FAKE_LLM_ERROR_RATE", "0")),
+        seed=int(seed) if seed is not None else None
+    )
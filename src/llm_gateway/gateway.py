@@ -0,0 +1,271 @@
+"""
+Process-wide LLM call gateway: rate limiting, concurrency, retries and coalescing
+"""
+import asyncio
+import os
+import random
+import threading
+import time
+import weakref
+from contextlib import asynccontextmanager
+from concurrent.futures import Future
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional
+
+# HTTP statuses worth retrying: quota exhaustion and transient server errors
+RETRYABLE_STATUS = {429, 500, 502, 503, 504}
+_RETRYABLE_NAMES = ("ResourceExhausted", "ServiceUnavailable", "InternalServerError",
+                    "DeadlineExceeded", "TooManyRequests", "RateLimit")
+
+
+def status_code(error: BaseException) -> Optional[int]:
+    """HTTP status of an API error, from the attributes the common clients use"""
+    for candidate in (getattr(error, "code", None), getattr(error, "status_code", None),
+                      getattr(getattr(error, "response", None), "status_code", None)):
+        if isinstance(candidate, int):
+            return candidate
+    return None
+
+
+def is_retryable(error: BaseException) -> bool:
+    code = status_code(error)
+    if code is not None:
+        return code in RETRYABLE_STATUS
+    return any(name in type(error).__name__ for name in _RETRYABLE_NAMES)
+
+
+class TokenBucket:
+    """Thread-safe token bucket; callers reserve a token and sleep until it is due"""
+
+    def __init__(self, rate_per_second: float, capacity: Optional[float] = None):
+        self.rate = rate_per_second
+        self.capacity = capacity if capacity is not None else max(1.0, rate_per_second)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def reserve(self) -> float:
+        """Take one token and return how long to wait before using it"""
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            self._tokens -= 1
+            return 0.0 if self._tokens >= 0 else -self._tokens / self.rate
+
+    def acquire(self) -> float:
+        wait = self.reserve()
+        if wait > 0:
+            time.sleep(wait)
+        return wait
+
+    async def aacquire(self) -> float:
+        wait = self.reserve()
+        if wait > 0:
+            await asyncio.sleep(wait)
+        return wait
+
+
+class LLMGateway:
+    """
+    Single choke point for LLM calls in the process.
+
+    Every call takes a token from a shared bucket (``requests_per_minute``),
+    runs under a bound on concurrent calls, and is retried with full-jitter
+    exponential backoff on 429/5xx errors. Calls made with the same key
+    while an identical call is in flight wait for that call's result
+    instead of issuing their own.
+
+    The rate limit and the concurrency bound are process-wide: threads and
+    every event loop draw from the same bucket and the same slots. Async
+    callers that find no free slot wait for one in a worker thread.
+    Coalescing of async calls applies within one event loop.
+    """
+
+    def __init__(self, requests_per_minute: float = 60, max_concurrency: int = 8,
+                 max_retries: int = 4, base_delay: float = 1.0, max_delay: float = 30.0):
+        self.bucket = TokenBucket(requests_per_minute / 60.0, capacity=max(1.0, requests_per_minute / 10.0))
+        self.max_concurrency = max_concurrency
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+
+        self._slots = threading.BoundedSemaphore(max_concurrency)
+        self._inflight: Dict[Hashable, Future] = {}
+        # In-flight async calls per event loop; a finished loop drops out with its entry
+        self._async_inflight = weakref.WeakKeyDictionary()
+        self._lock = threading.Lock()
+        self.stats = {"calls": 0, "coalesced": 0, "retries": 0, "failures": 0, "throttled_seconds": 0.0}
+
+    def _count(self, key: str, amount: float = 1):
+        with self._lock:
+            self.stats[key] += amount
+
+    def _backoff(self, attempt: int) -> float:
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2 ** attempt))
+
+    # Synchronous calls
+
+    def _call_with_retries(self, fn: Callable[[], Any]) -> Any:
+        attempt = 0
+        while True:
+            self._count("throttled_seconds", self.bucket.acquire())
+            with self._slots:
+                try:
+                    self._count("calls")
+                    return fn()
+                except Exception as e:
+                    if attempt >= self.max_retries or not is_retryable(e):
+                        self._count("failures")
+                        raise
+            self._count("retries")
+            time.sleep(self._backoff(attempt))
+            attempt += 1
+
+    def call(self, fn: Callable[[], Any], key: Optional[Hashable] = None) -> Any:
+        """Run ``fn`` through the gateway; identical in-flight keys share one call"""
+        if key is None:
+            return self._call_with_retries(fn)
+
+        with self._lock:
+            future = self._inflight.get(key)
+            leader = future is None
+            if leader:
+                future = self._inflight[key] = Future()
+            else:
+                self.stats["coalesced"] += 1
+
+        if not leader:
+            return future.result()
+
+        try:
+            result = self._call_with_retries(fn)
+            future.set_result(result)
+            return result
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+
+    def stream(self, fn: Callable[[], Any]):
+        """
+        Iterate a streaming call under the rate limit and a concurrency slot.
+        Retries only happen before the first chunk has been yielded.
+        """
+        attempt = 0
+        while True:
+            self._count("throttled_seconds", self.bucket.acquire())
+            started = False
+            with self._slots:
+                try:
+                    self._count("calls")
+                    for chunk in fn():
+                        started = True
+                        yield chunk
+                    return
+                except Exception as e:
+                    if started or attempt >= self.max_retries or not is_retryable(e):
+                        self._count("failures")
+                        raise
+            self._count("retries")
+            time.sleep(self._backoff(attempt))
+            attempt += 1
+
+    # Asynchronous calls
+
+    @asynccontextmanager
+    async def _async_slot(self):
+        """Hold one of the process-wide concurrency slots without blocking the event loop"""
+        if not self._slots.acquire(blocking=False):
+            acquire = asyncio.ensure_future(asyncio.to_thread(self._slots.acquire))
+            try:
+                await asyncio.shield(acquire)
+            except asyncio.CancelledError:
+                # The worker thread still takes the slot; give it back once it has
+                acquire.add_done_callback(lambda _: self._slots.release())
+                raise
+        try:
+            yield
+        finally:
+            self._slots.release()
+
+    async def _acall_with_retries(self, fn: Callable[[], Awaitable[Any]]) -> Any:
+        attempt = 0
+        while True:
+            self._count("throttled_seconds", await self.bucket.aacquire())
+            async with self._async_slot():
+                try:
+                    self._count("calls")
+                    return await fn()
+                except Exception as e:
+                    if attempt >= self.max_retries or not is_retryable(e):
+                        self._count("failures")
+                        raise
+            self._count("retries")
+            await asyncio.sleep(self._backoff(attempt))
+            attempt += 1
+
+    async def acall(self, fn: Callable[[], Awaitable[Any]], key: Optional[Hashable] = None) -> Any:
+        """Async ``call``; coalescing applies within one event loop"""
+        if key is None:
+            return await self._acall_with_retries(fn)
+
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            inflight = self._async_inflight.setdefault(loop, {})
+        future = inflight.get(key)
+        if future is not None:
+            self._count("coalesced")
+            return await asyncio.shield(future)
+
+        future = inflight[key] = loop.create_future()
+        try:
+            result = await self._acall_with_retries(fn)
+            future.set_result(result)
+            return result
+        except BaseException as e:
+            future.set_exception(e)
+            # Mark the exception retrieved when nobody else was waiting
+            future.exception()
+            raise
+        finally:
+            inflight.pop(key, None)
+
+    async def astream(self, fn: Callable[[], Any]):
+        """Async ``stream``"""
+        attempt = 0
+        while True:
+            self._count("throttled_seconds", await self.bucket.aacquire())
+            started = False
+            async with self._async_slot():
+                try:
+                    self._count("calls")
+                    async for chunk in fn():
+                        started = True
+                        yield chunk
+                    return
+                except Exception as e:
+                    if started or attempt >= self.max_retries or not is_retryable(e):
+                        self._count("failures")
+                        raise
+            self._count("retries")
+            await asyncio.sleep(self._backoff(attempt))
+            attempt += 1
+
+
+_gateway = None
+_gateway_lock = threading.Lock()
+
+
+def get_gateway() -> LLMGateway:
+    """The process-wide gateway, configured from LLM_* environment variables"""
+    global _gateway
+    with _gateway_lock:
+        if _gateway is None:
+            _gateway = LLMGateway(
+                requests_per_minute=float(os.getenv("LLM_REQUESTS_PER_MINUTE", "60")),
+                max_concurrency=int(os.getenv("LLM_MAX_CONCURRENCY", "8")),
+                max_retries=int(os.getenv("LLM_MAX_RETRIES", "4"))
+            )
+        return _gateway
@@ -2,77 +2,194 @@
 Main application orchestrator for AI Code Learning Assistant
 """
 import os
-from dotenv import load_dotenv
-from rag_system.document_loader import ProgrammingDocumentLoader
-from rag_system.vector_store import CodeLearningVectorStore
-from rag_system.retrieval_chain import CodeLearningRAGChain
-from code_reviewer.analyzer import CodeAnalyzer
-from problem_generator.generator import ProblemGenerator
+from typing import Any, Dict, Iterator, Optional
+from startup_timing import startup_timer
+
+with startup_timer.measure("import dotenv"):
+    from dotenv import load_dotenv
 
 # Load environment variables
 load_dotenv()
 
 class AICodeLearningAssistant:
-    def __init__(self):
-        self.vector_store = None
-        self.rag_chain = None
-        self.code_analyzer = None
-        self.problem_generator = None
+    def __init__(self, persist_directory: str = "./chroma_db", vector_backend: Optional[str] = None):
+        self.persist_directory = persist_directory
+        self.vector_backend = vector_backend or os.getenv("VECTOR_STORE_BACKEND", "chroma")
+        
+        # Components (and their heavy imports) are created on first use
+        self._vector_store = None
+        self._rag_chain = None
+        self._code_analyzer = None
+        self._problem_generator = None
         self.initialized = False
     
+    @property
+    def vector_store(self):
+        if self._vector_store is None:
+            with startup_timer.measure("component: vector store"):
+                from rag_system.vector_store import CodeLearningVectorStore
+                self._vector_store = CodeLearningVectorStore(
+                    self.persist_directory, backend=self.vector_backend
+                )
+        return self._vector_store
+    
+    @property
+    def rag_chain(self):
+        if self._rag_chain is None:
+            with startup_timer.measure("component: rag chain"):
+                from rag_system.retrieval_chain import CodeLearningRAGChain
+                self._rag_chain = CodeLearningRAGChain(self.vector_store)
+        return self._rag_chain
+    
+    @property
+    def code_analyzer(self):
+        if self._code_analyzer is None:
+            with startup_timer.measure("component: code analyzer"):
+                from code_reviewer.analyzer import CodeAnalyzer
+                self._code_analyzer = CodeAnalyzer(
+                    review_cache_dir=os.path.join(self.persist_directory, "review_cache")
+                )
+        return self._code_analyzer
+    
+    @property
+    def problem_generator(self):
+        if self._problem_generator is None:
+            with startup_timer.measure("component: problem generator"):
+                from problem_generator.generator import ProblemGenerator
+                self._problem_generator = ProblemGenerator()
+        return self._problem_generator
+    
     def initialize(self, docs_path: str = "./data/programming_docs"):
-        """Initialize all components"""
+        """Initialize the assistant; components load lazily on first use"""
         try:
-            # Check for API key
-            if not os.getenv("GOOGLE_API_KEY"):
+            from llm_gateway.chat_model import llm_provider
+            provider = llm_provider()
+            
+            # Check for API key; the offline fake provider needs none
+            if provider == "gemini" and not os.getenv("GOOGLE_API_KEY"):
                 print("❌ GOOGLE_API_KEY not found in environment variables")
                 print("Please set up your .env file with your Gemini API key")
                 print("Get your free API key from: https://makersuite.google.com/app/apikey")
                 self.initialized = False
                 return
             
-            # Initialize vector store
-            self.vector_store = CodeLearningVectorStore()
-            
-            # Load documents if directory exists
+            # Load new or changed documents if directory exists
             if os.path.exists(docs_path):
-                doc_loader = ProgrammingDocumentLoader()
-                documents = doc_loader.load_documents(docs_path)
-                
-                if documents:
-                    self.vector_store.add_documents(documents)
-                    print(f"Loaded {len(documents)} documents into vector store")
-            
-            # Initialize RAG chain
-            self.rag_chain = CodeLearningRAGChain(self.vector_store)
-            
-            # Initialize other components
-            self.code_analyzer = CodeAnalyzer()
-            self.problem_generator = ProblemGenerator()
+                with startup_timer.measure("document ingestion"):
+                    self._ingest_documents(docs_path)
             
             self.initialized = True
             print("AI Code Learning Assistant initialized successfully!")
-            print("Using Google Gemini 2.0 Flash API")
+            if provider == "fake":
+                print("Using offline fake LLM provider (LLM_PROVIDER=fake)")
+            else:
+                print("Using Google Gemini 2.0 Flash API")
             
         except Exception as e:
             print(f"Error initializing assistant: {e}")
             print("Make sure your GOOGLE_API_KEY is valid and you have internet connection")
             self.initialized = False
     
-    def ask_question(self, question: str, use_conversation: bool = True):
-        """Ask a programming question"""
+    def startup_report(self) -> str:
+        """Cold-start cost of every component loaded so far"""
+        return startup_timer.report()
+    
+    def _ingest_documents(self, docs_path: str):
+        """Embed only documents that are new or changed since the last run"""
+        from rag_system.document_loader import ProgrammingDocumentLoader
+        from rag_system.ingestion_manifest import IngestionManifest
+        
+        doc_loader = ProgrammingDocumentLoader()
+        # One manifest per backend storage and embedding model, so switching either re-ingests
+        manifest = IngestionManifest(self.vector_store.manifest_path)
+        
+        try:
+            changed, removed = manifest.plan(doc_loader.list_files(docs_path), root=docs_path)
+            if not changed and not removed:
+                print("Vector store is up to date")
+                return
+            
+            # Indexes are saved once at the end of the run instead of after every batch
+            with self.vector_store.bulk_update():
+                # Drop chunks of deleted files and of the previous version of modified files
+                stale_paths = removed + [path for path, _ in changed]
+                if not self.vector_store.delete_documents(manifest.chunk_ids_for(stale_paths)):
+                    return
+                for path in removed:
+                    manifest.forget(path)
+                
+                # Stream chunk batches so memory is bounded by the batch size
+                hashes = dict(changed)
+                chunk_ids = {path: [] for path in hashes}
+                failed = set()
+                
+                def load_failed(path: str, error: Exception):
+                    failed.add(os.path.normpath(path))
+                
+                for batch in doc_loader.iter_document_batches(list(hashes), on_error=load_failed):
+                    sources = [os.path.normpath(doc.metadata['source']) for doc in batch]
+                    ids = [
+                        manifest.chunk_id(source, hashes[source], doc.metadata['chunk_index'])
+                        for source, doc in zip(sources, batch)
+                    ]
+                    
+                    if self.vector_store.add_documents(batch, ids=ids):
+                        for source, chunk_id in zip(sources, ids):
+                            chunk_ids[source].append(chunk_id)
+                    else:
+                        failed.update(sources)
+            
+            chunk_count = 0
+            for path, content_hash in changed:
+                if path in failed:
+                    # Unreadable files and partially added chunks are retried on the next run
+                    manifest.record(path, "", chunk_ids[path])
+                    continue
+                
+                manifest.record(path, content_hash, chunk_ids[path])
+                chunk_count += len(chunk_ids[path])
+            
+            manifest.save()
+            print(f"Loaded {chunk_count} chunks from {len(changed)} changed files, "
+                  f"removed {len(removed)} deleted files")
+            print(self.vector_store.embedding_engine.throughput_report())
+        finally:
+            # The worker pool only serves bulk ingestion; queries are embedded in process
+            self.vector_store.embedding_engine.close()
+    
+    def ask_question(self, question: str, use_conversation: bool = True, session_id: str = "default"):
+        """Ask a programming question; conversation history is kept per session_id"""
         if not self.initialized:
             return {"error": "Assistant not initialized"}
         
-        return self.rag_chain.ask_question(question, use_conversation)
+        return self.rag_chain.ask_question(question, use_conversation, session_id)
+    
+    def ask_question_stream(self, question: str, use_conversation: bool = True,
+                            session_id: str = "default") -> Iterator[Dict[str, Any]]:
+        """Stream an answer: a sources event first, then token events"""
+        if not self.initialized:
+            yield {"type": "error", "error": "Assistant not initialized"}
+            return
+        
+        yield from self.rag_chain.ask_question_stream(question, use_conversation, session_id)
     
-    def review_code(self, code: str, language: str = "python"):
-        """Review student code"""
+    def review_code(self, code: str, language: str = "python", session_id: Optional[str] = None):
+        """Review student code; with a session_id only the parts changed since the last review are redone"""
         if not self.initialized:
             return {"error": "Assistant not initialized"}
         
+        if session_id is not None:
+            return self.code_analyzer.incremental_review(code, language, session_id)
         return self.code_analyzer.comprehensive_review(code, language)
     
+    def review_code_stream(self, code: str, language: str = "python") -> Iterator[str]:
+        """Stream the AI review text of student code"""
+        if not self.initialized:
+            yield "Assistant not initialized"
+            return
+        
+        yield from self.code_analyzer.get_ai_review_stream(code, language)
+    
     def generate_problem(self, topic: str, difficulty: str = "medium", language: str = "python"):
         """Generate a coding problem"""
         if not self.initialized:
@@ -80,12 +197,52 @@ class AICodeLearningAssistant:
         
         return self.problem_generator.generate_problem(topic, difficulty, language)
     
+    def generate_problem_stream(self, topic: str, difficulty: str = "medium",
+                                language: str = "python") -> Iterator[str]:
+        """Stream the text of a generated coding problem"""
+        if not self.initialized:
+            yield "Assistant not initialized"
+            return
+        
+        yield from self.problem_generator.generate_problem_stream(topic, difficulty, language)
+    
     def get_hint(self, problem: str, student_code: str = "", hint_level: int = 1):
         """Get a hint for a problem"""
         if not self.initialized:
             return {"error": "Assistant not initialized"}
         
         return self.problem_generator.get_hint(problem, student_code, hint_level)
+    
+    # Async variants: LLM calls are awaited, so one event loop can serve many students at once
+    async def aask_question(self, question: str, use_conversation: bool = True, session_id: str = "default"):
+        """Ask a programming question without blocking the event loop"""
+        if not self.initialized:
+            return {"error": "Assistant not initialized"}
+        
+        return await self.rag_chain.aask_question(question, use_conversation, session_id)
+    
+    async def areview_code(self, code: str, language: str = "python", session_id: Optional[str] = None):
+        """Review student code without blocking the event loop"""
+        if not self.initialized:
+            return {"error": "Assistant not initialized"}
+        
+        if session_id is not None:
+            return await self.code_analyzer.aincremental_review(code, language, session_id)
+        return await self.code_analyzer.acomprehensive_review(code, language)
+    
+    async def agenerate_problem(self, topic: str, difficulty: str = "medium", language: str = "python"):
+        """Generate a coding problem without blocking the event loop"""
+        if not self.initialized:
+            return {"error": "Assistant not initialized"}
+        
+        return await self.problem_generator.agenerate_problem(topic, difficulty, language)
+    
+    async def aget_hint(self, problem: str, student_code: str = "", hint_level: int = 1):
+        """Get a hint for a problem without blocking the event loop"""
+        if not self.initialized:
+            return {"error": "Assistant not initialized"}
+        
+        return await self.problem_generator.aget_hint(problem, student_code, hint_level)
 
 # Global instance
 assistant = AICodeLearningAssistant()
@@ -113,4 +270,6 @@ def add_numbers(a,b):
         if problem.get("generated"):
             print("Generated Problem:", problem["problem_content"][:200] + "...")
         else:
-            print("Problem generation failed:", problem.get("error", "Unknown error"))
\ No newline at end of file
+            print("Problem generation failed:", problem.get("error", "Unknown error"))
+        
+        print(assistant.startup_report())
\ No newline at end of file
@@ -1,13 +1,14 @@
 """
 AI-powered coding problem generator
 """
-from typing import Dict, List, Any
-from langchain_google_genai import ChatGoogleGenerativeAI
+from typing import Dict, Iterator, List, Any
 from langchain.prompts import PromptTemplate
+from startup_timing import startup_timer
 
 class ProblemGenerator:
-    def __init__(self):
-        self.llm = ChatGoogleGenerativeAI(model="gemini-2.0-flash-exp", temperature=0.7)
+    def __init__(self, model_name: str = "gemini-2.0-flash-exp"):
+        self.model_name = model_name
+        self._llm = None
         
         self.problem_prompt = PromptTemplate(
             template="""You are an expert programming instructor creating practice problems.
@@ -45,6 +46,15 @@ class ProblemGenerator:
             input_variables=["problem", "student_code", "hint_level"]
         )
     
+    @property
+    def llm(self):
+        """Shared gateway chat model, created on first use"""
+        if self._llm is None:
+            with startup_timer.measure("llm client (problem generator)"):
+                from llm_gateway.chat_model import get_chat_model
+                self._llm = get_chat_model(self.model_name, temperature=0.7)
+        return self._llm
+    
     def generate_problem(self, topic: str, difficulty: str = "medium", 
                         language: str = "python", student_level: str = "beginner") -> Dict[str, Any]:
         """Generate a coding problem"""
@@ -72,6 +82,50 @@ class ProblemGenerator:
                 "generated": False
             }
     
+    async def agenerate_problem(self, topic: str, difficulty: str = "medium",
+                                language: str = "python", student_level: str = "beginner") -> Dict[str, Any]:
+        """Async generate_problem"""
+        try:
+            chain = self.problem_prompt | self.llm
+            result = await chain.ainvoke({
+                "topic": topic,
+                "difficulty": difficulty,
+                "language": language,
+                "student_level": student_level
+            })
+            
+            return {
+                "topic": topic,
+                "difficulty": difficulty,
+                "language": language,
+                "student_level": student_level,
+                "problem_content": result.content,
+                "generated": True
+            }
+        
+        except Exception as e:
+            return {
+                "error": f"Failed to generate problem: {str(e)}",
+                "generated": False
+            }
+    
+    def generate_problem_stream(self, topic: str, difficulty: str = "medium",
+                                language: str = "python", student_level: str = "beginner") -> Iterator[str]:
+        """Stream the problem text as it is generated"""
+        try:
+            chain = self.problem_prompt | self.llm
+            for chunk in chain.stream({
+                "topic": topic,
+                "difficulty": difficulty,
+                "language": language,
+                "student_level": student_level
+            }):
+                if chunk.content:
+                    yield chunk.content
+        
+        except Exception as e:
+            yield f"Failed to generate problem: {str(e)}"
+    
     def get_hint(self, problem: str, student_code: str = "", hint_level: int = 1) -> str:
         """Generate a hint for the student"""
         try:
@@ -86,6 +140,20 @@ class ProblemGenerator:
         except Exception as e:
             return f"Error generating hint: {str(e)}"
     
+    async def aget_hint(self, problem: str, student_code: str = "", hint_level: int = 1) -> str:
+        """Async get_hint"""
+        try:
+            chain = self.hint_prompt | self.llm
+            result = await chain.ainvoke({
+                "problem": problem,
+                "student_code": student_code,
+                "hint_level": hint_level
+            })
+            return result.content
+        
+        except Exception as e:
+            return f"Error generating hint: {str(e)}"
+    
     def get_problem_topics(self) -> List[str]:
         """Get list of available problem topics"""
         return [
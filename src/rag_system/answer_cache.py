@@ -0,0 +1,211 @@
+"""
+Persistent semantic cache of answered questions
+"""
+import json
+import os
+import re
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+from langchain.schema import Document
+
+from rag_system.embedding_cache import normalize_text
+from rag_system.flat_index import normalize_rows
+
+
+class SemanticAnswerCache:
+    """
+    Answers keyed by question embedding.
+
+    A new question is served from the cache when it is identical to, or
+    has cosine similarity of at least ``threshold`` with, a previously
+    answered question. Entries are tied to the store's index version and
+    the whole cache is dropped when the corpus changes. The least recently
+    used entries are evicted beyond ``max_entries``.
+
+    Files are namespaced by the embedding model the question vectors come
+    from and by the LLM that wrote the answers. New answers are appended
+    to a JSON-lines log, which is only rewritten once it holds twice
+    ``max_entries`` lines.
+    """
+
+    def __init__(self, cache_dir: str, model_name: str, embedding_model_name: str,
+                 threshold: float = 0.9, max_entries: int = 500):
+        self.cache_dir = cache_dir
+        self.threshold = threshold
+        self.max_entries = max_entries
+        slug = re.sub(r"[^A-Za-z0-9_.-]+", "_", f"{embedding_model_name}__{model_name}")
+        self.log_path = os.path.join(cache_dir, f"{slug}.jsonl")
+
+        self.index_version = None
+        self.records: List[Dict[str, Any]] = []
+        self.vectors = np.zeros((0, 0), dtype=np.float32)
+        self._by_question: Dict[str, int] = {}
+        self._log_rows = 0
+        self._lock = threading.RLock()
+        self.hits = 0
+        self.misses = 0
+        self._load()
+
+    def _load(self):
+        """Replay the log; later lines for a question replace earlier ones, and a torn last line is cut off"""
+        if not os.path.exists(self.log_path):
+            return
+
+        try:
+            records, vectors, valid_bytes = [], [], 0
+            with open(self.log_path, "rb") as f:
+                for line in f:
+                    if not line.endswith(b"\n"):
+                        break
+                    entry = json.loads(line)
+                    valid_bytes += len(line)
+                    self._log_rows += 1
+                    version = entry.pop("index_version")
+                    if version != self.index_version:
+                        # Lines after a version change were answered from a newer corpus
+                        records, vectors = [], []
+                        self.index_version = version
+                    vectors.append(entry.pop("vector"))
+                    records.append(entry)
+            if os.path.getsize(self.log_path) > valid_bytes:
+                os.truncate(self.log_path, valid_bytes)
+
+            latest = sorted({record["question"]: i for i, record in enumerate(records)}.values())
+            self.records = [records[i] for i in latest]
+            if latest:
+                self.vectors = np.asarray([vectors[i] for i in latest], dtype=np.float32)
+            self._evict()
+            self._reindex()
+        except Exception as e:
+            print(f"Error loading answer cache: {e}")
+            self.records, self.vectors = [], np.zeros((0, 0), dtype=np.float32)
+            self._by_question = {}
+
+    def _entry(self, position: int) -> str:
+        record = dict(self.records[position], index_version=self.index_version,
+                      vector=self.vectors[position].tolist())
+        return json.dumps(record) + "\n"
+
+    def save(self):
+        """Rewrite the log with only the live entries"""
+        try:
+            with self._lock:
+                os.makedirs(self.cache_dir, exist_ok=True)
+                tmp_path = self.log_path + ".tmp"
+                with open(tmp_path, "w", encoding="utf-8") as f:
+                    f.write("".join(self._entry(i) for i in range(len(self.records))))
+                os.replace(tmp_path, self.log_path)
+                self._log_rows = len(self.records)
+        except Exception as e:
+            print(f"Error saving answer cache: {e}")
+
+    def _append(self, position: int):
+        """Log one new or replaced entry, compacting once superseded and evicted lines pile up"""
+        if self._log_rows >= 2 * self.max_entries:
+            self.save()
+            return
+
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            with open(self.log_path, "a", encoding="utf-8") as f:
+                f.write(self._entry(position))
+            self._log_rows += 1
+        except Exception as e:
+            print(f"Error saving answer cache: {e}")
+
+    def _remove_log(self):
+        self._log_rows = 0
+        if os.path.exists(self.log_path):
+            os.remove(self.log_path)
+
+    def _reindex(self):
+        self._by_question = {record["question"]: i for i, record in enumerate(self.records)}
+
+    def _sync(self, index_version):
+        """Answers were grounded in the old corpus, so a new index version drops them all"""
+        if index_version != self.index_version:
+            if self.records:
+                self.records, self.vectors = [], np.zeros((0, 0), dtype=np.float32)
+                self._by_question = {}
+            try:
+                self._remove_log()
+            except OSError as e:
+                print(f"Error resetting answer cache: {e}")
+            self.index_version = index_version
+
+    def lookup(self, question: str, vector, index_version) -> Optional[Dict[str, Any]]:
+        """Cached answer and source documents for a question, or None"""
+        with self._lock:
+            self._sync(index_version)
+            position = self._by_question.get(normalize_text(question))
+            if position is None and len(self.records):
+                query = normalize_rows(np.asarray(vector, dtype=np.float32).reshape(1, -1))[0]
+                scores = self.vectors @ query
+                best = int(scores.argmax())
+                if scores[best] >= self.threshold:
+                    position = best
+
+            if position is None:
+                self.misses += 1
+                return None
+
+            self.hits += 1
+            record = self.records[position]
+            record["last_used"] = time.time()
+            return {
+                "answer": record["answer"],
+                "source_documents": [Document(page_content=source["page_content"], metadata=source["metadata"])
+                                     for source in record["sources"]],
+                "cached_question": record["question"]
+            }
+
+    def put(self, question: str, vector, answer: str, source_documents: List[Document], index_version):
+        with self._lock:
+            self._sync(index_version)
+            key = normalize_text(question)
+            vector = normalize_rows(np.asarray(vector, dtype=np.float32).reshape(1, -1))
+            record = {
+                "question": key,
+                "answer": answer,
+                "sources": [{"page_content": doc.page_content, "metadata": doc.metadata}
+                            for doc in source_documents],
+                "last_used": time.time()
+            }
+
+            if key in self._by_question:
+                position = self._by_question[key]
+                self.records[position] = record
+                self.vectors[position] = vector[0]
+            else:
+                self.records.append(record)
+                self.vectors = vector if len(self.vectors) == 0 else np.vstack([self.vectors, vector])
+                self._evict()
+                self._reindex()
+                position = self._by_question[key]
+            self._append(position)
+
+    def _evict(self):
+        if len(self.records) <= self.max_entries:
+            return
+
+        keep = np.argsort([-record["last_used"] for record in self.records], kind="stable")[:self.max_entries]
+        keep = np.sort(keep)
+        self.records = [self.records[i] for i in keep]
+        self.vectors = self.vectors[keep]
+
+    def clear(self):
+        with self._lock:
+            self.records, self.vectors = [], np.zeros((0, 0), dtype=np.float32)
+            self._by_question = {}
+            try:
+                self._remove_log()
+            except OSError as e:
+                print(f"Error clearing answer cache: {e}")
+
+    def stats(self) -> Dict[str, float]:
+        total = self.hits + self.misses
+        return {"size": len(self.records), "hits": self.hits, "misses": self.misses,
+                "hit_rate": self.hits / total if total else 0.0}
@@ -0,0 +1,253 @@
+"""
+Structure-aware chunking for code examples
+"""
+import ast
+import re
+from typing import Dict, List, Any
+
+MODULE_NAME = "<module>"
+
+_STRING_RE = re.compile(r'"(?:\\.|[^"\\])*"|\'(?:\\.|[^\'\\])*\'')
+_LINE_COMMENT_RE = re.compile(r'//.*')
+_BLOCK_COMMENT_RE = re.compile(r'/\*.*?\*/')
+_CONTAINER_RE = re.compile(r'\b(class|interface|struct|enum|namespace)\s+(\w+)')
+_JS_FUNCTION_RE = re.compile(r'\bfunction\s*\*?\s*(\w+)')
+_ASSIGNED_FUNCTION_RE = re.compile(r'(\w+)\s*[:=]\s*(?:async\s+)?(?:function\b|\([^)]*\)\s*=>|\w+\s*=>)')
+_CALLABLE_RE = re.compile(r'(~?\w+)\s*\([^;]*$')
+_PY_DEF_RE = re.compile(r'^(?:async\s+def|def|class)\s+(\w+)')
+_CONTROL_KEYWORDS = {"if", "for", "while", "switch", "catch", "return", "else", "do", "try", "with"}
+
+
+class CodeChunker:
+    """
+    Split source files along function and class boundaries.
+
+    Python uses the ``ast`` module; brace languages (JS, Java, C++) use a
+    brace-depth heuristic and anything else falls back to indentation.
+    Every chunk carries its qualified name and 1-based line range. Classes
+    are split into their members when they are oversized, or always with
+    ``split_classes``.
+    """
+
+    BRACE_LANGUAGES = {"js", "java", "cpp", "c", "h", "hpp", "ts", "cs", "go"}
+
+    def __init__(self, max_chunk_chars: int = 1500, split_classes: bool = False):
+        self.max_chunk_chars = max_chunk_chars
+        self.split_classes = split_classes
+
+    def chunk(self, content: str, language: str) -> List[Dict[str, Any]]:
+        """Return chunks as dicts with content, qualified_name, kind, start_line and end_line"""
+        lines = content.splitlines(keepends=True)
+        if not lines:
+            return []
+
+        language = language.lower()
+        segments = None
+        if language in ("py", "python"):
+            try:
+                tree = ast.parse(content)
+                segments = self._python_segments(tree.body, lines, 1, len(lines), "")
+            except (SyntaxError, ValueError):
+                segments = None
+        elif language in self.BRACE_LANGUAGES:
+            segments = self._brace_segments(lines, 1, len(lines), 1, "")
+
+        if segments is None:
+            segments = self._indent_segments(lines, language)
+
+        chunks = []
+        for start, end, name, kind in segments:
+            chunks.extend(self._build_chunks(lines, start, end, name, kind))
+        return chunks
+
+    def _build_chunks(self, lines: List[str], start: int, end: int,
+                      name: str, kind: str) -> List[Dict[str, Any]]:
+        """Materialize a line range, splitting it further if it is oversized"""
+        text = "".join(lines[start - 1:end])
+        if not text.strip():
+            return []
+
+        if len(text) <= self.max_chunk_chars:
+            return [self._make_chunk(text, name, kind, start, end)]
+
+        # Oversized leaf unit: cut it into line windows that fit the size limit
+        chunks = []
+        part_start = start
+        size = 0
+        for line_no in range(start, end + 1):
+            line_len = len(lines[line_no - 1])
+            if size and size + line_len > self.max_chunk_chars:
+                chunks.append(self._make_chunk(
+                    "".join(lines[part_start - 1:line_no - 1]), name, kind, part_start, line_no - 1
+                ))
+                part_start = line_no
+                size = 0
+            size += line_len
+        chunks.append(self._make_chunk("".join(lines[part_start - 1:end]), name, kind, part_start, end))
+
+        for i, chunk in enumerate(chunks, 1):
+            chunk["part"] = i
+        return chunks
+
+    @staticmethod
+    def _make_chunk(text: str, name: str, kind: str, start: int, end: int) -> Dict[str, Any]:
+        return {
+            "content": text,
+            "qualified_name": name,
+            "kind": kind,
+            "start_line": start,
+            "end_line": end
+        }
+
+    @staticmethod
+    def _leading_comment_start(lines: List[str], start: int, cursor: int, markers: tuple) -> int:
+        """Extend a unit upward over the comment lines directly above it"""
+        while start - 1 >= cursor and lines[start - 2].strip().startswith(markers):
+            start -= 1
+        return start
+
+    def _python_segments(self, body: List[ast.stmt], lines: List[str], cursor: int,
+                         container_end: int, prefix: str) -> List[tuple]:
+        """
+        Walk one block of statements. Functions and classes become their own
+        segments; the statements between them are grouped under the
+        enclosing name. Oversized classes are split into their members.
+        """
+        glue_name = prefix[:-1] if prefix else MODULE_NAME
+        glue_kind = "class" if prefix else "module"
+        segments = []
+
+        for node in body:
+            if not isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)):
+                continue
+
+            start = min([d.lineno for d in node.decorator_list] + [node.lineno])
+            start = self._leading_comment_start(lines, start, cursor, ("#",))
+            end = node.end_lineno
+            if start > cursor:
+                segments.append((cursor, start - 1, glue_name, glue_kind))
+
+            qualified_name = prefix + node.name
+            text_len = sum(len(line) for line in lines[start - 1:end])
+            has_members = any(
+                isinstance(child, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef))
+                for child in node.body
+            )
+
+            if isinstance(node, ast.ClassDef) and has_members and (self.split_classes
+                                                                   or text_len > self.max_chunk_chars):
+                segments.extend(self._python_segments(node.body, lines, start, end, qualified_name + "."))
+            else:
+                kind = "class" if isinstance(node, ast.ClassDef) else "function"
+                segments.append((start, end, qualified_name, kind))
+            cursor = end + 1
+
+        if cursor <= container_end:
+            segments.append((cursor, container_end, glue_name, glue_kind))
+        return segments
+
+    @staticmethod
+    def _strip_code_line(line: str, in_block_comment: bool) -> tuple:
+        """Remove strings and comments so braces inside them are not counted"""
+        if in_block_comment:
+            if "*/" not in line:
+                return "", True
+            line = line[line.index("*/") + 2:]
+
+        line = _STRING_RE.sub('""', line)
+        line = _BLOCK_COMMENT_RE.sub(" ", line)
+        line = _LINE_COMMENT_RE.sub("", line)
+        if "/*" in line:
+            return line[:line.index("/*")], True
+        return line, False
+
+    @staticmethod
+    def _brace_unit_name(header: str) -> tuple:
+        """Guess (name, kind) from the text before a block's opening brace"""
+        match = _CONTAINER_RE.search(header)
+        if match:
+            return match.group(2), "class"
+
+        for pattern in (_JS_FUNCTION_RE, _ASSIGNED_FUNCTION_RE):
+            match = pattern.search(header)
+            if match:
+                return match.group(1), "function"
+
+        before_brace = header.split("{", 1)[0]
+        for match in _CALLABLE_RE.finditer(before_brace.replace("\n", " ")):
+            name = match.group(1)
+            if name not in _CONTROL_KEYWORDS:
+                return name, "function"
+        return None, "block"
+
+    def _brace_segments(self, lines: List[str], scan_start: int, scan_end: int,
+                        cursor: int, prefix: str) -> List[tuple]:
+        """Split brace-delimited code into top-level blocks of the given range"""
+        glue_name = prefix[:-1] if prefix else MODULE_NAME
+        glue_kind = "class" if prefix else "module"
+        segments = []
+        depth = 0
+        in_block_comment = False
+        block_start = None
+        opener_line = None
+
+        for line_no in range(scan_start, scan_end + 1):
+            code, in_block_comment = self._strip_code_line(lines[line_no - 1], in_block_comment)
+
+            for char in code:
+                if char == "{":
+                    if depth == 0:
+                        # Include signature lines and annotations above the brace
+                        block_start = line_no
+                        while (block_start - 1 >= max(cursor, scan_start)
+                               and lines[block_start - 2].strip()
+                               and not lines[block_start - 2].rstrip().endswith((";", "}", "{"))):
+                            block_start -= 1
+                        block_start = self._leading_comment_start(
+                            lines, block_start, cursor, ("//", "/*", "*")
+                        )
+                        opener_line = line_no
+                    depth += 1
+                elif char == "}" and depth > 0:
+                    depth -= 1
+                    if depth == 0 and block_start is not None:
+                        if block_start > cursor:
+                            segments.append((cursor, block_start - 1, glue_name, glue_kind))
+
+                        header = "".join(lines[block_start - 1:opener_line])
+                        name, kind = self._brace_unit_name(header)
+                        qualified_name = prefix + name if name else glue_name
+                        text_len = sum(len(line) for line in lines[block_start - 1:line_no])
+
+                        oversized = self.split_classes or text_len > self.max_chunk_chars
+                        if kind == "class" and oversized and line_no - opener_line > 1:
+                            segments.extend(self._brace_segments(
+                                lines, opener_line + 1, line_no, block_start, qualified_name + "."
+                            ))
+                        else:
+                            segments.append((block_start, line_no, qualified_name,
+                                             kind if name else glue_kind))
+                        cursor = line_no + 1
+                        block_start = None
+
+        if cursor <= scan_end:
+            segments.append((cursor, scan_end, glue_name, glue_kind))
+        return segments
+
+    def _indent_segments(self, lines: List[str], language: str) -> List[tuple]:
+        """Fallback: start a new unit at each unindented line after a blank line"""
+        boundaries = [1]
+        for line_no in range(2, len(lines) + 1):
+            line = lines[line_no - 1]
+            if line.strip() and not line[0].isspace() and not lines[line_no - 2].strip():
+                boundaries.append(line_no)
+        boundaries.append(len(lines) + 1)
+
+        segments = []
+        for start, next_start in zip(boundaries, boundaries[1:]):
+            match = _PY_DEF_RE.match(lines[start - 1]) if language in ("py", "python") else None
+            if match:
+                segments.append((start, next_start - 1, match.group(1), "function"))
+            else:
+                segments.append((start, next_start - 1, MODULE_NAME, "module"))
+        return segments
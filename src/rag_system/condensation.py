@@ -0,0 +1,87 @@
+"""
+Policy for rewriting follow-up questions before retrieval
+"""
+import re
+import threading
+from typing import Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+from langchain_core.messages import BaseMessage, HumanMessage
+
+# Words and phrases that point back into the conversation
+_FOLLOW_UP_RE = re.compile(
+    r"\b(it|its|it's|this|that|these|those|they|them|their|he|she|"
+    r"above|previous|earlier|same|again|instead|also|another|other|else|"
+    r"more|further|then|there|one|ones|former|latter)\b"
+    r"|^\s*(and|but|so|or|what about|how about|why not|why|how come|example|explain)\b",
+    re.IGNORECASE
+)
+
+
+class CondensationPolicy:
+    """
+    Decide whether a follow-up question needs the LLM rewrite step.
+
+    mode="always" rewrites whenever there is history (the
+    ConversationalRetrievalChain behaviour), mode="never" never rewrites,
+    and mode="auto" also skips questions that look self-contained: long
+    enough and free of references back into the conversation. With an
+    ``embed_fn``, short questions without such references are additionally
+    compared with the previous question and treated as a new topic when
+    they are dissimilar.
+    """
+
+    MODES = ("auto", "always", "never")
+
+    def __init__(self, mode: str = "auto", min_words: int = 6,
+                 embed_fn: Optional[Callable[[str], List[float]]] = None,
+                 topic_change_threshold: float = 0.3):
+        if mode not in self.MODES:
+            raise ValueError(f"Unknown condensation mode: {mode}")
+
+        self.mode = mode
+        self.min_words = min_words
+        self.embed_fn = embed_fn
+        self.topic_change_threshold = topic_change_threshold
+        self._lock = threading.Lock()
+        self.counts: Dict[str, int] = {}
+
+    def _record(self, decision: str):
+        with self._lock:
+            self.counts[decision] = self.counts.get(decision, 0) + 1
+
+    def _is_new_topic(self, question: str, history: List[BaseMessage]) -> bool:
+        previous = next((message.content for message in reversed(history)
+                         if isinstance(message, HumanMessage)), None)
+        if previous is None:
+            return False
+
+        a, b = np.asarray(self.embed_fn(question)), np.asarray(self.embed_fn(previous))
+        similarity = float(a @ b / (np.linalg.norm(a) * np.linalg.norm(b) or 1.0))
+        return similarity < self.topic_change_threshold
+
+    def decide(self, question: str, history: List[BaseMessage]) -> Tuple[bool, str]:
+        """(rewrite?, reason) for one question, recorded in the metrics"""
+        if not history:
+            rewrite, reason = False, "skipped_no_history"
+        elif self.mode == "never":
+            rewrite, reason = False, "skipped_disabled"
+        elif self.mode == "always":
+            rewrite, reason = True, "rewritten"
+        elif _FOLLOW_UP_RE.search(question):
+            rewrite, reason = True, "rewritten"
+        elif len(question.split()) >= self.min_words:
+            rewrite, reason = False, "skipped_self_contained"
+        elif self.embed_fn is not None and self._is_new_topic(question, history):
+            rewrite, reason = False, "skipped_new_topic"
+        else:
+            rewrite, reason = True, "rewritten"
+
+        self._record(reason)
+        return rewrite, reason
+
+    def stats(self) -> Dict[str, float]:
+        with self._lock:
+            total = sum(self.counts.values())
+            skipped = total - self.counts.get("rewritten", 0)
+            return dict(self.counts, total=total, skip_rate=skipped / total if total else 0.0)
@@ -0,0 +1,177 @@
+"""
+Context assembly between retrieval and the "stuff" prompt
+"""
+import re
+from typing import Any, Callable, List, Set
+
+from langchain.schema import Document
+from langchain_core.callbacks import CallbackManagerForRetrieverRun
+from langchain_core.retrievers import BaseRetriever
+
+_WORD_RE = re.compile(r"\w+")
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count (about four characters per token) without a tokenizer"""
+    return max(1, len(text) // 4)
+
+
+def _shingles(text: str, size: int = 3) -> Set[tuple]:
+    words = _WORD_RE.findall(text.lower())
+    if len(words) <= size:
+        return {tuple(words)}
+    return {tuple(words[i:i + size]) for i in range(len(words) - size + 1)}
+
+
+def _text_overlap(left: str, right: str, max_overlap: int) -> int:
+    """Length of the longest suffix of ``left`` that is a prefix of ``right``"""
+    for length in range(min(max_overlap, len(left), len(right)), 0, -1):
+        if right.startswith(left[-length:]):
+            return length
+    return 0
+
+
+class _Span:
+    """A run of text from one source, built from one or more retrieved chunks"""
+
+    def __init__(self, doc: Document, rank: int):
+        self.metadata = dict(doc.metadata)
+        self.text = doc.page_content
+        self.rank = rank
+        self.chunks = 1
+        self.start = doc.metadata.get("start_index")
+        self.end = self.start + len(doc.page_content) if self.start is not None else None
+        self.start_line = doc.metadata.get("start_line")
+        self.end_line = doc.metadata.get("end_line")
+        self.last_chunk_index = doc.metadata.get("chunk_index")
+
+    def merge(self, doc: Document, rank: int, max_overlap: int) -> bool:
+        """Append a chunk that directly follows or overlaps this span"""
+        metadata = doc.metadata
+        start = metadata.get("start_index")
+        text = doc.page_content
+
+        if self.end is not None and start is not None:
+            # Character offsets from the splitter: overlapping or touching spans
+            if not self.start <= start <= self.end:
+                return False
+            self.text += text[self.end - start:]
+            self.end = max(self.end, start + len(text))
+        elif self.end_line is not None and metadata.get("start_line") is not None:
+            # Code chunks: consecutive, non-overlapping line ranges
+            if not 0 < metadata["start_line"] - self.end_line <= 2:
+                return False
+            self.text += "\n" + text
+            self.end_line = metadata.get("end_line", self.end_line)
+        elif self.end_line is None and self.last_chunk_index is not None and metadata.get("chunk_index") == self.last_chunk_index + 1:
+            # Older chunks without offsets: strip the overlap shared with the previous chunk
+            self.text += text[_text_overlap(self.text, text, max_overlap):]
+        else:
+            return False
+
+        self.rank = min(self.rank, rank)
+        self.chunks += 1
+        self.last_chunk_index = metadata.get("chunk_index", self.last_chunk_index)
+        return True
+
+    def to_document(self) -> Document:
+        metadata = dict(self.metadata)
+        if self.chunks > 1:
+            metadata["merged_chunks"] = self.chunks
+            if self.end_line is not None:
+                metadata["end_line"] = self.end_line
+        return Document(page_content=self.text, metadata=metadata)
+
+
+def _sort_key(doc: Document) -> tuple:
+    metadata = doc.metadata
+    position = metadata.get("start_index")
+    if position is None:
+        position = metadata.get("start_line")
+    if position is None:
+        position = metadata.get("chunk_index", 0)
+    return position, metadata.get("part", 0)
+
+
+class ContextPacker:
+    """
+    Turn ranked chunks into a compact context.
+
+    1. Chunks from the same source that overlap or sit next to each other
+       are merged into one passage, so shared overlap text appears once.
+    2. Passages whose word shingles are mostly contained in a better-ranked
+       passage are dropped as near-duplicates.
+    3. Passages are added in relevance order until ``max_tokens`` is used.
+    """
+
+    def __init__(self, max_tokens: int = 1500, duplicate_threshold: float = 0.8,
+                 token_counter: Callable[[str], int] = estimate_tokens, max_overlap: int = 400):
+        self.max_tokens = max_tokens
+        self.duplicate_threshold = duplicate_threshold
+        self.token_counter = token_counter
+        self.max_overlap = max_overlap
+
+    def merge(self, documents: List[Document]) -> List[Document]:
+        """Merge adjacent/overlapping chunks per source; result is in relevance order"""
+        ranked = list(enumerate(documents))
+        by_source = {}
+        for rank, doc in ranked:
+            by_source.setdefault(doc.metadata.get("source"), []).append((rank, doc))
+
+        spans = []
+        for source, items in by_source.items():
+            if source is None:
+                spans.extend(_Span(doc, rank) for rank, doc in items)
+                continue
+
+            items.sort(key=lambda item: _sort_key(item[1]))
+            current = None
+            for rank, doc in items:
+                if current is None or not current.merge(doc, rank, self.max_overlap):
+                    current = _Span(doc, rank)
+                    spans.append(current)
+
+        spans.sort(key=lambda span: span.rank)
+        return [span.to_document() for span in spans]
+
+    def deduplicate(self, documents: List[Document]) -> List[Document]:
+        """Drop passages mostly contained in a better-ranked passage"""
+        kept, kept_shingles = [], []
+        for doc in documents:
+            shingles = _shingles(doc.page_content)
+            duplicate = any(
+                len(shingles & other) >= self.duplicate_threshold * len(shingles)
+                for other in kept_shingles
+            )
+            if not duplicate:
+                kept.append(doc)
+                kept_shingles.append(shingles)
+        return kept
+
+    def pack(self, documents: List[Document]) -> List[Document]:
+        """Merged, de-duplicated passages that fit the token budget, best first"""
+        packed, used = [], 0
+        for doc in self.deduplicate(self.merge(documents)):
+            tokens = self.token_counter(doc.page_content)
+            if used + tokens <= self.max_tokens:
+                packed.append(doc)
+                used += tokens
+            elif not packed:
+                # Never return an empty context: keep the head of the best passage
+                keep_chars = len(doc.page_content) * self.max_tokens // tokens
+                packed.append(Document(page_content=doc.page_content[:keep_chars],
+                                       metadata=dict(doc.metadata, truncated=True)))
+                used = self.max_tokens
+        return packed
+
+
+class PackedContextRetriever(BaseRetriever):
+    """Wrap a retriever so its results go through a ContextPacker"""
+
+    base_retriever: BaseRetriever
+    packer: Any
+
+    def _get_relevant_documents(self, query: str, *,
+                                run_manager: CallbackManagerForRetrieverRun) -> List[Document]:
+        documents = self.base_retriever.invoke(query, config={"callbacks": run_manager.get_child()})
+        return self.packer.pack(documents)
@@ -2,71 +2,189 @@
 Document loader for programming documentation and tutorials
 """
 import os
-from typing import List
-from langchain_community.document_loaders import TextLoader, DirectoryLoader
-from langchain.text_splitter import RecursiveCharacterTextSplitter
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from typing import Callable, Iterator, List, Optional
 from langchain.schema import Document
+from rag_system.code_chunker import CodeChunker
 
-class ProgrammingDocumentLoader:
-    def __init__(self, chunk_size: int = 1000, chunk_overlap: int = 200):
-        self.chunk_size = chunk_size
-        self.chunk_overlap = chunk_overlap
-        self.text_splitter = RecursiveCharacterTextSplitter(
+DOC_EXTENSIONS = ('.txt',)
+CODE_EXTENSIONS = ('.py', '.js', '.java', '.cpp')
+
+# Per-process splitter cache so pool workers build each splitter once
+_splitters = {}
+
+def _get_text_splitter(chunk_size: int, chunk_overlap: int):
+    key = (chunk_size, chunk_overlap)
+    if key not in _splitters:
+        from langchain.text_splitter import RecursiveCharacterTextSplitter
+        _splitters[key] = RecursiveCharacterTextSplitter(
             chunk_size=chunk_size,
             chunk_overlap=chunk_overlap,
-            separators=["\n\n", "\n", " ", ""]
+            separators=["\n\n", "\n", " ", ""],
+            # Character offsets let overlapping neighbours be merged at query time
+            add_start_index=True
         )
+    return _splitters[key]
+
+def _load_doc_file(file_path: str, chunk_size: int, chunk_overlap: int) -> List[Document]:
+    """
+    Read and split one documentation file (runs inside pool workers).
+    Read and decode errors propagate, so callers can tell them from an empty file.
+    """
+    from langchain_community.document_loaders import TextLoader
+    documents = TextLoader(file_path, encoding='utf-8').load()
+    split_docs = _get_text_splitter(chunk_size, chunk_overlap).split_documents(documents)
+    
+    # Add metadata for better retrieval
+    for i, doc in enumerate(split_docs):
+        doc.metadata['source_type'] = 'programming_doc'
+        doc.metadata['chunk_size'] = len(doc.page_content)
+        doc.metadata['chunk_index'] = i
+    
+    return split_docs
+
+def _load_code_file(file_path: str, chunk_size: int, chunk_overlap: int) -> List[Document]:
+    """
+    Read one code example file and split it along code structure (runs inside
+    pool workers). Read and decode errors propagate like in _load_doc_file.
+    """
+    with open(file_path, 'r', encoding='utf-8') as f:
+        content = f.read()
+    
+    filename = os.path.basename(file_path)
+    language = filename.split('.')[-1]
+    chunks = CodeChunker(max_chunk_chars=chunk_size).chunk(content, language)
+    
+    # Create documents with code-specific metadata
+    code_docs = []
+    for i, chunk in enumerate(chunks):
+        metadata = {
+            'source': file_path,
+            'language': language,
+            'source_type': 'code_example',
+            'filename': filename,
+            'qualified_name': chunk['qualified_name'],
+            'symbol_kind': chunk['kind'],
+            'start_line': chunk['start_line'],
+            'end_line': chunk['end_line'],
+            'chunk_size': len(chunk['content']),
+            'chunk_index': i
+        }
+        if 'part' in chunk:
+            metadata['part'] = chunk['part']
+        code_docs.append(Document(page_content=chunk['content'], metadata=metadata))
+    
+    return code_docs
+
+class ProgrammingDocumentLoader:
+    def __init__(self, chunk_size: int = 1000, chunk_overlap: int = 200,
+                 batch_size: int = 256, max_workers: Optional[int] = None):
+        self.chunk_size = chunk_size
+        self.chunk_overlap = chunk_overlap
+        self.batch_size = batch_size
+        self.max_workers = max_workers or os.cpu_count() or 1
+    
+    @property
+    def text_splitter(self):
+        """Text splitter, built on first use"""
+        return _get_text_splitter(self.chunk_size, self.chunk_overlap)
     
     def load_documents(self, directory_path: str) -> List[Document]:
         """Load and split documents from directory"""
-        try:
-            loader = DirectoryLoader(
-                directory_path,
-                glob="**/*.txt",
-                loader_cls=TextLoader,
-                loader_kwargs={'encoding': 'utf-8'}
-            )
-            documents = loader.load()
-            
-            # Split documents into chunks
-            split_docs = self.text_splitter.split_documents(documents)
-            
-            # Add metadata for better retrieval
-            for doc in split_docs:
-                doc.metadata['source_type'] = 'programming_doc'
-                doc.metadata['chunk_size'] = len(doc.page_content)
+        file_paths = self.list_files(directory_path, DOC_EXTENSIONS)
+        return [doc for batch in self.iter_document_batches(file_paths) for doc in batch]
+    
+    def iter_document_batches(self, file_paths: List[str], batch_size: Optional[int] = None,
+                              on_error: Optional[Callable[[str, Exception], None]] = None) -> Iterator[List[Document]]:
+        """
+        Stream split documentation chunks in batches of about ``batch_size``.
+        Files that fail to load are skipped and passed to ``on_error``.
+        """
+        return self._iter_batches(_load_doc_file, file_paths, batch_size, on_error)
+    
+    def iter_code_example_batches(self, file_paths: List[str], batch_size: Optional[int] = None,
+                                  on_error: Optional[Callable[[str, Exception], None]] = None) -> Iterator[List[Document]]:
+        """Stream structure-aware code example chunks in batches of about ``batch_size``"""
+        return self._iter_batches(_load_code_file, file_paths, batch_size, on_error)
+    
+    def _iter_batches(self, load_fn, file_paths: List[str], batch_size: Optional[int],
+                      on_error: Optional[Callable[[str, Exception], None]] = None) -> Iterator[List[Document]]:
+        """
+        Run ``load_fn`` over files and yield chunk batches in file order.
+        
+        Reading and splitting happen in a process pool. Only a small window of
+        files is in flight at once, so memory stays proportional to the batch
+        size rather than the corpus size. A file that fails to load is
+        reported and skipped without stopping the stream.
+        """
+        batch_size = batch_size or self.batch_size
+        batch = []
+        
+        def report(file_path: str, error: Exception):
+            print(f"Error loading {file_path}: {error}")
+            if on_error is not None:
+                on_error(file_path, error)
+        
+        if self.max_workers <= 1 or len(file_paths) <= 1:
+            for file_path in file_paths:
+                try:
+                    batch.extend(load_fn(file_path, self.chunk_size, self.chunk_overlap))
+                except Exception as e:
+                    report(file_path, e)
+                if len(batch) >= batch_size:
+                    yield batch
+                    batch = []
+        else:
+            window = self.max_workers * 2
+            paths = iter(file_paths)
+            pending = deque()
             
-            return split_docs
+            with ProcessPoolExecutor(max_workers=self.max_workers) as executor:
+                for file_path in paths:
+                    pending.append((file_path, executor.submit(load_fn, file_path, self.chunk_size, self.chunk_overlap)))
+                    if len(pending) >= window:
+                        break
+                
+                while pending:
+                    file_path, future = pending.popleft()
+                    try:
+                        batch.extend(future.result())
+                    except Exception as e:
+                        report(file_path, e)
+                    
+                    next_path = next(paths, None)
+                    if next_path is not None:
+                        pending.append((next_path, executor.submit(load_fn, next_path, self.chunk_size, self.chunk_overlap)))
+                    
+                    if len(batch) >= batch_size:
+                        yield batch
+                        batch = []
         
+        if batch:
+            yield batch
+    
+    def list_files(self, directory_path: str, extensions: tuple = DOC_EXTENSIONS) -> List[str]:
+        """List files under a directory with the given extensions, in stable order"""
+        file_paths = []
+        
+        for root, dirs, files in os.walk(directory_path):
+            dirs.sort()
+            for file in sorted(files):
+                if file.endswith(extensions):
+                    file_paths.append(os.path.join(root, file))
+        
+        return file_paths
+    
+    def load_file(self, file_path: str) -> List[Document]:
+        """Load and split a single documentation file; an unreadable file gives no chunks"""
+        try:
+            return _load_doc_file(file_path, self.chunk_size, self.chunk_overlap)
         except Exception as e:
-            print(f"Error loading documents: {e}")
+            print(f"Error loading {file_path}: {e}")
             return []
     
     def load_code_examples(self, examples_path: str) -> List[Document]:
         """Load code examples with special handling"""
-        code_docs = []
-        
-        for root, dirs, files in os.walk(examples_path):
-            for file in files:
-                if file.endswith(('.py', '.js', '.java', '.cpp')):
-                    file_path = os.path.join(root, file)
-                    try:
-                        with open(file_path, 'r', encoding='utf-8') as f:
-                            content = f.read()
-                        
-                        # Create document with code-specific metadata
-                        doc = Document(
-                            page_content=content,
-                            metadata={
-                                'source': file_path,
-                                'language': file.split('.')[-1],
-                                'source_type': 'code_example',
-                                'filename': file
-                            }
-                        )
-                        code_docs.append(doc)
-                    
-                    except Exception as e:
-                        print(f"Error loading {file_path}: {e}")
-        
-        return code_docs
\ No newline at end of file
+        file_paths = self.list_files(examples_path, CODE_EXTENSIONS)
+        return [doc for batch in self.iter_code_example_batches(file_paths) for doc in batch]
@@ -0,0 +1,201 @@
+"""
+Persistent on-disk cache of chunk embeddings
+"""
+import hashlib
+import json
+import os
+import re
+import threading
+import unicodedata
+from typing import Dict, List, Optional
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+
+
+def normalize_text(text: str) -> str:
+    """Normalize text so trivially different copies share a cache entry"""
+    text = unicodedata.normalize("NFC", text)
+    text = re.sub(r"[ \t]+(?=\n)", "", text)
+    return text.strip()
+
+
+class EmbeddingCache:
+    """
+    Append-only embedding store for one embedding model.
+
+    Vectors live in a raw float32 matrix that is memory-mapped for reads;
+    a parallel text file holds one content hash per matrix row. Keys are
+    hashes of the normalized text, and the files are namespaced by model
+    name, so the effective key is (model name, text hash).
+    """
+
+    def __init__(self, cache_dir: str, model_name: str):
+        self.cache_dir = cache_dir
+        self.model_name = model_name
+        slug = re.sub(r"[^A-Za-z0-9_.-]+", "_", model_name)
+        self.matrix_path = os.path.join(cache_dir, f"{slug}.f32")
+        self.keys_path = os.path.join(cache_dir, f"{slug}.keys")
+        self.meta_path = os.path.join(cache_dir, f"{slug}.json")
+
+        self.dim: Optional[int] = None
+        self.index: Dict[str, int] = {}
+        self.hits = 0
+        self.misses = 0
+        self._matrix = None
+        self._lock = threading.Lock()
+        self._load()
+
+    @staticmethod
+    def key(text: str) -> str:
+        return hashlib.sha256(normalize_text(text).encode("utf-8")).hexdigest()
+
+    @staticmethod
+    def _truncate(path: str, size: int):
+        if os.path.exists(path) and os.path.getsize(path) > size:
+            os.truncate(path, size)
+
+    def _reset_files(self):
+        """Delete the cache files, so later appends start at row 0 again"""
+        self.dim = None
+        self.index = {}
+        self._matrix = None
+        for path in (self.matrix_path, self.keys_path, self.meta_path):
+            if os.path.exists(path):
+                os.remove(path)
+
+    def _load(self):
+        """
+        Load the row index. Matrix rows without a key and keys without a
+        complete row (an interrupted write) are cut off, so that row numbers
+        of later appends line up in both files.
+        """
+        try:
+            if not os.path.exists(self.meta_path):
+                self._reset_files()
+                return
+
+            with open(self.meta_path, "r", encoding="utf-8") as f:
+                meta = json.load(f)
+            if meta.get("model_name") != self.model_name:
+                self._reset_files()
+                return
+            self.dim = meta["dim"]
+
+            row_bytes = self.dim * 4
+            stored_rows = os.path.getsize(self.matrix_path) // row_bytes if os.path.exists(self.matrix_path) else 0
+            rows, key_bytes = 0, 0
+            if os.path.exists(self.keys_path):
+                with open(self.keys_path, "rb") as f:
+                    for line in f:
+                        if rows >= stored_rows or not line.endswith(b"\n"):
+                            break
+                        self.index[line.decode("utf-8").strip()] = rows
+                        rows += 1
+                        key_bytes += len(line)
+
+            self._truncate(self.matrix_path, rows * row_bytes)
+            self._truncate(self.keys_path, key_bytes)
+        except Exception as e:
+            print(f"Error loading embedding cache: {e}")
+            try:
+                self._reset_files()
+            except OSError as reset_error:
+                print(f"Error resetting embedding cache: {reset_error}")
+
+    def _get_matrix(self):
+        """Memory-map the vector file, remapping after appends"""
+        if self._matrix is None or self._matrix.shape[0] < len(self.index):
+            rows = os.path.getsize(self.matrix_path) // (self.dim * 4)
+            self._matrix = np.memmap(self.matrix_path, dtype=np.float32, mode="r", shape=(rows, self.dim))
+        return self._matrix
+
+    def __len__(self) -> int:
+        return len(self.index)
+
+    def get_many(self, keys: List[str]) -> List[Optional[List[float]]]:
+        """Look up vectors by key; missing entries are returned as None"""
+        with self._lock:
+            rows = [self.index.get(key) for key in keys]
+            found = [row for row in rows if row is not None]
+            self.hits += len(found)
+            self.misses += len(rows) - len(found)
+            if not found:
+                return [None] * len(keys)
+
+            matrix = self._get_matrix()
+            return [matrix[row].tolist() if row is not None else None for row in rows]
+
+    def put_many(self, keys: List[str], vectors: List[List[float]]):
+        """Append new vectors to the cache files"""
+        with self._lock:
+            new_items = {}
+            for key, vector in zip(keys, vectors):
+                if key not in self.index and key not in new_items:
+                    new_items[key] = vector
+            if not new_items:
+                return
+
+            matrix_size = keys_size = None
+            try:
+                matrix = np.asarray(list(new_items.values()), dtype=np.float32)
+                if self.dim is None:
+                    self.dim = matrix.shape[1]
+                    os.makedirs(self.cache_dir, exist_ok=True)
+                    with open(self.meta_path, "w", encoding="utf-8") as f:
+                        json.dump({"model_name": self.model_name, "dim": self.dim}, f)
+
+                # Row numbers come from the matrix file itself, which _load keeps in step with the keys
+                matrix_size = os.path.getsize(self.matrix_path) if os.path.exists(self.matrix_path) else 0
+                keys_size = os.path.getsize(self.keys_path) if os.path.exists(self.keys_path) else 0
+                start = matrix_size // (self.dim * 4)
+
+                # Vectors are written before keys so a crash never indexes a missing row
+                with open(self.matrix_path, "ab") as f:
+                    f.write(matrix.tobytes())
+                with open(self.keys_path, "a", encoding="utf-8") as f:
+                    f.write("".join(key + "\n" for key in new_items))
+
+                for offset, key in enumerate(new_items):
+                    self.index[key] = start + offset
+            except Exception as e:
+                print(f"Error writing embedding cache: {e}")
+                # Roll both files back so the failed batch leaves no unkeyed rows behind
+                if matrix_size is not None:
+                    try:
+                        self._truncate(self.matrix_path, matrix_size)
+                        self._truncate(self.keys_path, keys_size)
+                    except OSError as rollback_error:
+                        print(f"Error rolling back embedding cache: {rollback_error}")
+
+
+class CachedEmbeddings(Embeddings):
+    """Embeddings wrapper that only calls the model for cache misses"""
+
+    def __init__(self, base: Embeddings, cache: EmbeddingCache):
+        self.base = base
+        self.cache = cache
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        keys = [self.cache.key(text) for text in texts]
+        vectors = self.cache.get_many(keys)
+
+        # Embed each distinct missing text once
+        missing = {}
+        for key, text, vector in zip(keys, texts, vectors):
+            if vector is None and key not in missing:
+                missing[key] = text
+
+        if missing:
+            new_vectors = self.base.embed_documents(list(missing.values()))
+            self.cache.put_many(list(missing), new_vectors)
+            computed = dict(zip(missing, new_vectors))
+            vectors = [
+                vector if vector is not None else list(computed[key])
+                for key, vector in zip(keys, vectors)
+            ]
+
+        return vectors
+
+    def embed_query(self, text: str) -> List[float]:
+        return self.base.embed_query(text)
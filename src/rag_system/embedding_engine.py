@@ -0,0 +1,173 @@
+"""
+Batched, multi-process sentence-transformer embedding engine
+"""
+import math
+import multiprocessing
+import os
+import threading
+import time
+from typing import List, Optional, Tuple
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+from startup_timing import startup_timer
+
+# Model held by each pool worker process
+_worker_model = None
+
+
+def _load_model(model_name: str, device: str, threads: Optional[int]):
+    """Load a sentence-transformer, pinning torch to the given thread count"""
+    import torch
+    from sentence_transformers import SentenceTransformer
+
+    if threads:
+        torch.set_num_threads(threads)
+    return SentenceTransformer(model_name, device=device)
+
+
+def _init_worker(model_name: str, device: str, threads: Optional[int]):
+    global _worker_model
+    _worker_model = _load_model(model_name, device, threads)
+
+
+def _encode(model, texts: List[str], batch_size: int, normalize: bool) -> np.ndarray:
+    """Encode texts into a float32 matrix"""
+    vectors = model.encode(
+        texts,
+        batch_size=batch_size,
+        normalize_embeddings=normalize,
+        convert_to_numpy=True,
+        show_progress_bar=False
+    )
+    return vectors.astype(np.float32, copy=False)
+
+
+def _worker_encode(args: Tuple[List[str], int, bool]) -> np.ndarray:
+    texts, batch_size, normalize = args
+    return _encode(_worker_model, texts, batch_size, normalize)
+
+
+class ThroughputStats:
+    """Cumulative embedding throughput counters"""
+
+    def __init__(self):
+        self.documents = 0
+        self.chars = 0
+        self.seconds = 0.0
+
+    def record(self, documents: int, chars: int, seconds: float):
+        self.documents += documents
+        self.chars += chars
+        self.seconds += seconds
+
+    @property
+    def docs_per_sec(self) -> float:
+        return self.documents / self.seconds if self.seconds else 0.0
+
+    @property
+    def chars_per_sec(self) -> float:
+        return self.chars / self.seconds if self.seconds else 0.0
+
+    def __str__(self) -> str:
+        return (f"{self.documents} docs, {self.chars} chars in {self.seconds:.2f}s "
+                f"({self.docs_per_sec:.1f} docs/s, {self.chars_per_sec:.0f} chars/s)")
+
+
+class EmbeddingEngine(Embeddings):
+    """
+    Sentence-transformer embeddings with explicit batching and a worker pool.
+
+    Small calls (queries, incremental updates) run on an in-process model.
+    Document calls with at least ``2 * batch_size`` texts are sharded across a
+    pool of spawned worker processes that each hold their own copy of the
+    model, so bulk ingestion uses every core; query batches always stay in
+    process. Set ``num_workers=1`` to disable the pool.
+    """
+
+    def __init__(self, model_name: str = "sentence-transformers/all-MiniLM-L6-v2",
+                 batch_size: int = 64, num_workers: Optional[int] = None,
+                 threads_per_worker: Optional[int] = None, device: str = "cpu",
+                 normalize_embeddings: bool = False):
+        cpu_count = os.cpu_count() or 1
+        self.model_name = model_name
+        self.batch_size = batch_size
+        self.num_workers = num_workers or cpu_count
+        self.threads_per_worker = threads_per_worker or max(1, cpu_count // self.num_workers)
+        self.device = device
+        self.normalize_embeddings = normalize_embeddings
+
+        self.stats = ThroughputStats()
+        self.last_stats = ThroughputStats()
+        self._model = None
+        self._pool = None
+        self._lock = threading.Lock()
+
+    @property
+    def model(self):
+        """In-process model, loaded on first use"""
+        with self._lock:
+            if self._model is None:
+                with startup_timer.measure("embedding model"):
+                    self._model = _load_model(self.model_name, self.device, None)
+            return self._model
+
+    def _get_pool(self):
+        with self._lock:
+            if self._pool is None:
+                context = multiprocessing.get_context("spawn")
+                self._pool = context.Pool(
+                    self.num_workers,
+                    initializer=_init_worker,
+                    initargs=(self.model_name, self.device, self.threads_per_worker)
+                )
+            return self._pool
+
+    def embed_array(self, texts: List[str], use_pool: bool = True) -> np.ndarray:
+        """Embed texts into a float32 matrix with one row per text"""
+        if not texts:
+            return np.zeros((0, 0), dtype=np.float32)
+
+        start = time.perf_counter()
+        if use_pool and self.num_workers > 1 and len(texts) >= 2 * self.batch_size:
+            # Shard evenly so every worker gets a share of the call
+            shard_size = min(self.batch_size * 4, math.ceil(len(texts) / self.num_workers))
+            shards = [
+                (texts[i:i + shard_size], self.batch_size, self.normalize_embeddings)
+                for i in range(0, len(texts), shard_size)
+            ]
+            vectors = np.vstack(self._get_pool().map(_worker_encode, shards))
+        else:
+            vectors = _encode(self.model, texts, self.batch_size, self.normalize_embeddings)
+
+        elapsed = time.perf_counter() - start
+        # Characters rather than tokens: counting tokens would tokenize every text a second time
+        char_count = sum(len(text) for text in texts)
+        self.last_stats = ThroughputStats()
+        self.last_stats.record(len(texts), char_count, elapsed)
+        self.stats.record(len(texts), char_count, elapsed)
+        return vectors
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return self.embed_array(list(texts)).tolist()
+
+    def embed_query(self, text: str) -> List[float]:
+        return self.embed_array([text])[0].tolist()
+
+    def embed_queries(self, texts: List[str]) -> np.ndarray:
+        """
+        Embed a batch of queries on the in-process model. Serving never
+        starts the worker pool, which is meant for bulk ingestion.
+        """
+        return self.embed_array(list(texts), use_pool=False)
+
+    def throughput_report(self) -> str:
+        return f"Embedding throughput: {self.stats}"
+
+    def close(self):
+        """Shut down the worker pool"""
+        with self._lock:
+            if self._pool is not None:
+                self._pool.close()
+                self._pool.join()
+                self._pool = None
@@ -0,0 +1,311 @@
+"""
+Exact in-process vector index over a memory-mapped embedding matrix
+"""
+import json
+import os
+import shutil
+import threading
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+from langchain.schema import Document
+
+
+def normalize_rows(vectors: np.ndarray) -> np.ndarray:
+    """L2-normalize each row so dot products are cosine similarities"""
+    vectors = np.asarray(vectors, dtype=np.float32)
+    norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return vectors / norms
+
+
+def is_all_rows(rows: Optional[np.ndarray], n_rows: int) -> bool:
+    """Whether candidate rows are exactly 0..n_rows-1 in order, so the matrix can be scored as is"""
+    if rows is None:
+        return True
+    return rows.size == n_rows and (n_rows == 0 or (rows[0] == 0 and rows[-1] == n_rows - 1
+                                                    and bool(np.all(np.diff(rows) == 1))))
+
+
+def top_k(scores: np.ndarray, k: int) -> np.ndarray:
+    """Indices of the k highest scores, best first, using argpartition"""
+    if k <= 0 or scores.size == 0:
+        return np.zeros(0, dtype=np.int64)
+    if k < scores.size:
+        part = np.argpartition(-scores, k - 1)[:k]
+    else:
+        part = np.arange(scores.size)
+    return part[np.argsort(-scores[part], kind="stable")]
+
+
+def top_k_batch(scores: np.ndarray, k: int) -> np.ndarray:
+    """Row-wise top_k over a (queries, candidates) score matrix"""
+    n_queries, n_candidates = scores.shape
+    k = min(k, n_candidates)
+    if k <= 0:
+        return np.zeros((n_queries, 0), dtype=np.int64)
+    if k < n_candidates:
+        part = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+    else:
+        part = np.broadcast_to(np.arange(n_candidates), (n_queries, n_candidates))
+    order = np.argsort(-np.take_along_axis(scores, part, axis=1), axis=1, kind="stable")
+    return np.take_along_axis(part, order, axis=1)
+
+
+class FlatVectorIndex:
+    """
+    Brute-force cosine search over normalized embeddings.
+
+    Vectors are appended to a raw float32/float16 file that is memory-mapped
+    for search; documents go to a parallel JSON-lines file. Deletes are
+    tombstones, and the files are compacted once a quarter of the rows are
+    dead.
+    """
+
+    COMPACT_RATIO = 0.25
+    SEARCH_BLOCK = 1 << 24
+
+    def __init__(self, index_dir: str, dtype: str = "float32"):
+        if dtype not in ("float32", "float16"):
+            raise ValueError(f"Unsupported dtype: {dtype}")
+
+        self.index_dir = index_dir
+        self.dtype = np.dtype(dtype)
+        self.vectors_path = os.path.join(index_dir, f"vectors.{dtype}")
+        self.documents_path = os.path.join(index_dir, "documents.jsonl")
+        self.meta_path = os.path.join(index_dir, "meta.json")
+
+        self.dim: Optional[int] = None
+        self.ids: List[Optional[str]] = []
+        self.documents: List[Optional[Document]] = []
+        self.id_to_row: Dict[str, int] = {}
+        self.live = np.zeros(0, dtype=bool)
+        self.version = 0
+        # Bumped whenever row numbers are reassigned (compaction)
+        self.layout_version = 0
+        self._matrix = None
+        self._lock = threading.RLock()
+        self._load()
+
+    @staticmethod
+    def _truncate(path: str, size: int):
+        if os.path.exists(path) and os.path.getsize(path) > size:
+            os.truncate(path, size)
+
+    def _load(self):
+        """
+        Load documents and tombstones; vectors stay on disk until searched.
+        Rows present in only one of the two files (an interrupted write) are
+        cut off, so row numbers of later appends line up in both files.
+        """
+        if not os.path.exists(self.meta_path):
+            return
+
+        try:
+            with open(self.meta_path, "r", encoding="utf-8") as f:
+                meta = json.load(f)
+            self.dim = meta["dim"]
+            self.layout_version = meta.get("layout_version", 0)
+            deleted = set(meta.get("deleted", []))
+
+            row_bytes = self.dim * self.dtype.itemsize
+            stored_rows = os.path.getsize(self.vectors_path) // row_bytes if os.path.exists(self.vectors_path) else 0
+            document_bytes = 0
+            if os.path.exists(self.documents_path):
+                with open(self.documents_path, "rb") as f:
+                    for row, line in enumerate(f):
+                        if row >= stored_rows or not line.endswith(b"\n"):
+                            break
+                        record = json.loads(line)
+                        document_bytes += len(line)
+                        if row in deleted:
+                            self.ids.append(None)
+                            self.documents.append(None)
+                            continue
+                        self.ids.append(record["id"])
+                        self.documents.append(Document(page_content=record["page_content"],
+                                                       metadata=record["metadata"]))
+                        self.id_to_row[record["id"]] = row
+            self.live = np.array([doc_id is not None for doc_id in self.ids], dtype=bool)
+
+            self._truncate(self.vectors_path, len(self.ids) * row_bytes)
+            self._truncate(self.documents_path, document_bytes)
+        except Exception as e:
+            # Appending to files that could not be read would misnumber every new row
+            raise RuntimeError(f"Error loading flat index from {self.index_dir}: {e}") from e
+
+    def _save_meta(self):
+        deleted = [row for row, doc_id in enumerate(self.ids) if doc_id is None]
+        tmp_path = self.meta_path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"dim": self.dim, "dtype": self.dtype.name, "deleted": deleted,
+                       "layout_version": self.layout_version}, f)
+        os.replace(tmp_path, self.meta_path)
+
+    @property
+    def matrix(self) -> np.ndarray:
+        """Memory-mapped (rows, dim) matrix, remapped after appends"""
+        with self._lock:
+            rows = len(self.ids)
+            if self.dim is None or rows == 0:
+                return np.zeros((0, self.dim or 0), dtype=self.dtype)
+            if self._matrix is None or self._matrix.shape[0] != rows:
+                self._matrix = np.memmap(self.vectors_path, dtype=self.dtype, mode="r", shape=(rows, self.dim))
+            return self._matrix
+
+    def __len__(self) -> int:
+        return len(self.id_to_row)
+
+    def add(self, ids: List[str], vectors: np.ndarray, documents: List[Document]) -> List[int]:
+        """Append vectors and documents; existing IDs are replaced"""
+        vectors = normalize_rows(vectors)
+        with self._lock:
+            self.delete([doc_id for doc_id in ids if doc_id in self.id_to_row], save=False)
+
+            os.makedirs(self.index_dir, exist_ok=True)
+            if self.dim is None:
+                self.dim = vectors.shape[1]
+            elif vectors.shape[1] != self.dim:
+                raise ValueError(f"Expected {self.dim}-dimensional vectors, got {vectors.shape[1]}")
+
+            # Vectors first, then documents: a torn write leaves rows without documents, which
+            # load cuts off; a failed write is rolled back so the files stay row-aligned
+            row_bytes = self.dim * self.dtype.itemsize
+            document_bytes = os.path.getsize(self.documents_path) if os.path.exists(self.documents_path) else 0
+            try:
+                with open(self.vectors_path, "ab") as f:
+                    f.write(vectors.astype(self.dtype).tobytes())
+                with open(self.documents_path, "a", encoding="utf-8") as f:
+                    f.write("".join(json.dumps({"id": doc_id, "page_content": doc.page_content,
+                                                "metadata": doc.metadata}) + "\n"
+                                    for doc_id, doc in zip(ids, documents)))
+            except Exception:
+                self._truncate(self.vectors_path, len(self.ids) * row_bytes)
+                self._truncate(self.documents_path, document_bytes)
+                raise
+
+            rows = []
+            for doc_id, doc in zip(ids, documents):
+                row = len(self.ids)
+                self.ids.append(doc_id)
+                self.documents.append(Document(page_content=doc.page_content, metadata=dict(doc.metadata)))
+                self.id_to_row[doc_id] = row
+                rows.append(row)
+            self.live = np.concatenate([self.live, np.ones(len(rows), dtype=bool)])
+
+            self._save_meta()
+            self.version += 1
+            return rows
+
+    def delete(self, ids: List[str], save: bool = True) -> int:
+        """Tombstone rows by ID; compacts when enough rows are dead"""
+        with self._lock:
+            deleted = 0
+            for doc_id in ids:
+                row = self.id_to_row.pop(doc_id, None)
+                if row is not None:
+                    self.ids[row] = None
+                    self.documents[row] = None
+                    self.live[row] = False
+                    deleted += 1
+
+            if deleted and save:
+                dead = len(self.ids) - len(self.id_to_row)
+                if dead > self.COMPACT_RATIO * len(self.ids):
+                    self.compact()
+                else:
+                    self._save_meta()
+            if deleted:
+                self.version += 1
+            return deleted
+
+    def compact(self):
+        """Rewrite the files without tombstoned rows"""
+        with self._lock:
+            live_rows = [row for row, doc_id in enumerate(self.ids) if doc_id is not None]
+            live_vectors = np.array(self.matrix[live_rows], dtype=self.dtype) if live_rows else None
+            live_ids = [self.ids[row] for row in live_rows]
+            live_docs = [self.documents[row] for row in live_rows]
+
+            self._matrix = None
+            self.ids, self.documents, self.id_to_row = [], [], {}
+            self.live = np.zeros(0, dtype=bool)
+            self.layout_version += 1
+            for path in (self.vectors_path, self.documents_path):
+                if os.path.exists(path):
+                    os.remove(path)
+
+            if live_rows:
+                self.add(live_ids, live_vectors.astype(np.float32), live_docs)
+            else:
+                self._save_meta()
+            self.version += 1
+
+    def get(self, ids: List[str]) -> List[Document]:
+        """Documents for the given IDs, skipping unknown ones"""
+        rows = [self.id_to_row[doc_id] for doc_id in ids if doc_id in self.id_to_row]
+        return [self.documents[row] for row in rows]
+
+    def search(self, query: np.ndarray, k: int,
+               candidate_rows: Optional[np.ndarray] = None) -> List[Tuple[int, float]]:
+        """Exact top-k (row, cosine similarity) pairs, optionally limited to candidate rows"""
+        with self._lock:
+            matrix = self.matrix
+            if matrix.shape[0] == 0:
+                return []
+
+            query = normalize_rows(query.reshape(1, -1))[0]
+            if candidate_rows is None:
+                candidate_rows = np.flatnonzero(self.live)
+            if candidate_rows.size == 0:
+                return []
+
+            # Candidates may be a permutation (IVF lists), so only an in-order full set skips the gather
+            if is_all_rows(candidate_rows, matrix.shape[0]):
+                scores = matrix @ query.astype(matrix.dtype)
+            else:
+                scores = matrix[candidate_rows] @ query.astype(matrix.dtype)
+            scores = scores.astype(np.float32)
+
+            order = top_k(scores, k)
+            return [(int(candidate_rows[i]), float(scores[i])) for i in order]
+
+    def search_batch(self, queries: np.ndarray, k: int,
+                     candidate_rows: Optional[np.ndarray] = None) -> List[List[Tuple[int, float]]]:
+        """
+        Exact top-k for many queries at once: one matrix multiply per block
+        of queries and a row-wise argpartition, instead of a pass per query.
+        """
+        with self._lock:
+            matrix = self.matrix
+            if matrix.shape[0] == 0 or len(queries) == 0:
+                return [[] for _ in range(len(queries))]
+
+            queries = normalize_rows(queries).astype(matrix.dtype)
+            if candidate_rows is None:
+                candidate_rows = np.flatnonzero(self.live)
+            if candidate_rows.size == 0:
+                return [[] for _ in range(len(queries))]
+
+            candidates = matrix if is_all_rows(candidate_rows, matrix.shape[0]) else matrix[candidate_rows]
+            # Bound the score matrix to roughly SEARCH_BLOCK floats
+            block = max(1, self.SEARCH_BLOCK // candidate_rows.size)
+            results = []
+            for start in range(0, len(queries), block):
+                scores = (queries[start:start + block] @ candidates.T).astype(np.float32)
+                order = top_k_batch(scores, k)
+                for query_scores, query_order in zip(scores, order):
+                    results.append([(int(candidate_rows[i]), float(query_scores[i])) for i in query_order])
+            return results
+
+    def clear(self):
+        """Remove every vector and document from disk and memory"""
+        with self._lock:
+            self._matrix = None
+            self.ids, self.documents, self.id_to_row = [], [], {}
+            self.live = np.zeros(0, dtype=bool)
+            self.layout_version += 1
+            self.dim = None
+            if os.path.exists(self.index_dir):
+                shutil.rmtree(self.index_dir)
+            self.version += 1
@@ -0,0 +1,66 @@
+"""
+Retrievers over CodeLearningVectorStore, including hybrid lexical + dense fusion
+"""
+from typing import Any, Dict, List, Optional, Sequence
+
+from langchain.schema import Document
+from langchain_core.callbacks import CallbackManagerForRetrieverRun
+from langchain_core.retrievers import BaseRetriever
+
+
+def document_key(doc: Document) -> tuple:
+    """Identity of a chunk across result lists that may not carry IDs"""
+    return (doc.metadata.get("source"), doc.metadata.get("chunk_index"), doc.page_content)
+
+
+def reciprocal_rank_fusion(result_lists: Sequence[List[Document]], k: int,
+                           rrf_k: int = 60, weights: Optional[Sequence[float]] = None) -> List[Document]:
+    """Fuse ranked lists: each document scores sum(weight / (rrf_k + rank))"""
+    weights = weights or [1.0] * len(result_lists)
+    scores: Dict[tuple, float] = {}
+    documents: Dict[tuple, Document] = {}
+
+    for results, weight in zip(result_lists, weights):
+        for rank, doc in enumerate(results, 1):
+            key = document_key(doc)
+            documents.setdefault(key, doc)
+            scores[key] = scores.get(key, 0.0) + weight / (rrf_k + rank)
+
+    ranked = sorted(scores, key=scores.get, reverse=True)
+    return [documents[key] for key in ranked[:k]]
+
+
+class DenseRetriever(BaseRetriever):
+    """Vector-only retrieval through a CodeLearningVectorStore"""
+
+    store: Any
+    k: int = 5
+    filter: Optional[dict] = None
+
+    def _get_relevant_documents(self, query: str, *,
+                                run_manager: CallbackManagerForRetrieverRun) -> List[Document]:
+        return self.store.similarity_search(query, k=self.k, filter_dict=self.filter)
+
+
+class HybridRetriever(BaseRetriever):
+    """
+    Retrieve ``fetch_k`` chunks from both the dense vector index and the BM25
+    index of a CodeLearningVectorStore and return the top ``k`` after
+    reciprocal rank fusion.
+    """
+
+    store: Any
+    k: int = 5
+    fetch_k: int = 20
+    rrf_k: int = 60
+    dense_weight: float = 1.0
+    lexical_weight: float = 1.0
+    filter: Optional[dict] = None
+
+    def _get_relevant_documents(self, query: str, *,
+                                run_manager: CallbackManagerForRetrieverRun) -> List[Document]:
+        dense = self.store.similarity_search(query, k=self.fetch_k, filter_dict=self.filter)
+        lexical = self.store.lexical_search(query, k=self.fetch_k, filter_dict=self.filter)
+        return reciprocal_rank_fusion(
+            [dense, lexical], self.k, self.rrf_k, [self.dense_weight, self.lexical_weight]
+        )
@@ -0,0 +1,178 @@
+"""
+Recall and latency benchmarks for vector index options
+
+Run from the ``src`` directory:
+
+    python -m rag_system.index_benchmark --num-vectors 200000
+    python -m rag_system.index_benchmark --mode quantization
+    python -m rag_system.index_benchmark --persist-directory ../chroma_db
+"""
+import argparse
+import os
+import time
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+
+from rag_system.flat_index import FlatVectorIndex, normalize_rows, top_k
+from rag_system.ivf_index import IVFIndex
+from rag_system.quantization import QuantizedCodes
+
+
+def make_synthetic_corpus(num_vectors: int, dim: int = 384, num_topics: int = 256,
+                          num_queries: int = 200, seed: int = 0):
+    """Clustered unit vectors plus held-out queries drawn from the same topics"""
+    rng = np.random.default_rng(seed)
+    topics = normalize_rows(rng.standard_normal((num_topics, dim)))
+
+    def sample(count):
+        labels = rng.integers(0, num_topics, count)
+        return normalize_rows(topics[labels] + rng.standard_normal((count, dim)) / np.sqrt(dim))
+
+    return sample(num_vectors), sample(num_queries)
+
+
+def load_persisted_vectors(persist_directory: str, num_queries: int = 200, seed: int = 0):
+    """Vectors from a NumPy-backend store; queries are perturbed corpus vectors"""
+    index = FlatVectorIndex(os.path.join(persist_directory, "flat_index"))
+    matrix = np.asarray(index.matrix[index.live], dtype=np.float32)
+    if len(matrix) == 0:
+        raise ValueError(f"No vectors found under {persist_directory}")
+
+    rng = np.random.default_rng(seed)
+    picks = rng.integers(0, len(matrix), num_queries)
+    noise = rng.standard_normal((num_queries, matrix.shape[1])) * 0.5 / np.sqrt(matrix.shape[1])
+    queries = normalize_rows(matrix[picks] + noise)
+    return matrix, queries
+
+
+def _latency_summary(latencies: List[float]) -> Dict[str, float]:
+    latencies_ms = np.asarray(latencies) * 1000
+    return {
+        "mean_ms": float(latencies_ms.mean()),
+        "p95_ms": float(np.percentile(latencies_ms, 95))
+    }
+
+
+def exact_search(matrix: np.ndarray, queries: np.ndarray, k: int):
+    """Ground-truth neighbours and per-query latency of brute-force search"""
+    results, latencies = [], []
+    for query in queries:
+        start = time.perf_counter()
+        results.append(top_k(matrix @ query, k))
+        latencies.append(time.perf_counter() - start)
+    return results, latencies
+
+
+def recall_at_k(approximate: Sequence[np.ndarray], exact: Sequence[np.ndarray], k: int) -> float:
+    """Mean fraction of the exact top-k found by the approximate search"""
+    hits = [len(np.intersect1d(a[:k], e[:k])) / max(1, min(k, len(e))) for a, e in zip(approximate, exact)]
+    return float(np.mean(hits)) if hits else 0.0
+
+
+def benchmark_ivf(matrix: np.ndarray, queries: np.ndarray, k: int = 10,
+                  nlist: Optional[int] = None, nprobe_values: Sequence[int] = (1, 2, 4, 8, 16, 32),
+                  train_iters: int = 20) -> List[Dict[str, float]]:
+    """
+    Report recall@k and latency for each nprobe, with exact search as baseline.
+
+    Returns one row per operating point, starting with the exact baseline.
+    """
+    exact, exact_latencies = exact_search(matrix, queries, k)
+    rows = [dict(method="exact", nprobe=0, recall=1.0, scanned=float(len(matrix)),
+                 **_latency_summary(exact_latencies))]
+
+    ivf = IVFIndex(nlist=nlist, train_iters=train_iters, min_train_size=1)
+    start = time.perf_counter()
+    ivf.train(matrix, np.arange(len(matrix)))
+    build_seconds = time.perf_counter() - start
+
+    for nprobe in nprobe_values:
+        results, latencies, scanned = [], [], []
+        for query in queries:
+            start = time.perf_counter()
+            candidates = ivf.candidates(query, nprobe)
+            order = top_k(matrix[candidates] @ query, k)
+            results.append(candidates[order])
+            latencies.append(time.perf_counter() - start)
+            scanned.append(len(candidates))
+
+        rows.append(dict(method=f"ivf{len(ivf.centroids)}", nprobe=nprobe,
+                         recall=recall_at_k(results, exact, k), scanned=float(np.mean(scanned)),
+                         build_s=build_seconds, **_latency_summary(latencies)))
+    return rows
+
+
+def benchmark_quantization(matrix: np.ndarray, queries: np.ndarray, k: int = 10,
+                           methods: Sequence[str] = ("int8", "pq"),
+                           rerank_factors: Sequence[int] = (0, 4)) -> List[Dict[str, float]]:
+    """
+    Report recall@k, latency and compression for each quantizer, with and
+    without exact re-ranking of the top ``k * rerank_factor`` candidates.
+    """
+    exact, exact_latencies = exact_search(matrix, queries, k)
+    rows = [dict(method="exact", nprobe=0, recall=1.0, scanned=float(len(matrix)),
+                 compression=1.0, **_latency_summary(exact_latencies))]
+    all_rows = np.arange(len(matrix))
+
+    for method in methods:
+        codes = QuantizedCodes(method, min_train_size=1)
+        codes.train(matrix, all_rows)
+
+        for rerank_factor in rerank_factors:
+            results, latencies = [], []
+            for query in queries:
+                start = time.perf_counter()
+                scores = codes.score(query, all_rows)
+                if rerank_factor > 0:
+                    shortlist = top_k(scores, k * rerank_factor)
+                    order = shortlist[top_k(matrix[shortlist] @ query, k)]
+                else:
+                    order = top_k(scores, k)
+                results.append(order)
+                latencies.append(time.perf_counter() - start)
+
+            label = f"{method}+rr{rerank_factor}" if rerank_factor else method
+            rows.append(dict(method=label, nprobe=0, recall=recall_at_k(results, exact, k),
+                             scanned=float(len(matrix)), compression=codes.compression_ratio(matrix.shape[1]),
+                             **_latency_summary(latencies)))
+    return rows
+
+
+def format_table(rows: List[Dict[str, float]], k: int) -> str:
+    lines = [f"{'method':<10} {'nprobe':>6} {f'recall@{k}':>10} {'scanned':>10} "
+             f"{'compress':>9} {'mean ms':>9} {'p95 ms':>9}"]
+    for row in rows:
+        lines.append(f"{row['method']:<10} {row['nprobe']:>6} {row['recall']:>10.4f} "
+                     f"{row['scanned']:>10.0f} {row.get('compression', 1.0):>8.1f}x "
+                     f"{row['mean_ms']:>9.3f} {row['p95_ms']:>9.3f}")
+    return "\n".join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark ANN and quantization recall/latency against exact search")
+    parser.add_argument("--mode", choices=["ivf", "quantization"], default="ivf")
+    parser.add_argument("--persist-directory", help="benchmark vectors of an existing NumPy-backend store")
+    parser.add_argument("--num-vectors", type=int, default=100000)
+    parser.add_argument("--dim", type=int, default=384)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--nlist", type=int, default=None)
+    parser.add_argument("--nprobe", type=int, nargs="+", default=[1, 2, 4, 8, 16, 32])
+    args = parser.parse_args()
+
+    if args.persist_directory:
+        matrix, queries = load_persisted_vectors(args.persist_directory, args.queries)
+    else:
+        matrix, queries = make_synthetic_corpus(args.num_vectors, args.dim, num_queries=args.queries)
+
+    print(f"{len(matrix)} vectors x {matrix.shape[1]} dims, {len(queries)} queries")
+    if args.mode == "quantization":
+        rows = benchmark_quantization(matrix, queries, args.k)
+    else:
+        rows = benchmark_ivf(matrix, queries, args.k, args.nlist, args.nprobe)
+    print(format_table(rows, args.k))
+
+
+if __name__ == "__main__":
+    main()
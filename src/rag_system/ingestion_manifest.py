@@ -0,0 +1,134 @@
+"""
+Persistent ingestion manifest for incremental document loading
+"""
+import hashlib
+import json
+import os
+from typing import Dict, List, Tuple, Any
+
+
+class IngestionManifest:
+    """Tracks per-file content hashes and the chunk IDs stored for each file"""
+
+    VERSION = 1
+
+    def __init__(self, manifest_path: str):
+        self.manifest_path = manifest_path
+        self.files: Dict[str, Dict[str, Any]] = {}
+        self._load()
+
+    def _load(self):
+        """Load manifest from disk if it exists"""
+        if not os.path.exists(self.manifest_path):
+            return
+
+        try:
+            with open(self.manifest_path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            if data.get("version") == self.VERSION:
+                self.files = data.get("files", {})
+        except Exception as e:
+            print(f"Error loading ingestion manifest: {e}")
+            self.files = {}
+
+    def save(self) -> bool:
+        """Atomically write the manifest to disk"""
+        try:
+            directory = os.path.dirname(self.manifest_path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+
+            tmp_path = self.manifest_path + ".tmp"
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump({"version": self.VERSION, "files": self.files}, f)
+            os.replace(tmp_path, self.manifest_path)
+            return True
+        except Exception as e:
+            print(f"Error saving ingestion manifest: {e}")
+            return False
+
+    @staticmethod
+    def hash_file(file_path: str) -> str:
+        """Compute the SHA-256 of a file's content"""
+        digest = hashlib.sha256()
+        with open(file_path, 'rb') as f:
+            for block in iter(lambda: f.read(1 << 20), b""):
+                digest.update(block)
+        return digest.hexdigest()
+
+    @staticmethod
+    def chunk_id(file_path: str, content_hash: str, index: int) -> str:
+        """Deterministic ID for the index-th chunk of a file version"""
+        key = f"{file_path}\0{content_hash}\0{index}"
+        return hashlib.sha1(key.encode('utf-8')).hexdigest()
+
+    def _content_hash(self, file_path: str, stat: os.stat_result) -> str:
+        """Reuse the recorded hash when size and mtime are unchanged"""
+        entry = self.files.get(file_path)
+        # An empty hash marks a failed ingestion, which must be planned again
+        if entry and entry.get("hash") and entry.get("size") == stat.st_size and entry.get("mtime_ns") == stat.st_mtime_ns:
+            return entry["hash"]
+        return self.hash_file(file_path)
+
+    def plan(self, file_paths: List[str], root: str) -> Tuple[List[Tuple[str, str]], List[str]]:
+        """
+        Compare files on disk against the manifest.
+
+        Returns (changed, removed): changed is a list of (path, content_hash)
+        for new or modified files, removed lists manifest entries under
+        ``root`` whose files no longer exist.
+        """
+        changed = []
+        seen = set()
+
+        for file_path in file_paths:
+            path = os.path.normpath(file_path)
+            seen.add(path)
+            try:
+                stat = os.stat(path)
+                content_hash = self._content_hash(path, stat)
+            except OSError as e:
+                print(f"Error reading {path}: {e}")
+                continue
+
+            entry = self.files.get(path)
+            if entry and entry["hash"] == content_hash:
+                # Content unchanged; refresh stat info so the next run skips hashing
+                entry["size"] = stat.st_size
+                entry["mtime_ns"] = stat.st_mtime_ns
+                continue
+
+            changed.append((path, content_hash))
+
+        root = os.path.normpath(root)
+        root_prefix = "" if root == os.curdir else os.path.join(root, "")
+        removed = [
+            path for path in self.files
+            if path.startswith(root_prefix) and path not in seen
+        ]
+
+        return changed, removed
+
+    def chunk_ids_for(self, file_paths: List[str]) -> List[str]:
+        """Chunk IDs currently recorded for the given files"""
+        ids = []
+        for path in file_paths:
+            entry = self.files.get(os.path.normpath(path))
+            if entry:
+                ids.extend(entry.get("chunk_ids", []))
+        return ids
+
+    def record(self, file_path: str, content_hash: str, chunk_ids: List[str]):
+        """Record the chunks stored for a file version"""
+        path = os.path.normpath(file_path)
+        stat = os.stat(path)
+        self.files[path] = {
+            "hash": content_hash,
+            "size": stat.st_size,
+            "mtime_ns": stat.st_mtime_ns,
+            "chunk_ids": list(chunk_ids)
+        }
+
+    def forget(self, file_path: str):
+        """Remove a file from the manifest"""
+        self.files.pop(os.path.normpath(file_path), None)
@@ -0,0 +1,178 @@
+"""
+Inverted-file (IVF) approximate nearest neighbour index with k-means coarse quantization
+"""
+import math
+import os
+from typing import List, Optional
+
+import numpy as np
+
+
+def spherical_kmeans(vectors: np.ndarray, n_clusters: int, n_iter: int = 20,
+                     seed: int = 0) -> np.ndarray:
+    """
+    k-means on unit vectors using dot-product assignment.
+
+    Returns (n_clusters, dim) unit-norm centroids. Empty clusters are
+    re-seeded from the points farthest from their current centroid.
+    """
+    rng = np.random.default_rng(seed)
+    n_clusters = min(n_clusters, len(vectors))
+    centroids = vectors[rng.choice(len(vectors), n_clusters, replace=False)].astype(np.float32)
+
+    for _ in range(n_iter):
+        scores = vectors @ centroids.T
+        assignment = scores.argmax(axis=1)
+
+        sums = np.zeros_like(centroids)
+        np.add.at(sums, assignment, vectors)
+        counts = np.bincount(assignment, minlength=n_clusters)
+
+        empty = np.flatnonzero(counts == 0)
+        if empty.size:
+            farthest = np.argsort(scores[np.arange(len(vectors)), assignment])[:empty.size]
+            sums[empty] = vectors[farthest]
+
+        norms = np.linalg.norm(sums, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        centroids = sums / norms
+
+    return centroids.astype(np.float32)
+
+
+class IVFIndex:
+    """
+    Coarse quantizer mapping row numbers of a vector matrix to clusters.
+
+    ``nlist`` clusters are trained with spherical k-means; a query scans
+    the rows of its ``nprobe`` closest clusters. Larger ``nprobe`` trades
+    latency for recall. New rows are assigned to their nearest centroid
+    without retraining; the index asks to be retrained once the matrix has
+    grown to ``retrain_growth`` times its training size.
+    """
+
+    def __init__(self, index_path: Optional[str] = None, nlist: Optional[int] = None,
+                 nprobe: int = 8, train_iters: int = 20, train_sample_per_list: int = 256,
+                 min_train_size: int = 1024, retrain_growth: float = 2.0, seed: int = 0):
+        self.index_path = index_path
+        self.nlist = nlist
+        self.nprobe = nprobe
+        self.train_iters = train_iters
+        self.train_sample_per_list = train_sample_per_list
+        self.min_train_size = min_train_size
+        self.retrain_growth = retrain_growth
+        self.seed = seed
+
+        self.centroids: Optional[np.ndarray] = None
+        self.lists: List[np.ndarray] = []
+        self.trained_size = 0
+        self.layout_version = None
+        # One past the highest row added, so rows appended after the last save can be caught up
+        self.n_rows = 0
+        self._load()
+
+    @property
+    def is_trained(self) -> bool:
+        return self.centroids is not None
+
+    def needs_training(self, n_rows: int, layout_version=None) -> bool:
+        """Whether the index should be (re)built for a matrix of n_rows rows"""
+        if n_rows < self.min_train_size:
+            return False
+        if not self.is_trained or layout_version != self.layout_version:
+            return True
+        return n_rows >= self.retrain_growth * self.trained_size
+
+    def _default_nlist(self, n_rows: int) -> int:
+        return max(1, int(4 * math.sqrt(n_rows)))
+
+    def train(self, matrix: np.ndarray, live_rows: np.ndarray, layout_version=None):
+        """Train centroids on live rows and rebuild every inverted list"""
+        nlist = self.nlist or self._default_nlist(len(live_rows))
+        rng = np.random.default_rng(self.seed)
+        sample_size = min(len(live_rows), nlist * self.train_sample_per_list)
+        sample = np.sort(rng.choice(live_rows, sample_size, replace=False))
+
+        self.centroids = spherical_kmeans(
+            np.asarray(matrix[sample], dtype=np.float32), nlist, self.train_iters, self.seed
+        )
+        self.lists = [np.zeros(0, dtype=np.int64) for _ in range(len(self.centroids))]
+        self.n_rows = 0
+        self.trained_size = len(live_rows)
+        self.layout_version = layout_version
+        self.add(live_rows, matrix[live_rows])
+
+    def _assign(self, vectors: np.ndarray, block_size: int = 16384) -> np.ndarray:
+        assignment = np.empty(len(vectors), dtype=np.int64)
+        for start in range(0, len(vectors), block_size):
+            block = np.asarray(vectors[start:start + block_size], dtype=np.float32)
+            assignment[start:start + block_size] = (block @ self.centroids.T).argmax(axis=1)
+        return assignment
+
+    def add(self, rows: np.ndarray, vectors: np.ndarray):
+        """Append rows to the lists of their nearest centroids"""
+        if not self.is_trained or len(rows) == 0:
+            return
+
+        rows = np.asarray(rows, dtype=np.int64)
+        self.n_rows = max(self.n_rows, int(rows.max()) + 1)
+        assignment = self._assign(vectors)
+        order = np.argsort(assignment, kind="stable")
+        clusters, starts = np.unique(assignment[order], return_index=True)
+        for cluster, chunk in zip(clusters, np.split(rows[order], starts[1:])):
+            self.lists[cluster] = np.concatenate([self.lists[cluster], chunk])
+
+    def candidates(self, query: np.ndarray, nprobe: Optional[int] = None) -> np.ndarray:
+        """Rows in the nprobe clusters closest to a normalized query"""
+        nprobe = min(nprobe or self.nprobe, len(self.centroids))
+        scores = self.centroids @ query
+        probe = np.argpartition(-scores, nprobe - 1)[:nprobe]
+        return np.concatenate([self.lists[cluster] for cluster in probe])
+
+    def save(self):
+        """Persist centroids and inverted lists as a single .npz file"""
+        if self.index_path is None or not self.is_trained:
+            return
+
+        try:
+            os.makedirs(os.path.dirname(self.index_path) or ".", exist_ok=True)
+            sizes = np.array([len(lst) for lst in self.lists], dtype=np.int64)
+            tmp_path = self.index_path + ".tmp.npz"
+            np.savez(
+                tmp_path,
+                centroids=self.centroids,
+                sizes=sizes,
+                rows=np.concatenate(self.lists) if self.lists else np.zeros(0, dtype=np.int64),
+                trained_size=np.int64(self.trained_size),
+                n_rows=np.int64(self.n_rows),
+                layout_version=np.array(self.layout_version if self.layout_version is not None else -1)
+            )
+            os.replace(tmp_path, self.index_path)
+        except Exception as e:
+            print(f"Error saving IVF index: {e}")
+
+    def _load(self):
+        if self.index_path is None or not os.path.exists(self.index_path):
+            return
+
+        try:
+            with np.load(self.index_path) as data:
+                self.centroids = data["centroids"]
+                self.lists = np.split(data["rows"], np.cumsum(data["sizes"])[:-1])
+                self.trained_size = int(data["trained_size"])
+                self.n_rows = int(data["n_rows"]) if "n_rows" in data.files else int(data["rows"].max(initial=-1)) + 1
+                layout_version = int(data["layout_version"])
+                self.layout_version = None if layout_version < 0 else layout_version
+        except Exception as e:
+            print(f"Error loading IVF index: {e}")
+            self.reset()
+
+    def reset(self):
+        """Forget the trained index and delete it from disk"""
+        self.centroids = None
+        self.lists = []
+        self.trained_size = 0
+        self.layout_version = None
+        self.n_rows = 0
+        if self.index_path and os.path.exists(self.index_path):
+            os.remove(self.index_path)
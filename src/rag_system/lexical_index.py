@@ -0,0 +1,149 @@
+"""
+BM25 inverted index with a code-aware tokenizer
+"""
+import heapq
+import json
+import math
+import os
+import re
+import threading
+from collections import Counter
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+_TOKEN_RE = re.compile(r"[A-Za-z_][A-Za-z0-9_]*|\d+")
+_CAMEL_RE = re.compile(r"[A-Z]+(?=[A-Z][a-z])|[A-Z]?[a-z]+|[A-Z]+|\d+")
+
+
+def code_tokenize(text: str) -> List[str]:
+    """
+    Tokenize prose and code alike.
+
+    Every identifier is kept whole (``__init__``, ``keyerror``) and also
+    split into its snake_case and camelCase parts, so ``KeyError`` matches
+    both "KeyError" and "key error".
+    """
+    tokens = []
+    for word in _TOKEN_RE.findall(text):
+        whole = word.lower()
+        tokens.append(whole)
+
+        parts = [
+            part.lower()
+            for piece in word.split("_") if piece
+            for part in _CAMEL_RE.findall(piece)
+        ]
+        if len(parts) > 1 or (parts and parts[0] != whole):
+            tokens.extend(parts)
+    return tokens
+
+
+class BM25Index:
+    """In-memory BM25 postings keyed by chunk ID, persisted as JSON"""
+
+    def __init__(self, index_path: Optional[str] = None, k1: float = 1.5, b: float = 0.75):
+        self.index_path = index_path
+        self.k1 = k1
+        self.b = b
+        self.postings: Dict[str, Dict[str, int]] = {}
+        self.doc_lengths: Dict[str, int] = {}
+        # Distinct terms of each chunk, so a delete only visits that chunk's postings
+        self.doc_terms: Dict[str, List[str]] = {}
+        self.total_length = 0
+        self._lock = threading.RLock()
+        self.loaded = self._load()
+
+    def _load(self) -> bool:
+        if self.index_path is None or not os.path.exists(self.index_path):
+            return False
+
+        try:
+            with open(self.index_path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            self.postings = data["postings"]
+            self.doc_lengths = data["doc_lengths"]
+            self.total_length = sum(self.doc_lengths.values())
+            self.doc_terms = {doc_id: [] for doc_id in self.doc_lengths}
+            for term, posting in self.postings.items():
+                for doc_id in posting:
+                    self.doc_terms[doc_id].append(term)
+            return True
+        except Exception as e:
+            print(f"Error loading lexical index: {e}")
+            self.postings, self.doc_lengths, self.doc_terms, self.total_length = {}, {}, {}, 0
+            return False
+
+    def save(self) -> bool:
+        if self.index_path is None:
+            return False
+
+        try:
+            with self._lock:
+                os.makedirs(os.path.dirname(self.index_path) or ".", exist_ok=True)
+                tmp_path = self.index_path + ".tmp"
+                with open(tmp_path, "w", encoding="utf-8") as f:
+                    json.dump({"postings": self.postings, "doc_lengths": self.doc_lengths}, f)
+                os.replace(tmp_path, self.index_path)
+            return True
+        except Exception as e:
+            print(f"Error saving lexical index: {e}")
+            return False
+
+    def __len__(self) -> int:
+        return len(self.doc_lengths)
+
+    def add(self, ids: List[str], texts: List[str]):
+        """Index texts under their chunk IDs, replacing earlier versions"""
+        with self._lock:
+            for doc_id, text in zip(ids, texts):
+                # Checked per text, so a repeated ID within one batch is replaced too
+                self.delete([doc_id])
+                counts = Counter(code_tokenize(text))
+                for term, tf in counts.items():
+                    self.postings.setdefault(term, {})[doc_id] = tf
+                length = sum(counts.values())
+                self.doc_lengths[doc_id] = length
+                self.doc_terms[doc_id] = list(counts)
+                self.total_length += length
+
+    def delete(self, ids: Iterable[str]):
+        """Remove chunks from the index"""
+        with self._lock:
+            for doc_id in set(ids):
+                if doc_id not in self.doc_lengths:
+                    continue
+                for term in self.doc_terms.pop(doc_id):
+                    posting = self.postings[term]
+                    del posting[doc_id]
+                    if not posting:
+                        del self.postings[term]
+                self.total_length -= self.doc_lengths.pop(doc_id)
+
+    def clear(self):
+        with self._lock:
+            self.postings, self.doc_lengths, self.doc_terms, self.total_length = {}, {}, {}, 0
+            if self.index_path and os.path.exists(self.index_path):
+                os.remove(self.index_path)
+
+    def search(self, query: str, k: int = 20,
+               allowed_ids: Optional[Set[str]] = None) -> List[Tuple[str, float]]:
+        """Top-k (chunk ID, BM25 score) pairs"""
+        with self._lock:
+            n_docs = len(self.doc_lengths)
+            if n_docs == 0:
+                return []
+
+            avg_length = self.total_length / n_docs
+            scores: Dict[str, float] = {}
+            for term in set(code_tokenize(query)):
+                posting = self.postings.get(term)
+                if not posting:
+                    continue
+
+                idf = math.log(1 + (n_docs - len(posting) + 0.5) / (len(posting) + 0.5))
+                for doc_id, tf in posting.items():
+                    if allowed_ids is not None and doc_id not in allowed_ids:
+                        continue
+                    norm = self.k1 * (1 - self.b + self.b * self.doc_lengths[doc_id] / avg_length)
+                    scores[doc_id] = scores.get(doc_id, 0.0) + idf * tf * (self.k1 + 1) / (tf + norm)
+
+            return heapq.nlargest(k, scores.items(), key=lambda item: item[1])
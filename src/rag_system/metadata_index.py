@@ -0,0 +1,159 @@
+"""
+Metadata index for pre-filtering vector search
+
+Filters use the Chroma ``where`` syntax:
+
+    {"language": "python"}
+    {"source_type": {"$in": ["code_example", "documentation"]}}
+    {"$and": [{"language": "python"}, {"filename": {"$ne": "setup.py"}}]}
+    {"$or": [{"language": "java"}, {"start_line": {"$lt": 100}}]}
+
+Several field conditions in one dict are combined with AND.
+"""
+import bisect
+import itertools
+import operator
+from typing import Any, Dict, Hashable, Iterable, List, Optional
+
+import numpy as np
+
+_COMPARISONS = {
+    "$gt": operator.gt,
+    "$gte": operator.ge,
+    "$lt": operator.lt,
+    "$lte": operator.le,
+}
+
+
+def _field_conditions(where: dict) -> List[dict]:
+    """Split a where dict into single-key conditions"""
+    return [{key: value} for key, value in where.items()]
+
+
+def _compare(op: str, actual: Any, expected: Any) -> bool:
+    try:
+        return _COMPARISONS[op](actual, expected)
+    except TypeError:
+        return False
+
+
+def to_chroma_where(where: Optional[dict]) -> Optional[dict]:
+    """Chroma only accepts one top-level condition, so wrap several in $and"""
+    if not where or len(where) == 1:
+        return where
+    return {"$and": _field_conditions(where)}
+
+
+class MetadataIndex:
+    """
+    Sorted row-number postings per (field, value) pair.
+
+    Filters are answered with boolean masks built from the postings, so the
+    set of rows to score is known before any vector is touched and a
+    narrow filter scores only the rows it selects. Memory is one entry per
+    (row, field), whatever the field's cardinality, so unique-per-chunk
+    fields such as ``source`` or ``start_line`` cost no more than
+    ``language``. Rows are only ever appended, which keeps every posting
+    sorted; the index is rebuilt when the row layout changes.
+    """
+
+    def __init__(self):
+        self.n_rows = 0
+        self.postings: Dict[str, Dict[Hashable, List[int]]] = {}
+        # Rows that carry the field at all, for $ne/$nin
+        self.present: Dict[str, List[int]] = {}
+        # Per field (sorted values, their rows), built on the first range filter after an add
+        self._sorted: Dict[str, tuple] = {}
+
+    def add(self, rows: Iterable[int], metadatas: Iterable[Optional[dict]]):
+        """Index the metadata of newly appended rows"""
+        rows = list(rows)
+        if not rows:
+            return
+
+        for row, metadata in zip(rows, metadatas):
+            for field, value in (metadata or {}).items():
+                if not isinstance(value, Hashable):
+                    continue
+                self.postings.setdefault(field, {}).setdefault(value, []).append(row)
+                self.present.setdefault(field, []).append(row)
+        self.n_rows = max(self.n_rows, max(rows) + 1)
+        self._sorted = {}
+
+    def clear(self):
+        self.n_rows = 0
+        self.postings = {}
+        self.present = {}
+        self._sorted = {}
+
+    @staticmethod
+    def _mask(rows: Iterable[int], n_rows: int) -> np.ndarray:
+        mask = np.zeros(n_rows, dtype=bool)
+        rows = np.fromiter(rows, dtype=np.int64)
+        mask[rows[rows < n_rows]] = True
+        return mask
+
+    def _sorted_values(self, field: str) -> tuple:
+        """Distinct numeric values of a field in order, with each one's rows"""
+        if field not in self._sorted:
+            values = sorted((value, rows) for value, rows in self.postings.get(field, {}).items()
+                            if isinstance(value, (int, float)) and not isinstance(value, bool))
+            self._sorted[field] = ([value for value, _ in values], [rows for _, rows in values])
+        return self._sorted[field]
+
+    def _range_rows(self, field: str, op: str, expected: Any) -> Iterable[int]:
+        if isinstance(expected, (int, float)) and not isinstance(expected, bool):
+            # Numeric ranges are two bisections over the sorted distinct values
+            values, rows = self._sorted_values(field)
+            lo, hi = {
+                "$gt": (bisect.bisect_right(values, expected), len(values)),
+                "$gte": (bisect.bisect_left(values, expected), len(values)),
+                "$lt": (0, bisect.bisect_left(values, expected)),
+                "$lte": (0, bisect.bisect_right(values, expected)),
+            }[op]
+            return itertools.chain.from_iterable(rows[lo:hi])
+        return itertools.chain.from_iterable(
+            rows for value, rows in self.postings.get(field, {}).items() if _compare(op, value, expected)
+        )
+
+    def _field_mask(self, field: str, op: str, expected: Any, n_rows: int) -> np.ndarray:
+        values = self.postings.get(field, {})
+
+        if op == "$eq":
+            rows = values.get(expected) if isinstance(expected, Hashable) else None
+            return self._mask(rows or (), n_rows)
+        if op == "$in":
+            return self._mask(itertools.chain.from_iterable(
+                values[value] for value in expected if isinstance(value, Hashable) and value in values
+            ), n_rows)
+        if op == "$ne":
+            return self._mask(self.present.get(field, ()), n_rows) & ~self._field_mask(field, "$eq", expected, n_rows)
+        if op == "$nin":
+            return self._mask(self.present.get(field, ()), n_rows) & ~self._field_mask(field, "$in", expected, n_rows)
+        if op in _COMPARISONS:
+            return self._mask(self._range_rows(field, op, expected), n_rows)
+        raise ValueError(f"Unsupported filter operator: {op}")
+
+    def _evaluate(self, where: dict, n_rows: int) -> np.ndarray:
+        result = np.ones(n_rows, dtype=bool)
+        for condition in _field_conditions(where):
+            (key, value), = condition.items()
+            if key == "$and":
+                for clause in value:
+                    result &= self._evaluate(clause, n_rows)
+            elif key == "$or":
+                matched = np.zeros(n_rows, dtype=bool)
+                for clause in value:
+                    matched |= self._evaluate(clause, n_rows)
+                result &= matched
+            elif isinstance(value, dict):
+                for op, expected in value.items():
+                    result &= self._field_mask(key, op, expected, n_rows)
+            else:
+                result &= self._field_mask(key, "$eq", value, n_rows)
+        return result
+
+    def mask(self, where: dict, n_rows: Optional[int] = None) -> np.ndarray:
+        """Boolean mask over rows matching the filter"""
+        n_rows = self.n_rows if n_rows is None else n_rows
+        return self._evaluate(where, n_rows)
@@ -0,0 +1,291 @@
+"""
+LangChain vector store backed by the in-process NumPy flat index
+"""
+import os
+import uuid
+from typing import Any, Callable, Iterable, List, Optional, Tuple
+
+import numpy as np
+from langchain.schema import Document
+from langchain_core.embeddings import Embeddings
+from langchain_core.vectorstores import VectorStore
+
+from rag_system.flat_index import FlatVectorIndex, normalize_rows, top_k
+from rag_system.ivf_index import IVFIndex
+from rag_system.metadata_index import MetadataIndex
+from rag_system.quantization import QuantizedCodes
+
+
+class NumpyVectorStore(VectorStore):
+    """
+    Drop-in alternative to Chroma for mid-sized corpora.
+
+    Supports the subset of the LangChain vector store API the app uses
+    (add, delete, similarity search with a Chroma-style metadata filter,
+    and ``as_retriever``) with exact cosine search in process. Filters are
+    resolved against a metadata index before scoring. With
+    ``index_type="ivf"`` searches scan only the closest IVF clusters once
+    the corpus is large enough to train them.
+
+    With ``quantization`` set to "int8" or "pq", candidates are scored
+    against compressed codes held in memory; the best ``k * rerank_factor``
+    are then re-scored exactly from the memory-mapped full-precision
+    matrix (``rerank_factor=0`` disables re-ranking).
+    """
+
+    def __init__(self, embedding: Embeddings, persist_directory: str, dtype: str = "float32",
+                 index_type: str = "flat", ann_params: Optional[dict] = None,
+                 quantization: Optional[str] = None, quantization_params: Optional[dict] = None,
+                 rerank_factor: int = 4):
+        if index_type not in ("flat", "ivf"):
+            raise ValueError(f"Unknown index type: {index_type}")
+
+        self._embedding = embedding
+        self.persist_directory = persist_directory
+        index_dir = os.path.join(persist_directory, "flat_index")
+        self.index = FlatVectorIndex(index_dir, dtype=dtype)
+        self.ann = None
+        if index_type == "ivf":
+            self.ann = IVFIndex(os.path.join(index_dir, "ivf.npz"), **(ann_params or {}))
+        self.quantized = None
+        if quantization:
+            self.quantized = QuantizedCodes(
+                quantization, os.path.join(index_dir, f"codes.{quantization}.npz"),
+                **(quantization_params or {})
+            )
+        self.rerank_factor = rerank_factor
+        self.metadata_index = MetadataIndex()
+        self._metadata_layout = None
+
+        # With defer_saves set, changed secondary indexes are only written by flush()
+        self.defer_saves = False
+        self._unsaved = []
+        self._catch_up_indexes()
+
+    @property
+    def embeddings(self) -> Embeddings:
+        return self._embedding
+
+    @classmethod
+    def from_texts(cls, texts: List[str], embedding: Embeddings,
+                   metadatas: Optional[List[dict]] = None, ids: Optional[List[str]] = None,
+                   persist_directory: str = "./chroma_db", **kwargs: Any) -> "NumpyVectorStore":
+        store_params = ("dtype", "index_type", "ann_params", "quantization",
+                        "quantization_params", "rerank_factor")
+        store = cls(embedding, persist_directory,
+                    **{key: value for key, value in kwargs.items() if key in store_params})
+        store.add_texts(texts, metadatas=metadatas, ids=ids)
+        return store
+
+    def add_texts(self, texts: Iterable[str], metadatas: Optional[List[dict]] = None,
+                  ids: Optional[List[str]] = None, **kwargs: Any) -> List[str]:
+        texts = list(texts)
+        if not texts:
+            return []
+
+        metadatas = metadatas or [{} for _ in texts]
+        ids = list(ids) if ids else [str(uuid.uuid4()) for _ in texts]
+        vectors = np.asarray(self._embedding.embed_documents(texts), dtype=np.float32)
+        documents = [Document(page_content=text, metadata=metadata or {})
+                     for text, metadata in zip(texts, metadatas)]
+
+        rows = self.index.add(ids, vectors, documents)
+        self._update_indexes(np.asarray(rows, dtype=np.int64), normalize_rows(vectors))
+        return ids
+
+    def _update_indexes(self, rows: Optional[np.ndarray] = None, vectors: Optional[np.ndarray] = None):
+        """Keep the ANN index and quantized codes in step with the flat index"""
+        live_rows = np.flatnonzero(self.index.live)
+        for secondary in (self.ann, self.quantized):
+            if secondary is None:
+                continue
+            if secondary.needs_training(len(live_rows), self.index.layout_version):
+                secondary.train(self.index.matrix, live_rows, self.index.layout_version)
+            elif secondary.is_trained and rows is not None and len(rows):
+                secondary.add(rows, vectors)
+            else:
+                continue
+            if secondary not in self._unsaved:
+                self._unsaved.append(secondary)
+        if not self.defer_saves:
+            self.flush()
+
+    def flush(self):
+        """Write secondary indexes changed since their last save"""
+        while self._unsaved:
+            self._unsaved.pop().save()
+
+    def _catch_up_indexes(self):
+        """Add rows appended to the flat index after a secondary index was last saved"""
+        n_rows = len(self.index.ids)
+        for secondary in (self.ann, self.quantized):
+            if (secondary is None or not secondary.is_trained
+                    or secondary.layout_version != self.index.layout_version
+                    or secondary.n_rows >= n_rows):
+                continue
+            rows = secondary.n_rows + np.flatnonzero(self.index.live[secondary.n_rows:])
+            if len(rows):
+                secondary.add(rows, self.index.matrix[rows])
+                self._unsaved.append(secondary)
+        self.flush()
+
+    def delete(self, ids: Optional[List[str]] = None, **kwargs: Any) -> Optional[bool]:
+        if ids is None:
+            return False
+        self.index.delete(ids)
+        # Compaction renumbers rows, which forces secondary indexes to rebuild
+        self._update_indexes()
+        return True
+
+    def delete_collection(self):
+        self.index.clear()
+        for secondary in (self.ann, self.quantized):
+            if secondary is not None:
+                secondary.reset()
+
+    def get_by_ids(self, ids: List[str]) -> List[Document]:
+        return self.index.get(ids)
+
+    def _sync_metadata_index(self):
+        """Bring the metadata index up to date with the flat index rows"""
+        n_rows = len(self.index.documents)
+        if (self._metadata_layout != self.index.layout_version
+                or self.metadata_index.n_rows > n_rows):
+            self.metadata_index.clear()
+            self._metadata_layout = self.index.layout_version
+        start = self.metadata_index.n_rows
+        if start < n_rows:
+            self.metadata_index.add(
+                range(start, n_rows),
+                (doc.metadata if doc is not None else None for doc in self.index.documents[start:n_rows])
+            )
+
+    def filter_mask(self, filter: dict) -> np.ndarray:
+        """Live rows matching a metadata filter, as a boolean mask"""
+        self._sync_metadata_index()
+        return self.metadata_index.mask(filter, len(self.index.live)) & self.index.live
+
+    def filter_ids(self, filter: dict) -> set:
+        """IDs of the stored chunks matching a metadata filter"""
+        return {self.index.ids[row] for row in np.flatnonzero(self.filter_mask(filter))}
+
+    def _candidate_rows(self, query: np.ndarray, filter: Optional[dict],
+                        nprobe: Optional[int] = None) -> Optional[np.ndarray]:
+        """Rows to score: the probed ANN clusters, restricted to filter matches"""
+        allowed = self.filter_mask(filter) if filter else None
+
+        use_ann = (self.ann is not None and self.ann.is_trained
+                   and self.ann.layout_version == self.index.layout_version)
+        if not use_ann:
+            return None if allowed is None else np.flatnonzero(allowed)
+
+        if allowed is not None:
+            # A filter narrower than the probed clusters is cheaper (and exact) to scan directly
+            matches = np.flatnonzero(allowed)
+            nprobe = min(nprobe or self.ann.nprobe, len(self.ann.centroids))
+            if len(matches) <= self.index.live.sum() * nprobe / len(self.ann.centroids):
+                return matches
+
+        rows = self.ann.candidates(normalize_rows(query.reshape(1, -1))[0], nprobe)
+        mask = self.index.live[rows]
+        if allowed is not None:
+            mask &= allowed[rows]
+        return rows[mask]
+
+    def similarity_search_with_score_by_vector(self, embedding: List[float], k: int = 4,
+                                               filter: Optional[dict] = None,
+                                               **kwargs: Any) -> List[Tuple[Document, float]]:
+        query = np.asarray(embedding, dtype=np.float32)
+        candidate_rows = self._candidate_rows(query, filter, kwargs.get("nprobe"))
+        hits = self._search_rows(query, k, candidate_rows)
+        return [(self.index.documents[row], score) for row, score in hits]
+
+    def _search_rows(self, query: np.ndarray, k: int,
+                     candidate_rows: Optional[np.ndarray]) -> List[Tuple[int, float]]:
+        """Score candidates, through the quantized codes when they are available"""
+        use_codes = (self.quantized is not None and self.quantized.is_trained
+                     and self.quantized.layout_version == self.index.layout_version)
+        if not use_codes:
+            return self.index.search(query, k, candidate_rows=candidate_rows)
+
+        rows = np.flatnonzero(self.index.live) if candidate_rows is None else candidate_rows
+        scores = self.quantized.score(normalize_rows(query.reshape(1, -1))[0], rows)
+        if self.rerank_factor <= 0:
+            return [(int(rows[i]), float(scores[i])) for i in top_k(scores, k)]
+
+        shortlist = rows[top_k(scores, k * self.rerank_factor)]
+        return self.index.search(query, k, candidate_rows=np.sort(shortlist))
+
+    def evaluate_recall(self, k: int = 10, num_queries: int = 100, seed: int = 0) -> dict:
+        """
+        Measure recall@k of the configured search path (IVF and/or quantized
+        codes) against exact search, using perturbed stored vectors as queries.
+        """
+        live_rows = np.flatnonzero(self.index.live)
+        if len(live_rows) == 0:
+            return {"recall": 0.0, "queries": 0}
+
+        rng = np.random.default_rng(seed)
+        matrix = self.index.matrix
+        picks = rng.choice(live_rows, min(num_queries, len(live_rows)), replace=False)
+        noise = rng.standard_normal((len(picks), matrix.shape[1])) * 0.5 / np.sqrt(matrix.shape[1])
+        queries = normalize_rows(np.asarray(matrix[picks], dtype=np.float32) + noise)
+
+        recalls = []
+        for query in queries:
+            exact = {row for row, _ in self.index.search(query, k)}
+            found = {row for row, _ in self._search_rows(query, k, self._candidate_rows(query, None))}
+            recalls.append(len(exact & found) / max(1, len(exact)))
+
+        result = {"recall": float(np.mean(recalls)), "queries": len(queries), "k": k}
+        if self.quantized is not None and self.quantized.is_trained:
+            result["compression_ratio"] = self.quantized.compression_ratio(matrix.shape[1])
+        return result
+
+    def similarity_search_batch_with_score_by_vector(self, embeddings: List[List[float]], k: int = 4,
+                                                     filter: Optional[dict] = None,
+                                                     **kwargs: Any) -> List[List[Tuple[Document, float]]]:
+        """
+        Search many query vectors at once.
+
+        Exact search shares the filter evaluation and scores every query
+        with one matrix multiply. IVF probes and quantized shortlists are
+        query-specific, so those paths search each query in turn.
+        """
+        queries = np.asarray(embeddings, dtype=np.float32)
+        if len(queries) == 0:
+            return []
+
+        approximate = any(
+            secondary is not None and secondary.is_trained
+            and secondary.layout_version == self.index.layout_version
+            for secondary in (self.ann, self.quantized)
+        )
+        if approximate:
+            return [self.similarity_search_with_score_by_vector(query, k, filter, **kwargs)
+                    for query in queries]
+
+        candidate_rows = np.flatnonzero(self.filter_mask(filter)) if filter else None
+        return [
+            [(self.index.documents[row], score) for row, score in hits]
+            for hits in self.index.search_batch(queries, k, candidate_rows=candidate_rows)
+        ]
+
+    def similarity_search_by_vector(self, embedding: List[float], k: int = 4,
+                                    filter: Optional[dict] = None, **kwargs: Any) -> List[Document]:
+        return [doc for doc, _ in self.similarity_search_with_score_by_vector(embedding, k, filter, **kwargs)]
+
+    def similarity_search_with_score(self, query: str, k: int = 4,
+                                     filter: Optional[dict] = None,
+                                     **kwargs: Any) -> List[Tuple[Document, float]]:
+        return self.similarity_search_with_score_by_vector(
+            self._embedding.embed_query(query), k, filter, **kwargs
+        )
+
+    def similarity_search(self, query: str, k: int = 4, filter: Optional[dict] = None,
+                          **kwargs: Any) -> List[Document]:
+        return [doc for doc, _ in self.similarity_search_with_score(query, k, filter, **kwargs)]
+
+    def _select_relevance_score_fn(self) -> Callable[[float], float]:
+        # Scores are cosine similarities in [-1, 1]
+        return lambda score: (score + 1.0) / 2.0
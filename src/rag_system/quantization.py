@@ -0,0 +1,260 @@
+"""
+Compressed embedding storage with scalar (int8) and product quantization
+"""
+import os
+from typing import Optional
+
+import numpy as np
+
+from rag_system.flat_index import is_all_rows
+
+_SCORE_BLOCK = 65536
+
+
+def _kmeans_l2(vectors: np.ndarray, n_clusters: int, n_iter: int, rng) -> np.ndarray:
+    """Plain Euclidean k-means used to train product quantizer codebooks"""
+    centroids = vectors[rng.choice(len(vectors), n_clusters, replace=False)].copy()
+    for _ in range(n_iter):
+        distances = (
+            (vectors ** 2).sum(axis=1, keepdims=True)
+            - 2 * vectors @ centroids.T
+            + (centroids ** 2).sum(axis=1)
+        )
+        assignment = distances.argmin(axis=1)
+        counts = np.bincount(assignment, minlength=n_clusters)
+        sums = np.zeros_like(centroids)
+        np.add.at(sums, assignment, vectors)
+        filled = counts > 0
+        centroids[filled] = sums[filled] / counts[filled, None]
+    return centroids
+
+
+class ScalarQuantizer:
+    """Per-dimension int8 quantization: 4x smaller than float32"""
+
+    kind = "int8"
+
+    def __init__(self):
+        self.offset: Optional[np.ndarray] = None
+        self.scale: Optional[np.ndarray] = None
+
+    def train(self, vectors: np.ndarray):
+        low = vectors.min(axis=0)
+        high = vectors.max(axis=0)
+        self.offset = low.astype(np.float32)
+        self.scale = np.maximum((high - low) / 255.0, 1e-12).astype(np.float32)
+
+    def encode(self, vectors: np.ndarray) -> np.ndarray:
+        codes = np.rint((vectors - self.offset) / self.scale)
+        return np.clip(codes, 0, 255).astype(np.uint8)
+
+    def bytes_per_vector(self) -> int:
+        return len(self.offset)
+
+    def score(self, query: np.ndarray, codes: np.ndarray) -> np.ndarray:
+        """
+        Asymmetric dot products: the query stays in float and codes are
+        decoded implicitly, since q . (offset + scale * c) = q . offset + (q * scale) . c
+        """
+        weighted = query * self.scale
+        bias = float(query @ self.offset)
+        scores = np.empty(len(codes), dtype=np.float32)
+        for start in range(0, len(codes), _SCORE_BLOCK):
+            block = codes[start:start + _SCORE_BLOCK].astype(np.float32)
+            scores[start:start + _SCORE_BLOCK] = block @ weighted + bias
+        return scores
+
+    def state(self) -> dict:
+        return {"offset": self.offset, "scale": self.scale}
+
+    def load_state(self, state: dict):
+        self.offset = state["offset"]
+        self.scale = state["scale"]
+
+
+class ProductQuantizer:
+    """
+    Product quantization: each vector is split into ``m`` sub-vectors and
+    every sub-vector is replaced by the index of its nearest of 256
+    centroids, so a vector costs ``m`` bytes.
+    """
+
+    kind = "pq"
+    KSUB = 256
+
+    def __init__(self, m: Optional[int] = None, train_iters: int = 15,
+                 train_sample: int = 65536, seed: int = 0):
+        self.m = m
+        self.train_iters = train_iters
+        self.train_sample = train_sample
+        self.seed = seed
+        self.codebooks: Optional[np.ndarray] = None
+
+    @staticmethod
+    def _pick_m(dim: int) -> int:
+        """Largest divisor of dim that keeps sub-vectors at least 4 dims wide"""
+        for m in range(dim // 4, 0, -1):
+            if dim % m == 0:
+                return m
+        return 1
+
+    def train(self, vectors: np.ndarray):
+        dim = vectors.shape[1]
+        self.m = self.m or self._pick_m(dim)
+        if dim % self.m:
+            raise ValueError(f"Vector dimension {dim} is not divisible by m={self.m}")
+        if len(vectors) < self.KSUB:
+            raise ValueError(f"Product quantization needs at least {self.KSUB} training vectors")
+
+        rng = np.random.default_rng(self.seed)
+        if len(vectors) > self.train_sample:
+            vectors = vectors[rng.choice(len(vectors), self.train_sample, replace=False)]
+
+        sub_dim = dim // self.m
+        self.codebooks = np.stack([
+            _kmeans_l2(vectors[:, j * sub_dim:(j + 1) * sub_dim].astype(np.float32),
+                       self.KSUB, self.train_iters, rng)
+            for j in range(self.m)
+        ])
+
+    def encode(self, vectors: np.ndarray) -> np.ndarray:
+        sub_dim = self.codebooks.shape[2]
+        codes = np.empty((len(vectors), self.m), dtype=np.uint8)
+        for j in range(self.m):
+            sub = vectors[:, j * sub_dim:(j + 1) * sub_dim]
+            centroids = self.codebooks[j]
+            distances = -2 * sub @ centroids.T + (centroids ** 2).sum(axis=1)
+            codes[:, j] = distances.argmin(axis=1)
+        return codes
+
+    def bytes_per_vector(self) -> int:
+        return self.m
+
+    def score(self, query: np.ndarray, codes: np.ndarray) -> np.ndarray:
+        """Asymmetric distance computation through a per-query lookup table"""
+        sub_dim = self.codebooks.shape[2]
+        table = np.einsum("jkd,jd->jk", self.codebooks, query.reshape(self.m, sub_dim))
+        flat_table = table.astype(np.float32).ravel()
+        offsets = np.arange(self.m, dtype=np.int32) * self.KSUB
+        scores = np.empty(len(codes), dtype=np.float32)
+        for start in range(0, len(codes), _SCORE_BLOCK):
+            block = codes[start:start + _SCORE_BLOCK].astype(np.int32) + offsets
+            scores[start:start + _SCORE_BLOCK] = np.take(flat_table, block).sum(axis=1)
+        return scores
+
+    def state(self) -> dict:
+        return {"codebooks": self.codebooks}
+
+    def load_state(self, state: dict):
+        self.codebooks = state["codebooks"]
+        self.m = self.codebooks.shape[0]
+
+
+QUANTIZERS = {"int8": ScalarQuantizer, "pq": ProductQuantizer}
+
+
+class QuantizedCodes:
+    """
+    Compressed copy of an embedding matrix, aligned with its row numbers.
+
+    Codes stay resident in memory and are scored with asymmetric distance
+    computation; the full-precision matrix can remain memory-mapped on disk
+    and only be touched to re-rank a short list.
+    """
+
+    def __init__(self, kind: str, codes_path: Optional[str] = None,
+                 min_train_size: int = 1024, **quantizer_params):
+        if kind not in QUANTIZERS:
+            raise ValueError(f"Unknown quantization: {kind}")
+
+        self.kind = kind
+        self.codes_path = codes_path
+        self.min_train_size = max(min_train_size, ProductQuantizer.KSUB if kind == "pq" else 1)
+        self.quantizer = QUANTIZERS[kind](**quantizer_params)
+        self.codes: Optional[np.ndarray] = None
+        self.layout_version = None
+        self._load()
+
+    @property
+    def is_trained(self) -> bool:
+        return self.codes is not None
+
+    @property
+    def n_rows(self) -> int:
+        """One past the highest row encoded"""
+        return len(self.codes) if self.codes is not None else 0
+
+    def needs_training(self, n_rows: int, layout_version=None) -> bool:
+        if n_rows < self.min_train_size:
+            return False
+        return not self.is_trained or layout_version != self.layout_version
+
+    def train(self, matrix: np.ndarray, live_rows: np.ndarray, layout_version=None):
+        """Fit the quantizer on live rows and encode the whole matrix"""
+        self.quantizer.train(np.asarray(matrix[live_rows], dtype=np.float32))
+        self.codes = np.zeros((0, self.quantizer.bytes_per_vector()), dtype=np.uint8)
+        self.layout_version = layout_version
+        self.add(np.arange(len(matrix)), matrix)
+
+    def add(self, rows: np.ndarray, vectors: np.ndarray):
+        """Encode vectors for the given row numbers"""
+        if not self.is_trained or len(rows) == 0:
+            return
+
+        rows = np.asarray(rows, dtype=np.int64)
+        needed = int(rows.max()) + 1
+        if needed > len(self.codes):
+            grown = np.zeros((needed, self.codes.shape[1]), dtype=np.uint8)
+            grown[:len(self.codes)] = self.codes
+            self.codes = grown
+
+        for start in range(0, len(rows), _SCORE_BLOCK):
+            block = np.asarray(vectors[start:start + _SCORE_BLOCK], dtype=np.float32)
+            self.codes[rows[start:start + _SCORE_BLOCK]] = self.quantizer.encode(block)
+
+    def score(self, query: np.ndarray, rows: np.ndarray) -> np.ndarray:
+        """Approximate dot products between a query and the given rows"""
+        # Rows may be a permutation (IVF candidates); only an in-order full set can skip the gather
+        if is_all_rows(np.asarray(rows), len(self.codes)):
+            return self.quantizer.score(query, self.codes)
+        return self.quantizer.score(query, self.codes[rows])
+
+    def compression_ratio(self, dim: int) -> float:
+        return dim * 4 / self.quantizer.bytes_per_vector()
+
+    def save(self):
+        if self.codes_path is None or not self.is_trained:
+            return
+
+        try:
+            tmp_path = self.codes_path + ".tmp.npz"
+            np.savez(
+                tmp_path,
+                codes=self.codes,
+                layout_version=np.array(self.layout_version if self.layout_version is not None else -1),
+                **self.quantizer.state()
+            )
+            os.replace(tmp_path, self.codes_path)
+        except Exception as e:
+            print(f"Error saving quantized codes: {e}")
+
+    def _load(self):
+        if self.codes_path is None or not os.path.exists(self.codes_path):
+            return
+
+        try:
+            with np.load(self.codes_path) as data:
+                self.codes = data["codes"]
+                layout_version = int(data["layout_version"])
+                self.layout_version = None if layout_version < 0 else layout_version
+                self.quantizer.load_state({key: data[key] for key in data.files
+                                           if key not in ("codes", "layout_version")})
+        except Exception as e:
+            print(f"Error loading quantized codes: {e}")
+            self.reset()
+
+    def reset(self):
+        self.codes = None
+        self.layout_version = None
+        if self.codes_path and os.path.exists(self.codes_path):
+            os.remove(self.codes_path)
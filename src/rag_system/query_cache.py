@@ -0,0 +1,115 @@
+"""
+In-memory caches for query embeddings and retrieval results
+"""
+import copy
+import json
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Optional
+
+from rag_system.embedding_cache import normalize_text
+
+
+class LRUCache:
+    """Thread-safe LRU cache with an optional time-to-live per entry"""
+
+    def __init__(self, max_size: int = 1024, ttl_seconds: Optional[float] = None):
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and self.ttl_seconds is not None \
+                    and time.monotonic() - entry[1] > self.ttl_seconds:
+                del self._entries[key]
+                entry = None
+
+            if entry is None:
+                self.misses += 1
+                return None
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def put(self, key: Hashable, value: Any):
+        with self._lock:
+            self._entries[key] = (value, time.monotonic())
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @property
+    def hit_rate(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    def stats(self) -> Dict[str, float]:
+        return {"size": len(self), "hits": self.hits, "misses": self.misses, "hit_rate": self.hit_rate}
+
+
+class QueryCache:
+    """
+    Query embedding and retrieval result caches for one vector store.
+
+    Embeddings depend only on the query text, so they survive index
+    changes. Results are tagged with the index version they were computed
+    against and are dropped as soon as the store reports a newer version.
+    """
+
+    def __init__(self, max_embeddings: int = 2048, max_results: int = 1024,
+                 ttl_seconds: Optional[float] = 3600):
+        self.embeddings = LRUCache(max_embeddings, ttl_seconds)
+        self.results = LRUCache(max_results, ttl_seconds)
+        self.index_version = None
+
+    @staticmethod
+    def query_key(query: str) -> str:
+        return normalize_text(query)
+
+    @staticmethod
+    def result_key(kind: str, query: str, k: int, filter_dict: Optional[dict]) -> tuple:
+        filter_key = json.dumps(filter_dict, sort_keys=True, default=str) if filter_dict else ""
+        return kind, normalize_text(query), k, filter_key
+
+    def sync(self, index_version):
+        """Drop cached results computed against an older index"""
+        if index_version != self.index_version:
+            self.results.clear()
+            self.index_version = index_version
+
+    def embedding(self, query: str, compute: Callable[[str], Any]) -> Any:
+        key = self.query_key(query)
+        vector = self.embeddings.get(key)
+        if vector is None:
+            vector = compute(query)
+            self.embeddings.put(key, vector)
+        return vector
+
+    def search(self, key: tuple, compute: Callable[[], list]) -> list:
+        """
+        Cached results for ``key``. Documents are copied in and out, so
+        callers editing their metadata or content never alter the cache.
+        """
+        results = self.results.get(key)
+        if results is None:
+            results = compute()
+            self.results.put(key, copy.deepcopy(list(results)))
+            return results
+        return copy.deepcopy(results)
+
+    def stats(self) -> Dict[str, Dict[str, float]]:
+        return {"query_embeddings": self.embeddings.stats(), "results": self.results.stats()}
@@ -1,33 +1,146 @@
 """
 RAG chain for answering programming questions
 """
+import asyncio
 import os
-from typing import Dict, Any
-from langchain.chains import RetrievalQA
-from langchain.prompts import PromptTemplate
-from langchain_google_genai import ChatGoogleGenerativeAI
-from langchain.memory import ConversationBufferMemory
-from langchain.chains import ConversationalRetrievalChain
+from typing import Dict, Any, Iterator, List, Optional
+from startup_timing import startup_timer
 
 class CodeLearningRAGChain:
-    def __init__(self, vector_store, model_name: str = "gemini-2.0-flash-exp"):
+    def __init__(self, vector_store, model_name: str = "gemini-2.0-flash-exp",
+                 retrieval_mode: str = "hybrid", k: int = 5,
+                 use_answer_cache: bool = True, answer_cache_threshold: float = 0.9,
+                 answer_cache_size: int = 500, context_token_budget: Optional[int] = 1000,
+                 memory_max_tokens: int = 1000, summarize_history: bool = False,
+                 max_sessions: int = 1000, session_idle_seconds: Optional[float] = 3600,
+                 condense_mode: str = "auto", condense_model_name: Optional[str] = None,
+                 condense_embedding_check: bool = False):
         self.vector_store = vector_store
-        self.llm = ChatGoogleGenerativeAI(
-            model=model_name,
-            temperature=0.1,
-            google_api_key=os.getenv("GOOGLE_API_KEY")
-        )
-        self.memory = ConversationBufferMemory(
-            memory_key="chat_history",
-            return_messages=True
-        )
-        self._setup_chains()
+        self.model_name = model_name
+        
+        # "hybrid" fuses BM25 and dense results; "dense" uses embeddings only
+        self.retrieval_mode = retrieval_mode
+        self.k = k
+        
+        # Retrieved chunks are merged, de-duplicated and packed into this many
+        # prompt tokens; None stuffs them unchanged
+        self.context_token_budget = context_token_budget
+        
+        # Paraphrased one-off questions are answered from a semantic cache
+        self.use_answer_cache = use_answer_cache
+        self.answer_cache_threshold = answer_cache_threshold
+        self.answer_cache_size = answer_cache_size
+        self._answer_cache = None
+        
+        # Conversation memory is kept per session within a token window;
+        # older turns are summarized when summarize_history is set
+        self.memory_max_tokens = memory_max_tokens
+        self.summarize_history = summarize_history
+        self.max_sessions = max_sessions
+        self.session_idle_seconds = session_idle_seconds
+        self._sessions = None
+        
+        # Follow-up questions are only rewritten when the policy says they need it,
+        # optionally by a cheaper model than the answering one
+        self.condense_mode = condense_mode
+        self.condense_model_name = condense_model_name
+        self.condense_embedding_check = condense_embedding_check
+        self._condense_llm = None
+        self._condensation_policy = None
+        
+        # LLM client, session memory and chains are built on first use
+        self._llm = None
+        self._chains_ready = False
+    
+    @property
+    def llm(self):
+        """Shared gateway chat model, created on first use"""
+        if self._llm is None:
+            with startup_timer.measure("llm client (rag chain)"):
+                from llm_gateway.chat_model import get_chat_model
+                self._llm = get_chat_model(self.model_name, temperature=0.1)
+        return self._llm
+    
+    @property
+    def condense_llm(self):
+        """Model used to rewrite follow-up questions; the main model unless configured"""
+        if self.condense_model_name is None:
+            return self.llm
+        if self._condense_llm is None:
+            with startup_timer.measure("llm client (condense)"):
+                from llm_gateway.chat_model import get_chat_model
+                self._condense_llm = get_chat_model(self.condense_model_name, temperature=0)
+        return self._condense_llm
+    
+    @property
+    def condensation_policy(self):
+        if self._condensation_policy is None:
+            from rag_system.condensation import CondensationPolicy
+            self._condensation_policy = CondensationPolicy(
+                mode=self.condense_mode,
+                embed_fn=self.vector_store.embed_query if self.condense_embedding_check else None
+            )
+        return self._condensation_policy
+    
+    def condensation_stats(self) -> Dict[str, float]:
+        """How often follow-up questions were rewritten or skipped, and why"""
+        return self.condensation_policy.stats()
+    
+    @property
+    def sessions(self):
+        """Per-session conversation memory, created on first use"""
+        if self._sessions is None:
+            from rag_system.session_memory import SessionMemoryStore
+            self._sessions = SessionMemoryStore(
+                max_sessions=self.max_sessions,
+                idle_ttl_seconds=self.session_idle_seconds,
+                max_tokens=self.memory_max_tokens,
+                summarizer=self._summarize_history if self.summarize_history else None
+            )
+        return self._sessions
+    
+    def _summarize_history(self, summary: str, messages: List) -> str:
+        """Fold turns leaving the memory window into the rolling summary"""
+        from langchain_core.messages import get_buffer_string
+        prompt = f"""Progressively summarize this tutoring conversation in a few sentences.
+        Keep the topics, code and misunderstandings the student is working through.
+        
+        Current summary: {summary or "(none)"}
+        
+        New lines of conversation:
+        {get_buffer_string(messages)}
+        
+        New summary:"""
+        return self.llm.invoke(prompt).content
+    
+    @property
+    def answer_cache(self):
+        """Semantic answer cache stored with the vector store, opened on first use"""
+        if self._answer_cache is None and self.use_answer_cache:
+            from rag_system.answer_cache import SemanticAnswerCache
+            self._answer_cache = SemanticAnswerCache(
+                os.path.join(self.vector_store.persist_directory, "answer_cache"),
+                self.model_name,
+                self.vector_store.model_name,
+                threshold=self.answer_cache_threshold,
+                max_entries=self.answer_cache_size
+            )
+        return self._answer_cache
+    
+    def _ensure_chains(self):
+        """Build the chains the first time they are needed"""
+        if not self._chains_ready:
+            with startup_timer.measure("rag chains"):
+                self._setup_chains()
+            self._chains_ready = True
     
     def _setup_chains(self):
         """Setup different types of chains for various use cases"""
+        from langchain.chains import ConversationalRetrievalChain
+        from langchain.prompts import PromptTemplate
         
         # Q&A Chain with custom prompt
-        qa_prompt = PromptTemplate(
+        self.qa_prompt = qa_prompt = PromptTemplate(
             template="""You are an expert programming tutor helping students learn to code. 
             Use the following context to answer the student's question in a clear, educational way.
             
@@ -47,19 +160,19 @@ class CodeLearningRAGChain:
         )
         
         retriever = self.vector_store.get_retriever(
-            search_kwargs={"k": 5}
-        )
-        
-        self.qa_chain = RetrievalQA.from_chain_type(
-            llm=self.llm,
-            chain_type="stuff",
-            retriever=retriever,
-            chain_type_kwargs={"prompt": qa_prompt},
-            return_source_documents=True
+            search_kwargs={"k": self.k},
+            mode=self.retrieval_mode
         )
+        if self.context_token_budget:
+            from rag_system.context_packer import ContextPacker, PackedContextRetriever
+            retriever = PackedContextRetriever(
+                base_retriever=retriever,
+                packer=ContextPacker(max_tokens=self.context_token_budget)
+            )
+        self.retriever = retriever
         
         # Conversational chain for follow-up questions
-        conversational_prompt = PromptTemplate(
+        self.conversational_prompt = conversational_prompt = PromptTemplate(
             template="""You are an expert programming tutor. Use the context and chat history to provide helpful, educational responses.
             
             Context: {context}
@@ -73,32 +186,198 @@ class CodeLearningRAGChain:
         self.conversational_chain = ConversationalRetrievalChain.from_llm(
             llm=self.llm,
             retriever=retriever,
-            memory=self.memory,
+            condense_question_llm=self.condense_llm,
             combine_docs_chain_kwargs={"prompt": conversational_prompt}
         )
     
-    def ask_question(self, question: str, use_conversation: bool = False) -> Dict[str, Any]:
+    def ask_question(self, question: str, use_conversation: bool = False,
+                     session_id: str = "default") -> Dict[str, Any]:
         """Ask a programming question and get an answer"""
         try:
+            self._ensure_chains()
+            turn = self._start_turn(question, use_conversation, session_id)
+            if turn["cached"] is not None:
+                return self._cached_response(turn["cached"])
+            
+            # The conversational chain's steps are run here so the rewrite can be skipped
+            search_question, chat_history = question, None
             if use_conversation:
-                result = self.conversational_chain({"question": question})
-                return {
-                    "answer": result["answer"],
-                    "source_documents": result.get("source_documents", []),
-                    "chat_history": self.memory.chat_memory.messages
-                }
-            else:
-                result = self.qa_chain({"query": question})
-                return {
-                    "answer": result["result"],
-                    "source_documents": result["source_documents"]
-                }
+                search_question, chat_history = self._condense_question(question, turn["session"].history())
+            
+            source_documents = self.retriever.invoke(search_question)
+            chain, inputs = self._answer_chain(question, source_documents, chat_history)
+            return self._finish_turn(turn, question, chain.invoke(inputs).content, source_documents)
         
         except Exception as e:
+            return self._error_response(e)
+    
+    def _start_turn(self, question: str, use_conversation: bool, session_id: str) -> Dict[str, Any]:
+        """
+        First step shared by the sync, streaming and async paths: the session
+        memory of a conversational question, or the answer cache lookup of a
+        one-shot one.
+        """
+        if use_conversation:
+            return {"session": self.sessions.get(session_id), "cached": None, "vector": None}
+        
+        cached, vector, index_version = self._lookup_answer(question)
+        return {"session": None, "cached": cached, "vector": vector, "index_version": index_version}
+    
+    def _answer_chain(self, question: str, source_documents: List, chat_history: Optional[str]):
+        """Prompt-and-LLM chain and its inputs; chat_history None selects the one-shot prompt"""
+        inputs = {"context": self._format_context(source_documents), "question": question}
+        if chat_history is None:
+            return self.qa_prompt | self.llm, inputs
+        
+        inputs["chat_history"] = chat_history
+        return self.conversational_prompt | self.llm, inputs
+    
+    def _finish_turn(self, turn: Dict[str, Any], question: str, answer: str,
+                     source_documents: List) -> Dict[str, Any]:
+        """Last shared step: record the turn in session memory or cache the one-shot answer"""
+        session = turn["session"]
+        if session is not None:
+            session.add_turn(question, answer)
             return {
-                "answer": f"Sorry, I encountered an error: {str(e)}",
-                "source_documents": []
+                "answer": answer,
+                "source_documents": source_documents,
+                "chat_history": session.history()
             }
+        
+        if turn["vector"] is not None:
+            self.answer_cache.put(question, turn["vector"], answer, source_documents, turn["index_version"])
+        return {
+            "answer": answer,
+            "source_documents": source_documents
+        }
+    
+    @staticmethod
+    def _cached_response(cached: Dict[str, Any]) -> Dict[str, Any]:
+        return {
+            "answer": cached["answer"],
+            "source_documents": cached["source_documents"],
+            "cached": True
+        }
+    
+    @staticmethod
+    def _error_response(error: Exception) -> Dict[str, Any]:
+        return {
+            "answer": f"Sorry, I encountered an error: {str(error)}",
+            "source_documents": []
+        }
+    
+    def _lookup_answer(self, question: str):
+        """
+        Answer cache lookup for one-shot questions.
+        
+        Answers without chat history depend only on the question and the
+        corpus, so they can be reused. Returns (cached result or None,
+        question vector, index version); the vector is None when caching is off.
+        """
+        cache = self.answer_cache
+        if cache is None:
+            return None, None, None
+        
+        vector = self.vector_store.embed_query(question)
+        index_version = self.vector_store.index_version
+        return cache.lookup(question, vector, index_version), vector, index_version
+    
+    @staticmethod
+    def _format_context(documents: List) -> str:
+        """Join documents the way the "stuff" chains do"""
+        return "\n\n".join(doc.page_content for doc in documents)
+    
+    def _condense_question(self, question: str, history: List):
+        """
+        Question to retrieve with, and the formatted chat history. Follow-ups
+        are rewritten as standalone questions unless the policy skips it.
+        """
+        from langchain_core.messages import get_buffer_string
+        chat_history = get_buffer_string(history)
+        rewrite, _ = self.condensation_policy.decide(question, history)
+        if not rewrite:
+            return question, chat_history
+        
+        return self.conversational_chain.question_generator.invoke({
+            "question": question,
+            "chat_history": chat_history
+        })["text"], chat_history
+    
+    async def _acondense_question(self, question: str, history: List):
+        """Async _condense_question"""
+        from langchain_core.messages import get_buffer_string
+        chat_history = get_buffer_string(history)
+        rewrite, _ = await asyncio.to_thread(self.condensation_policy.decide, question, history)
+        if not rewrite:
+            return question, chat_history
+        
+        condensed = await self.conversational_chain.question_generator.ainvoke({
+            "question": question,
+            "chat_history": chat_history
+        })
+        return condensed["text"], chat_history
+    
+    def ask_question_stream(self, question: str, use_conversation: bool = False,
+                            session_id: str = "default") -> Iterator[Dict[str, Any]]:
+        """
+        Stream an answer as it is generated.
+        
+        Yields a {"type": "sources", "source_documents": [...]} event as soon
+        as retrieval finishes, then {"type": "token", "content": "..."}
+        events for each chunk of the answer.
+        """
+        try:
+            self._ensure_chains()
+            turn = self._start_turn(question, use_conversation, session_id)
+            if turn["cached"] is not None:
+                yield {"type": "sources", "source_documents": turn["cached"]["source_documents"], "cached": True}
+                yield {"type": "token", "content": turn["cached"]["answer"]}
+                return
+            
+            search_question, chat_history = question, None
+            if use_conversation:
+                search_question, chat_history = self._condense_question(question, turn["session"].history())
+            
+            source_documents = self.retriever.invoke(search_question)
+            yield {"type": "sources", "source_documents": source_documents}
+            
+            chain, inputs = self._answer_chain(question, source_documents, chat_history)
+            parts = []
+            for chunk in chain.stream(inputs):
+                if chunk.content:
+                    parts.append(chunk.content)
+                    yield {"type": "token", "content": chunk.content}
+            
+            self._finish_turn(turn, question, "".join(parts), source_documents)
+        
+        except Exception as e:
+            yield {"type": "token", "content": f"Sorry, I encountered an error: {str(e)}"}
+    
+    async def aask_question(self, question: str, use_conversation: bool = False,
+                            session_id: str = "default") -> Dict[str, Any]:
+        """
+        Async ask_question: the LLM calls are awaited natively, while
+        chain setup, embedding, retrieval, cache I/O and history
+        summarization run in worker threads so the event loop stays free
+        for other requests.
+        """
+        try:
+            await asyncio.to_thread(self._ensure_chains)
+            turn = await asyncio.to_thread(self._start_turn, question, use_conversation, session_id)
+            if turn["cached"] is not None:
+                return self._cached_response(turn["cached"])
+            
+            search_question, chat_history = question, None
+            if use_conversation:
+                search_question, chat_history = await self._acondense_question(question, turn["session"].history())
+            
+            source_documents = await asyncio.to_thread(self.retriever.invoke, search_question)
+            chain, inputs = self._answer_chain(question, source_documents, chat_history)
+            result = await chain.ainvoke(inputs)
+            return await asyncio.to_thread(self._finish_turn, turn, question, result.content, source_documents)
+        
+        except Exception as e:
+            return self._error_response(e)
     
     def get_code_explanation(self, code: str, language: str = "python") -> str:
         """Get explanation for a piece of code"""
@@ -106,6 +385,9 @@ class CodeLearningRAGChain:
         result = self.ask_question(question)
         return result["answer"]
     
-    def clear_memory(self):
-        """Clear conversation memory"""
-        self.memory.clear()
\ No newline at end of file
+    def clear_memory(self, session_id: Optional[str] = None):
+        """Clear one session's conversation memory, or every session's"""
+        if session_id is None:
+            self.sessions.clear()
+        else:
+            self.sessions.drop(session_id)
\ No newline at end of file
@@ -0,0 +1,128 @@
+"""
+Per-session, size-bounded conversation memory
+"""
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Dict, List, Optional
+
+from langchain_core.messages import AIMessage, BaseMessage, HumanMessage, SystemMessage
+
+from rag_system.context_packer import estimate_tokens
+
+# summarizer(previous_summary, dropped_messages) -> new summary
+Summarizer = Callable[[str, List[BaseMessage]], str]
+
+
+class SessionMemory:
+    """
+    Chat history of one session, kept within a token window.
+
+    When the recent turns exceed ``max_tokens`` the oldest turns leave the
+    window; with a summarizer they are folded into a rolling summary that
+    is replayed ahead of the window, otherwise they are dropped.
+    """
+
+    def __init__(self, max_tokens: int = 1000, summarizer: Optional[Summarizer] = None,
+                 max_summary_tokens: int = 300):
+        self.max_tokens = max_tokens
+        self.summarizer = summarizer
+        self.max_summary_tokens = max_summary_tokens
+        self.messages: List[BaseMessage] = []
+        self.summary = ""
+        self.last_active = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _tokens(self) -> int:
+        return sum(estimate_tokens(message.content) for message in self.messages)
+
+    def add_turn(self, question: str, answer: str):
+        with self._lock:
+            self.messages.extend([HumanMessage(content=question), AIMessage(content=answer)])
+            self.last_active = time.monotonic()
+
+            dropped = []
+            # Always keep the latest turn, even if it alone is over budget
+            while len(self.messages) > 2 and self._tokens() > self.max_tokens:
+                dropped.extend(self.messages[:2])
+                del self.messages[:2]
+
+            if dropped and self.summarizer is not None:
+                try:
+                    summary = self.summarizer(self.summary, dropped)
+                    self.summary = summary[:self.max_summary_tokens * 4]
+                except Exception as e:
+                    print(f"Error summarizing conversation: {e}")
+
+    def history(self) -> List[BaseMessage]:
+        """Summary (if any) followed by the turns in the window"""
+        with self._lock:
+            self.last_active = time.monotonic()
+            if not self.summary:
+                return list(self.messages)
+            return [SystemMessage(content=f"Summary of the earlier conversation: {self.summary}")] + self.messages
+
+    def clear(self):
+        with self._lock:
+            self.messages = []
+            self.summary = ""
+
+
+class SessionMemoryStore:
+    """
+    Live sessions keyed by session ID.
+
+    Sessions idle for more than ``idle_ttl_seconds`` are evicted, and the
+    least recently used sessions go first once ``max_sessions`` are live.
+    """
+
+    def __init__(self, max_sessions: int = 1000, idle_ttl_seconds: Optional[float] = 3600,
+                 max_tokens: int = 1000, summarizer: Optional[Summarizer] = None):
+        self.max_sessions = max_sessions
+        self.idle_ttl_seconds = idle_ttl_seconds
+        self.max_tokens = max_tokens
+        self.summarizer = summarizer
+        self._sessions: "OrderedDict[str, SessionMemory]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.evicted = 0
+
+    def _evict(self):
+        if self.idle_ttl_seconds is not None:
+            cutoff = time.monotonic() - self.idle_ttl_seconds
+            # Least recently used first, so stop at the first session still active
+            while self._sessions:
+                session_id, session = next(iter(self._sessions.items()))
+                if session.last_active >= cutoff:
+                    break
+                del self._sessions[session_id]
+                self.evicted += 1
+
+        while len(self._sessions) > self.max_sessions:
+            self._sessions.popitem(last=False)
+            self.evicted += 1
+
+    def get(self, session_id: str) -> SessionMemory:
+        """Memory of a session, created on first use"""
+        with self._lock:
+            session = self._sessions.get(session_id)
+            if session is None:
+                session = SessionMemory(self.max_tokens, self.summarizer)
+                self._sessions[session_id] = session
+            session.last_active = time.monotonic()
+            self._sessions.move_to_end(session_id)
+            self._evict()
+            return session
+
+    def drop(self, session_id: str):
+        with self._lock:
+            self._sessions.pop(session_id, None)
+
+    def clear(self):
+        with self._lock:
+            self._sessions.clear()
+
+    def __len__(self) -> int:
+        return len(self._sessions)
+
+    def stats(self) -> Dict[str, int]:
+        return {"live_sessions": len(self._sessions), "evicted": self.evicted}
@@ -1,80 +1,428 @@
 """
 Vector store management for RAG system
 """
-import chromadb
-from typing import List, Optional
-from langchain_community.vectorstores import Chroma
-from langchain_community.embeddings import HuggingFaceEmbeddings
+import json
+import os
+import re
+import uuid
+from contextlib import contextmanager
+from typing import List, Optional, Tuple
+import numpy as np
 from langchain.schema import Document
+from rag_system.embedding_cache import CachedEmbeddings, EmbeddingCache
+from rag_system.embedding_engine import EmbeddingEngine
+from rag_system.metadata_index import to_chroma_where
+from rag_system.query_cache import QueryCache
+from startup_timing import startup_timer
 
 class CodeLearningVectorStore:
-    def __init__(self, persist_directory: str = "./chroma_db"):
+    # "chroma" uses ChromaDB; "numpy" uses the in-process exact flat index and
+    # "ivf" adds an approximate IVF index on top of it for large corpora
+    BACKENDS = ("chroma", "numpy", "ivf")
+    
+    def __init__(self, persist_directory: str = "./chroma_db",
+                 model_name: str = "sentence-transformers/all-MiniLM-L6-v2",
+                 use_embedding_cache: bool = True, embedding_batch_size: int = 64,
+                 embedding_workers: Optional[int] = None, backend: str = "chroma",
+                 index_dtype: str = "float32", ann_params: Optional[dict] = None,
+                 quantization: Optional[str] = None, quantization_params: Optional[dict] = None,
+                 rerank_factor: int = 4, use_lexical_index: bool = True,
+                 use_query_cache: bool = True, query_cache_size: int = 1024,
+                 query_cache_ttl: Optional[float] = 3600):
+        if backend not in self.BACKENDS:
+            raise ValueError(f"Unknown vector store backend: {backend}")
+        
         self.persist_directory = persist_directory
-        self.embeddings = HuggingFaceEmbeddings(
-            model_name="sentence-transformers/all-MiniLM-L6-v2"
+        self.model_name = model_name
+        self.backend = backend
+        self.index_dtype = index_dtype
+        self.ann_params = ann_params
+        
+        # Optional "int8"/"pq" compressed search for the numpy and ivf backends
+        self.quantization = quantization
+        self.quantization_params = quantization_params
+        self.rerank_factor = rerank_factor
+        
+        # The embedding model itself is only loaded on the first embedding call
+        self.embedding_engine = EmbeddingEngine(
+            model_name=model_name,
+            batch_size=embedding_batch_size,
+            num_workers=embedding_workers
         )
-        self.vector_store = None
-        self._initialize_store()
+        self.embeddings = self.embedding_engine
+        
+        # Reuse vectors of previously embedded chunks across re-ingestion and rebuilds
+        if use_embedding_cache:
+            self.embeddings = CachedEmbeddings(
+                self.embeddings,
+                EmbeddingCache(os.path.join(persist_directory, "embedding_cache"), model_name)
+            )
+        
+        # The backend store is opened lazily on first access
+        self._vector_store = None
+        self._store_loaded = False
+        
+        # BM25 index over the same chunks, for hybrid retrieval
+        self.use_lexical_index = use_lexical_index
+        self._lexical_index = None
+        
+        # Inside bulk_update() indexes are written to disk once, at the end
+        self._bulk_depth = 0
+        
+        # Repeated questions skip embedding and search; results are tied to the index version
+        self.query_cache = QueryCache(
+            max_embeddings=2 * query_cache_size,
+            max_results=query_cache_size,
+            ttl_seconds=query_cache_ttl
+        ) if use_query_cache else None
+        self._index_version_path = os.path.join(persist_directory, "index_version.json")
+        self._index_version = 0
+        self._index_version_mtime = None
+    
+    @property
+    def vector_store(self):
+        """Underlying LangChain vector store, opened on first use"""
+        if not self._store_loaded:
+            self._store_loaded = True
+            self._initialize_store()
+        return self._vector_store
+    
+    @vector_store.setter
+    def vector_store(self, store):
+        self._vector_store = store
+        self._store_loaded = True
+    
+    @property
+    def lexical_index(self):
+        """BM25 index, loaded on first use and rebuilt from the store if missing"""
+        if self._lexical_index is None:
+            from rag_system.lexical_index import BM25Index
+            self._lexical_index = BM25Index(os.path.join(self.persist_directory, "lexical_index.json"))
+            if not self._lexical_index.loaded:
+                ids, texts = self._all_texts()
+                if ids:
+                    self._lexical_index.add(ids, texts)
+                    self._lexical_index.save()
+        return self._lexical_index
+    
+    @property
+    def storage_key(self) -> str:
+        """Names the stored chunk set: backend storage plus the embedding model that produced it"""
+        storage = "chroma" if self.backend == "chroma" else f"flat-{self.index_dtype}"
+        return re.sub(r"[^A-Za-z0-9_.-]+", "_", f"{storage}-{self.model_name}")
+    
+    @property
+    def manifest_path(self) -> str:
+        """Ingestion manifest describing the chunks in this storage"""
+        return os.path.join(self.persist_directory, f"ingestion_manifest.{self.storage_key}.json")
+    
+    @property
+    def index_version(self) -> int:
+        """Counter bumped on every write, shared through a file with other processes"""
+        try:
+            mtime = os.stat(self._index_version_path).st_mtime_ns
+        except OSError:
+            return self._index_version
+        
+        if mtime != self._index_version_mtime:
+            try:
+                with open(self._index_version_path, "r", encoding="utf-8") as f:
+                    self._index_version = json.load(f)["version"]
+                self._index_version_mtime = mtime
+            except Exception as e:
+                print(f"Error reading index version: {e}")
+        return self._index_version
+    
+    def _bump_index_version(self):
+        try:
+            version = self.index_version + 1
+            os.makedirs(self.persist_directory, exist_ok=True)
+            tmp_path = self._index_version_path + ".tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump({"version": version}, f)
+            os.replace(tmp_path, self._index_version_path)
+            self._index_version = version
+        except Exception as e:
+            print(f"Error saving index version: {e}")
+    
+    def cache_stats(self) -> dict:
+        """Hit/miss counters of the query embedding and result caches"""
+        return self.query_cache.stats() if self.query_cache is not None else {}
+    
+    def _cached(self, kind: str, query: str, k: int, filter_dict: Optional[dict], search):
+        if self.query_cache is None:
+            return search()
+        
+        self.query_cache.sync(self.index_version)
+        return self.query_cache.search(QueryCache.result_key(kind, query, k, filter_dict), search)
+    
+    def embed_query(self, query: str) -> List[float]:
+        """Query embedding, through the query cache when enabled"""
+        if self.query_cache is None:
+            return self.embeddings.embed_query(query)
+        return self.query_cache.embedding(query, self.embeddings.embed_query)
+    
+    def _store_class(self):
+        """LangChain vector store class for the configured backend"""
+        if self.backend in ("numpy", "ivf"):
+            from rag_system.numpy_store import NumpyVectorStore
+            return NumpyVectorStore
+        
+        from langchain_community.vectorstores import Chroma
+        return Chroma
+    
+    def _numpy_store_kwargs(self) -> dict:
+        return {
+            "dtype": self.index_dtype,
+            "index_type": "ivf" if self.backend == "ivf" else "flat",
+            "ann_params": self.ann_params,
+            "quantization": self.quantization,
+            "quantization_params": self.quantization_params,
+            "rerank_factor": self.rerank_factor
+        }
     
     def _initialize_store(self):
         """Initialize or load existing vector store"""
         try:
-            self.vector_store = Chroma(
-                persist_directory=self.persist_directory,
-                embedding_function=self.embeddings
-            )
+            with startup_timer.measure(f"vector store ({self.backend})"):
+                store_class = self._store_class()
+                if self.backend == "chroma":
+                    self._vector_store = store_class(
+                        persist_directory=self.persist_directory,
+                        embedding_function=self.embeddings
+                    )
+                else:
+                    self._vector_store = store_class(
+                        self.embeddings, self.persist_directory, **self._numpy_store_kwargs()
+                    )
         except Exception as e:
             print(f"Error initializing vector store: {e}")
     
-    def add_documents(self, documents: List[Document]) -> bool:
-        """Add documents to vector store"""
+    @contextmanager
+    def bulk_update(self):
+        """Defer saving the indexes to the end of a run of adds and deletes, such as one ingestion"""
+        self._bulk_depth += 1
+        self._persist_indexes()
+        try:
+            yield self
+        finally:
+            self._bulk_depth -= 1
+            self._persist_indexes()
+    
+    def _persist_indexes(self):
+        """Write the in-memory indexes to disk, unless a bulk update is still running"""
+        # The numpy backends hold IVF lists and quantized codes that are saved the same way
+        store = self._vector_store if self.backend != "chroma" else None
+        if store is not None:
+            store.defer_saves = bool(self._bulk_depth)
+        if self._bulk_depth:
+            return
+        
+        if store is not None:
+            store.flush()
+        if self.use_lexical_index and self._lexical_index is not None:
+            self._lexical_index.save()
+    
+    def add_documents(self, documents: List[Document], ids: Optional[List[str]] = None) -> bool:
+        """Add documents to vector store, optionally with explicit chunk IDs"""
         try:
             if not documents:
                 return False
             
+            # Explicit IDs keep the dense and lexical indexes addressable together
+            ids = list(ids) if ids else [str(uuid.uuid4()) for _ in documents]
+            
             if self.vector_store is None:
-                self.vector_store = Chroma.from_documents(
+                self.vector_store = self._store_class().from_documents(
                     documents=documents,
                     embedding=self.embeddings,
-                    persist_directory=self.persist_directory
+                    ids=ids,
+                    persist_directory=self.persist_directory,
+                    **(self._numpy_store_kwargs() if self.backend != "chroma" else {})
                 )
             else:
-                self.vector_store.add_documents(documents)
+                self.vector_store.add_documents(documents, ids=ids)
             
+            if self.use_lexical_index:
+                self.lexical_index.add(ids, [doc.page_content for doc in documents])
+            self._persist_indexes()
+            
+            self._bump_index_version()
             return True
         
         except Exception as e:
             print(f"Error adding documents: {e}")
             return False
     
+    def delete_documents(self, ids: List[str]) -> bool:
+        """Delete chunks by ID"""
+        try:
+            if not ids:
+                return True
+            
+            if self.vector_store is not None:
+                self.vector_store.delete(ids=ids)
+            
+            if self.use_lexical_index:
+                self.lexical_index.delete(ids)
+            self._persist_indexes()
+            
+            self._bump_index_version()
+            return True
+        
+        except Exception as e:
+            print(f"Error deleting documents: {e}")
+            return False
+    
     def similarity_search(self, query: str, k: int = 5, filter_dict: Optional[dict] = None) -> List[Document]:
         """Search for similar documents"""
         try:
             if self.vector_store is None:
                 return []
             
-            if filter_dict:
-                results = self.vector_store.similarity_search(
-                    query, k=k, filter=filter_dict
+            return self._cached("dense", query, k, filter_dict,
+                                lambda: self._dense_search(query, k, filter_dict))
+        
+        except Exception as e:
+            print(f"Error in similarity search: {e}")
+            return []
+    
+    def _dense_search(self, query: str, k: int, filter_dict: Optional[dict]) -> List[Document]:
+        if filter_dict and self.backend == "chroma":
+            filter_dict = to_chroma_where(filter_dict)
+        return self.vector_store.similarity_search_by_vector(
+            self.embed_query(query), k=k, filter=filter_dict or None
+        )
+    
+    def _embed_queries(self, queries: List[str]) -> np.ndarray:
+        """
+        Embed queries in one batched in-process call, bypassing the document
+        embedding cache and the ingestion worker pool
+        """
+        embeddings = self.embeddings.base if isinstance(self.embeddings, CachedEmbeddings) else self.embeddings
+        if isinstance(embeddings, EmbeddingEngine):
+            return embeddings.embed_queries(queries)
+        return np.asarray([embeddings.embed_query(query) for query in queries], dtype=np.float32)
+    
+    def similarity_search_batch(self, queries: List[str], k: int = 5,
+                                filter_dict: Optional[dict] = None) -> List[List[Document]]:
+        """
+        Search for many queries at once.
+        
+        All queries are embedded in a single batched model call and scored
+        together, which is much cheaper per query than calling
+        similarity_search in a loop.
+        """
+        try:
+            if not queries or self.vector_store is None:
+                return [[] for _ in queries]
+            
+            vectors = self._embed_queries(queries)
+            
+            if self.backend != "chroma":
+                results = self.vector_store.similarity_search_batch_with_score_by_vector(
+                    vectors, k=k, filter=filter_dict
                 )
-            else:
-                results = self.vector_store.similarity_search(query, k=k)
+                return [[doc for doc, _ in hits] for hits in results]
             
-            return results
+            result = self.vector_store._collection.query(
+                query_embeddings=vectors.tolist(),
+                n_results=k,
+                where=to_chroma_where(filter_dict) or None,
+                include=["documents", "metadatas"]
+            )
+            return [
+                [Document(page_content=text, metadata=metadata or {})
+                 for text, metadata in zip(texts, metadatas)]
+                for texts, metadatas in zip(result["documents"], result["metadatas"])
+            ]
         
         except Exception as e:
-            print(f"Error in similarity search: {e}")
+            print(f"Error in batch similarity search: {e}")
+            return [[] for _ in queries]
+    
+    def get_documents(self, ids: List[str]) -> List[Document]:
+        """Fetch stored chunks by ID, in the order given"""
+        if not ids or self.vector_store is None:
+            return []
+        
+        if self.backend != "chroma":
+            return self.vector_store.get_by_ids(ids)
+        
+        result = self.vector_store.get(ids=ids, include=["documents", "metadatas"])
+        by_id = {
+            doc_id: Document(page_content=text, metadata=metadata or {})
+            for doc_id, text, metadata in zip(result["ids"], result["documents"], result["metadatas"])
+        }
+        return [by_id[doc_id] for doc_id in ids if doc_id in by_id]
+    
+    def _all_texts(self) -> Tuple[List[str], List[str]]:
+        """IDs and texts of every stored chunk"""
+        if self.vector_store is None:
+            return [], []
+        
+        if self.backend != "chroma":
+            index = self.vector_store.index
+            ids = [doc_id for doc_id in index.ids if doc_id is not None]
+            return ids, [doc.page_content for doc in index.get(ids)]
+        
+        result = self.vector_store.get(include=["documents"])
+        return result["ids"], result["documents"]
+    
+    def _filter_ids(self, filter_dict: dict) -> set:
+        """IDs of the stored chunks matching a metadata filter"""
+        if self.vector_store is None:
+            return set()
+        
+        if self.backend != "chroma":
+            return self.vector_store.filter_ids(filter_dict)
+        
+        return set(self.vector_store.get(where=to_chroma_where(filter_dict), include=[])["ids"])
+    
+    def lexical_search(self, query: str, k: int = 5, filter_dict: Optional[dict] = None) -> List[Document]:
+        """BM25 keyword search over the stored chunks"""
+        try:
+            if not self.use_lexical_index:
+                return []
+            
+            return self._cached("lexical", query, k, filter_dict,
+                                lambda: self._lexical_search(query, k, filter_dict))
+        
+        except Exception as e:
+            print(f"Error in lexical search: {e}")
             return []
     
-    def get_retriever(self, search_kwargs: Optional[dict] = None):
-        """Get retriever for use in chains"""
+    def _lexical_search(self, query: str, k: int, filter_dict: Optional[dict]) -> List[Document]:
+        # The filter restricts which postings are scored, not the results afterwards
+        allowed_ids = self._filter_ids(filter_dict) if filter_dict else None
+        hits = self.lexical_index.search(query, k, allowed_ids=allowed_ids)
+        return self.get_documents([doc_id for doc_id, _ in hits])
+    
+    def get_retriever(self, search_kwargs: Optional[dict] = None, mode: str = "dense"):
+        """
+        Get retriever for use in chains.
+        
+        Both modes search through this store, so queries go through the
+        query cache. mode="hybrid" fuses dense and BM25 results with
+        reciprocal rank fusion.
+        """
         if self.vector_store is None:
             return None
         
         if search_kwargs is None:
             search_kwargs = {"k": 5}
         
-        return self.vector_store.as_retriever(search_kwargs=search_kwargs)
+        from rag_system.hybrid_retriever import DenseRetriever, HybridRetriever
+        k = search_kwargs.get("k", 5)
+        if mode == "hybrid":
+            return HybridRetriever(
+                store=self,
+                k=k,
+                fetch_k=search_kwargs.get("fetch_k", max(20, 4 * k)),
+                filter=search_kwargs.get("filter")
+            )
+        
+        return DenseRetriever(store=self, k=k, filter=search_kwargs.get("filter"))
     
     def delete_collection(self):
         """Delete the entire collection"""
@@ -82,6 +430,12 @@ class CodeLearningVectorStore:
             if self.vector_store:
                 self.vector_store.delete_collection()
                 self.vector_store = None
+            if self.use_lexical_index:
+                self.lexical_index.clear()
+            # The manifest would otherwise report the deleted chunks as still stored
+            if os.path.exists(self.manifest_path):
+                os.remove(self.manifest_path)
+            self._bump_index_version()
             return True
         except Exception as e:
             print(f"Error deleting collection: {e}")
@@ -0,0 +1,39 @@
+"""
+Cold-start timing for lazily loaded components
+"""
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict
+
+
+class StartupTimer:
+    """Records how long each component took to import or load"""
+
+    def __init__(self):
+        self.process_start = time.perf_counter()
+        self.timings: Dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def measure(self, component: str):
+        """Time a block and add it to the component's total"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            with self._lock:
+                self.timings[component] = self.timings.get(component, 0.0) + elapsed
+
+    def report(self) -> str:
+        """Human-readable breakdown, slowest component first"""
+        lines = ["Startup timings:"]
+        for component, seconds in sorted(self.timings.items(), key=lambda item: -item[1]):
+            lines.append(f"  {component:<32} {seconds * 1000:8.1f} ms")
+        lines.append(f"  {'total elapsed':<32} {(time.perf_counter() - self.process_start) * 1000:8.1f} ms")
+        return "\n".join(lines)
+
+
+# Process-wide timer shared by all components
+startup_timer = StartupTimer()
@@ -3,8 +3,12 @@ Simplified Streamlit web interface for AI Code Learning Assistant
 """
 import streamlit as st
 import os
+import sys
 from dotenv import load_dotenv
 
+# Application packages live under src/
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "src"))
+
 # Load environment variables
 load_dotenv()
 
@@ -41,22 +45,36 @@ st.title("🤖 AI Code Learning Assistant")
 st.markdown("*Your intelligent companion for mastering programming concepts*")
 
 # Check API key
-if not os.getenv("GOOGLE_API_KEY"):
+from llm_gateway.chat_model import llm_provider
+
+try:
+    provider = llm_provider()
+except ValueError as e:
+    st.error(f"❌ {e}")
+    st.stop()
+
+if provider != "fake" and not os.getenv("GOOGLE_API_KEY"):
     st.error("❌ Google Gemini API key not found!")
     st.info("Please add your GOOGLE_API_KEY to the app secrets.")
     st.info("Get your free API key from: https://makersuite.google.com/app/apikey")
     st.stop()
 
+@st.cache_resource
+def get_llm():
+    """One gateway-backed client per server process, shared across reruns and sessions"""
+    from llm_gateway.chat_model import get_chat_model
+    return get_chat_model("gemini-2.0-flash-exp", temperature=0.1)
+
 # Try to import and initialize the assistant
 try:
-    from langchain_google_genai import ChatGoogleGenerativeAI
-    
     # Initialize the LLM
-    llm = ChatGoogleGenerativeAI(
-        model="gemini-2.0-flash-exp",
-        temperature=0.1,
-        google_api_key=os.getenv("GOOGLE_API_KEY")
-    )
+    llm = get_llm()
+    
+    def stream_text(prompt):
+        """Yield response text as Gemini generates it"""
+        for chunk in llm.stream(prompt):
+            if chunk.content:
+                yield chunk.content
     
     st.success("✅ AI Assistant initialized successfully!")
     
@@ -77,22 +95,19 @@ try:
         )
         
         if st.button("Ask Question", type="primary") and question:
-            with st.spinner("Thinking..."):
-                try:
-                    response = llm.invoke(f"""You are an expert programming tutor. 
-                    Answer this question clearly and educationally: {question}
-                    
-                    Provide:
-                    - Clear explanation
-                    - Code examples if helpful
-                    - Best practices
-                    - Learning tips""")
-                    
-                    st.markdown("### Answer:")
-                    st.markdown(response.content)
-                    
-                except Exception as e:
-                    st.error(f"Error: {str(e)}")
+            try:
+                st.markdown("### Answer:")
+                st.write_stream(stream_text(f"""You are an expert programming tutor. 
+                Answer this question clearly and educationally: {question}
+                
+                Provide:
+                - Clear explanation
+                - Code examples if helpful
+                - Best practices
+                - Learning tips"""))
+                
+            except Exception as e:
+                st.error(f"Error: {str(e)}")
     
     elif feature == "🔍 Code Review":
         st.header("Code Review")
@@ -107,31 +122,28 @@ try:
         )
         
         if st.button("Review Code", type="primary") and code_input:
-            with st.spinner("Analyzing your code..."):
-                try:
-                    prompt = f"""You are an expert code reviewer and programming tutor. 
-                    Analyze this {language} code and provide educational feedback:
-                    
-                    ```{language}
-                    {code_input}
-                    ```
-                    
-                    Please provide:
-                    1. Code Quality Assessment (1-10 score)
-                    2. Issues Found (bugs, style problems, improvements)
-                    3. Educational Explanations (why each issue matters)
-                    4. Suggested Improvements (with examples)
-                    5. Learning Opportunities (concepts to study)
-                    
-                    Be educational and encouraging."""
-                    
-                    response = llm.invoke(prompt)
-                    
-                    st.markdown("### Code Review:")
-                    st.markdown(response.content)
-                    
-                except Exception as e:
-                    st.error(f"Error: {str(e)}")
+            try:
+                prompt = f"""You are an expert code reviewer and programming tutor. 
+                Analyze this {language} code and provide educational feedback:
+                
+                ```{language}
+                {code_input}
+                ```
+                
+                Please provide:
+                1. Code Quality Assessment (1-10 score)
+                2. Issues Found (bugs, style problems, improvements)
+                3. Educational Explanations (why each issue matters)
+                4. Suggested Improvements (with examples)
+                5. Learning Opportunities (concepts to study)
+                
+                Be educational and encouraging."""
+                
+                st.markdown("### Code Review:")
+                st.write_stream(stream_text(prompt))
+                
+            except Exception as e:
+                st.error(f"Error: {str(e)}")
     
     elif feature == "💡 Get Help":
         st.header("Programming Help")
@@ -158,28 +170,25 @@ try:
         )
         
         if st.button("Get Help", type="primary") and specific_question:
-            with st.spinner("Preparing help..."):
-                try:
-                    prompt = f"""You are a patient programming tutor helping with {help_topic}.
-                    
-                    Student's question: {specific_question}
-                    
-                    Provide:
-                    - Clear, step-by-step explanation
-                    - Simple examples
-                    - Common mistakes to avoid
-                    - Practice suggestions
-                    - Additional resources if helpful
-                    
-                    Keep it educational and encouraging."""
-                    
-                    response = llm.invoke(prompt)
-                    
-                    st.markdown("### Help & Guidance:")
-                    st.markdown(response.content)
-                    
-                except Exception as e:
-                    st.error(f"Error: {str(e)}")
+            try:
+                prompt = f"""You are a patient programming tutor helping with {help_topic}.
+                
+                Student's question: {specific_question}
+                
+                Provide:
+                - Clear, step-by-step explanation
+                - Simple examples
+                - Common mistakes to avoid
+                - Practice suggestions
+                - Additional resources if helpful
+                
+                Keep it educational and encouraging."""
+                
+                st.markdown("### Help & Guidance:")
+                st.write_stream(stream_text(prompt))
+                
+            except Exception as e:
+                st.error(f"Error: {str(e)}")
 
 except ImportError as e:
     st.error(f"❌ Failed to import required libraries: {str(e)}")
@@ -0,0 +1,51 @@
+import hashlib
+import os
+import sys
+from typing import List
+
+import numpy as np
+import pytest
+from langchain_core.embeddings import Embeddings
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src"))
+
+from llm_gateway.chat_model import GatewayChatModel  # noqa: E402
+from llm_gateway.fake_provider import FakeChatModel  # noqa: E402
+from llm_gateway.gateway import LLMGateway  # noqa: E402
+
+
+class HashEmbeddings(Embeddings):
+    """Deterministic random unit vectors derived from the text"""
+
+    def __init__(self, dim: int = 16):
+        self.dim = dim
+        self.calls = 0
+
+    def _vector(self, text: str) -> List[float]:
+        seed = int.from_bytes(hashlib.sha256(text.encode("utf-8")).digest()[:8], "little")
+        vector = np.random.default_rng(seed).standard_normal(self.dim)
+        return (vector / np.linalg.norm(vector)).tolist()
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        self.calls += 1
+        return [self._vector(text) for text in texts]
+
+    def embed_query(self, text: str) -> List[float]:
+        return self._vector(text)
+
+
+@pytest.fixture
+def embeddings():
+    return HashEmbeddings()
+
+
+def make_fake_llm(error_rate: float = 0.0) -> GatewayChatModel:
+    """Instant, seeded offline chat model behind a gateway that never retries"""
+    inner = FakeChatModel(latency_ms=0, latency_distribution="fixed", tokens_per_second=1e6,
+                          min_tokens=5, max_tokens=10, error_rate=error_rate, seed=0)
+    return GatewayChatModel(inner=inner, gateway=LLMGateway(requests_per_minute=1e6, max_retries=0))
+
+
+@pytest.fixture
+def fake_llm():
+    return make_fake_llm
@@ -0,0 +1,49 @@
+import numpy as np
+from langchain.schema import Document
+
+from rag_system.answer_cache import SemanticAnswerCache
+
+
+def make_cache(tmp_path, embedding_model: str = "embed-a", max_entries: int = 10):
+    return SemanticAnswerCache(str(tmp_path), "llm", embedding_model, max_entries=max_entries)
+
+
+def put(cache, question: str, seed: int, answer: str = "answer"):
+    vector = np.random.default_rng(seed).standard_normal(8)
+    cache.put(question, vector, answer, [Document(page_content="doc", metadata={"n": seed})], index_version=1)
+    return vector
+
+
+def test_entries_are_appended_and_reloaded(tmp_path):
+    cache = make_cache(tmp_path)
+    put(cache, "What is a list?", 0)
+    size = len(open(cache.log_path, "rb").read())
+    vector = put(cache, "What is a dict?", 1)
+    put(cache, "What is a list?", 0, answer="updated")
+
+    with open(cache.log_path, "rb") as f:
+        lines = f.read().splitlines(keepends=True)
+    assert len(lines) == 3 and len(lines[0]) == size
+    with open(cache.log_path, "ab") as f:
+        f.write(b'{"question": "torn')
+
+    reloaded = make_cache(tmp_path)
+    assert reloaded.stats()["size"] == 2
+    assert reloaded.lookup("What is a list?", vector, 1)["answer"] == "updated"
+    assert reloaded.lookup("dict?", vector, 1)["cached_question"] == "What is a dict?"
+
+
+def test_log_is_compacted_and_reset(tmp_path):
+    cache = make_cache(tmp_path, max_entries=2)
+    for i in range(5):
+        put(cache, f"question {i}", i)
+    assert cache.stats()["size"] == 2
+    assert len(open(cache.log_path).readlines()) <= 4
+
+    assert cache.lookup("question 4", np.zeros(8), index_version=2) is None
+    assert make_cache(tmp_path, max_entries=2).stats()["size"] == 0
+
+
+def test_files_are_keyed_by_embedding_model(tmp_path):
+    put(make_cache(tmp_path), "What is a list?", 0)
+    assert make_cache(tmp_path, embedding_model="embed-b").stats()["size"] == 0
@@ -0,0 +1,113 @@
+from rag_system.code_chunker import MODULE_NAME, CodeChunker
+
+PYTHON = '''import os
+
+
+# Loads settings
+@cached
+@logged
+def load(path):
+    return open(path).read()
+
+
+class Store:
+    """Key-value store"""
+
+    # Reads one key
+    def get(self, key):
+        return self.data[key]
+
+    @property
+    def size(self):
+        return len(self.data)
+'''
+
+
+def spans(chunks):
+    return [(chunk["qualified_name"], chunk["kind"], chunk["start_line"], chunk["end_line"]) for chunk in chunks]
+
+
+def test_small_python_file_keeps_classes_whole_with_decorators_and_comments():
+    chunks = CodeChunker().chunk(PYTHON, "py")
+    assert spans(chunks) == [
+        (MODULE_NAME, "module", 1, 3),
+        ("load", "function", 4, 8),
+        ("Store", "class", 11, 20),
+    ]
+    assert chunks[1]["content"].startswith("# Loads settings\n@cached\n@logged\ndef load")
+    lines = PYTHON.splitlines(keepends=True)
+    for chunk in chunks:
+        assert chunk["content"] == "".join(lines[chunk["start_line"] - 1:chunk["end_line"]])
+
+
+def test_split_classes_yields_qualified_members():
+    chunks = CodeChunker(split_classes=True).chunk(PYTHON, "py")
+    # Blank glue between units is dropped
+    assert spans(chunks)[2:] == [
+        ("Store", "class", 11, 13),
+        ("Store.get", "function", 14, 16),
+        ("Store.size", "function", 18, 20),
+    ]
+    assert chunks[3]["content"].startswith("    # Reads one key\n    def get")
+    assert chunks[4]["content"].startswith("    @property\n")
+
+
+def test_oversized_class_is_split_into_members():
+    chunks = CodeChunker(max_chunk_chars=120).chunk(PYTHON, "py")
+    assert "Store.get" in [chunk["qualified_name"] for chunk in chunks]
+    assert "Store.size" in [chunk["qualified_name"] for chunk in chunks]
+
+
+def test_oversized_leaf_unit_is_cut_into_numbered_parts():
+    body = "".join(f"    total += {i}\n" for i in range(40))
+    code = f"def long():\n    total = 0\n{body}    return total\n"
+    chunks = CodeChunker(max_chunk_chars=200).chunk(code, "py")
+
+    assert len(chunks) > 1
+    assert [chunk["part"] for chunk in chunks] == list(range(1, len(chunks) + 1))
+    assert {chunk["qualified_name"] for chunk in chunks} == {"long"}
+    assert all(len(chunk["content"]) <= 200 for chunk in chunks)
+    assert chunks[0]["start_line"] == 1 and chunks[-1]["end_line"] == 43
+    assert all(a["end_line"] + 1 == b["start_line"] for a, b in zip(chunks, chunks[1:]))
+    assert "".join(chunk["content"] for chunk in chunks) == code
+
+
+def test_syntax_error_falls_back_to_indentation():
+    code = "def broken(:\n    pass\n\ndef fine():\n    return 1\n\nx = 1\n"
+    assert spans(CodeChunker().chunk(code, "py")) == [
+        ("broken", "function", 1, 3),
+        ("fine", "function", 4, 6),
+        (MODULE_NAME, "module", 7, 7),
+    ]
+
+
+def test_brace_language_units_ignore_braces_in_strings_and_comments():
+    code = (
+        "import java.util.List;\n"
+        "\n"
+        "public class Greeter {\n"
+        "    // Says hello\n"
+        "    public String greet(String name) {\n"
+        "        return \"{\" + name + \"}\"; /* } */\n"
+        "    }\n"
+        "\n"
+        "    void reset() {\n"
+        "    }\n"
+        "}\n"
+    )
+    assert spans(CodeChunker().chunk(code, "java")) == [
+        (MODULE_NAME, "module", 1, 2),
+        ("Greeter", "class", 3, 11),
+    ]
+    assert spans(CodeChunker(split_classes=True).chunk(code, "java")) == [
+        (MODULE_NAME, "module", 1, 2),
+        ("Greeter", "class", 3, 3),
+        ("Greeter.greet", "function", 4, 7),
+        ("Greeter.reset", "function", 9, 10),
+        ("Greeter", "class", 11, 11),
+    ]
+
+
+def test_javascript_functions_are_named():
+    code = "function add(a, b) {\n  return a + b;\n}\n\nconst mul = (a, b) => {\n  return a * b;\n};\n"
+    assert spans(CodeChunker().chunk(code, "js")) == [("add", "function", 1, 3), ("mul", "function", 5, 7)]
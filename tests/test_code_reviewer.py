@@ -0,0 +1,88 @@
+import pytest
+
+from code_reviewer.analyzer import CodeAnalyzer
+
+
+@pytest.fixture
+def make_analyzer(tmp_path, fake_llm):
+    def make(error_rate: float = 0.0, **kwargs) -> CodeAnalyzer:
+        analyzer = CodeAnalyzer(review_cache_dir=str(tmp_path / "review_cache"), **kwargs)
+        analyzer._llm = fake_llm(error_rate)
+        return analyzer
+    return make
+
+
+def large_code(functions: int = 12) -> str:
+    return "\n\n".join(f"def f{i}(x):\n    total = x + {i}\n    return total * 2\n" for i in range(functions))
+
+
+def test_failed_chunked_review_is_not_cached(make_analyzer, fake_llm):
+    code = large_code()
+    analyzer = make_analyzer(error_rate=1.0, chunked_review_chars=100, review_unit_chars=60)
+
+    first = analyzer.comprehensive_review(code)
+    assert first["review_failed"]
+    assert len(first["units"]) > 1
+    assert analyzer.review_cache.stats()["size"] == 0
+
+    analyzer._llm = fake_llm()
+    second = analyzer.comprehensive_review(code)
+    assert not second["cache_hit"]
+    assert not second["review_failed"]
+    assert analyzer.comprehensive_review(code)["cache_hit"]
+
+
+def test_failed_single_review_is_not_cached(make_analyzer):
+    analyzer = make_analyzer(error_rate=1.0)
+
+    result = analyzer.comprehensive_review("x = 1\n")
+    assert result["review_failed"]
+    assert analyzer.review_cache.stats()["size"] == 0
+
+
+SESSION_CODE = '''import os
+
+
+class Store:
+    def load(self, path):
+        if path == None:
+            return {}
+        return {"path": path}
+
+    def save(self, data):
+        try:
+            return len(data)
+        except:
+            return 0
+
+
+def main(value):
+    if value == None:
+        return Store().load(value)
+    return None
+'''
+
+
+def findings(result):
+    return sorted((finding["rule"], finding["line"]) for category in ("issues", "suggestions")
+                  for finding in result[category])
+
+
+def test_incremental_review_shifts_reused_findings(make_analyzer):
+    analyzer = make_analyzer()
+    first = analyzer.incremental_review(SESSION_CODE, session_id="s")
+    # The first submission is one whole-file review, cached like any other
+    assert first["ai_review"] and first["reviewed_units"] == 4
+    assert analyzer.review_cache.stats()["size"] == 1
+
+    edited = SESSION_CODE.replace('            return {}\n',
+                                  '            print("no path")\n            print("empty")\n            return {}\n')
+    second = analyzer.incremental_review(edited, session_id="s")
+    assert second["reviewed_units"] == 1 and second["reused_units"] == 3
+    assert findings(second) == findings(analyzer.comprehensive_review(edited))
+    assert first["ai_review"] in second["ai_review"]
+    assert "### Store.load (lines 4-10)" in second["ai_review"]
+
+    third = analyzer.incremental_review(edited, session_id="s")
+    assert third["reviewed_units"] == 0
+    assert findings(third) == findings(second)
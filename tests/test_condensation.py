@@ -0,0 +1,57 @@
+import pytest
+from langchain_core.messages import AIMessage, HumanMessage
+
+from rag_system.condensation import CondensationPolicy
+
+HISTORY = [HumanMessage(content="How do Python list comprehensions work?"),
+           AIMessage(content="They build a list from an iterable in one expression.")]
+
+
+def test_empty_history_never_rewrites():
+    assert CondensationPolicy(mode="always").decide("Can you show it again?", []) == (False, "skipped_no_history")
+
+
+def test_standalone_follow_up_skips_the_rewrite():
+    policy = CondensationPolicy()
+    question = "How does binary search work on a sorted array?"
+    assert policy.decide(question, HISTORY) == (False, "skipped_self_contained")
+
+
+@pytest.mark.parametrize("question", [
+    "Can you show an example of it with a dictionary instead?",
+    "What about generators?",
+    "why",
+    "Explain the second part",
+])
+def test_references_back_into_the_conversation_are_rewritten(question):
+    assert CondensationPolicy().decide(question, HISTORY) == (True, "rewritten")
+
+
+def test_short_question_on_a_new_topic_skips_with_embeddings(embeddings):
+    policy = CondensationPolicy(embed_fn=embeddings.embed_query, topic_change_threshold=0.99)
+    assert policy.decide("Recursion in Haskell", HISTORY) == (False, "skipped_new_topic")
+    assert CondensationPolicy().decide("Recursion in Haskell", HISTORY) == (True, "rewritten")
+
+
+def test_modes_override_the_heuristics():
+    question = "How does binary search work on a sorted array?"
+    assert CondensationPolicy(mode="always").decide(question, HISTORY) == (True, "rewritten")
+    assert CondensationPolicy(mode="never").decide("And it?", HISTORY) == (False, "skipped_disabled")
+    with pytest.raises(ValueError):
+        CondensationPolicy(mode="sometimes")
+
+
+def test_decisions_are_counted():
+    policy = CondensationPolicy()
+    policy.decide("What about it?", HISTORY)
+    policy.decide("How does binary search work on a sorted array?", HISTORY)
+    policy.decide("Another question", [])
+    policy.decide("How do hash maps resolve key collisions in practice?", HISTORY)
+
+    assert policy.stats() == {
+        "rewritten": 1,
+        "skipped_self_contained": 2,
+        "skipped_no_history": 1,
+        "total": 4,
+        "skip_rate": 0.75
+    }
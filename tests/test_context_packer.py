@@ -0,0 +1,66 @@
+from langchain.schema import Document
+
+from rag_system.context_packer import ContextPacker
+
+
+def chunk(text, source="guide.txt", **metadata):
+    return Document(page_content=text, metadata=dict(metadata, source=source))
+
+
+def test_overlapping_offset_chunks_merge_into_one_passage():
+    text = "alpha beta gamma delta epsilon zeta eta theta"
+    first, second = chunk(text[:22], start_index=0), chunk(text[16:], start_index=16)
+    other = chunk("unrelated notes", source="other.txt", start_index=0)
+
+    merged = ContextPacker().merge([other, second, first])
+    assert [doc.page_content for doc in merged] == ["unrelated notes", text]
+    assert merged[1].metadata["merged_chunks"] == 2
+
+
+def test_gapped_chunks_and_distant_code_stay_separate():
+    docs = [
+        chunk("first part", start_index=0),
+        chunk("far away", start_index=500),
+        chunk("def a(): pass", source="a.py", start_line=1, end_line=1),
+        chunk("def b(): pass", source="a.py", start_line=2, end_line=3),
+        chunk("def z(): pass", source="a.py", start_line=40, end_line=41),
+    ]
+    merged = ContextPacker().merge(docs)
+    assert [doc.page_content for doc in merged] == [
+        "first part", "far away", "def a(): pass\ndef b(): pass", "def z(): pass"
+    ]
+    assert merged[2].metadata["end_line"] == 3
+
+
+def test_chunk_index_neighbours_drop_their_shared_overlap():
+    docs = [chunk("one two three four", chunk_index=0), chunk("three four five six", chunk_index=1)]
+    assert [doc.page_content for doc in ContextPacker().merge(docs)] == ["one two three four five six"]
+
+
+def test_near_duplicates_of_better_ranked_passages_are_dropped():
+    original = "binary search halves the sorted range on every step until the target is found"
+    docs = [
+        chunk(original, source="a.txt"),
+        chunk(original.replace("found", "found.") + " again", source="b.txt"),
+        chunk("hash tables give constant time lookups on average", source="c.txt"),
+    ]
+    kept = ContextPacker().deduplicate(docs)
+    assert [doc.metadata["source"] for doc in kept] == ["a.txt", "c.txt"]
+    assert len(ContextPacker(duplicate_threshold=1.01).deduplicate(docs)) == 3
+
+
+def test_pack_stops_at_the_token_budget_in_relevance_order():
+    packer = ContextPacker(max_tokens=10, token_counter=lambda text: len(text.split()))
+    docs = [
+        chunk("a b c d e f", source="1"),
+        chunk("g h i j k l m", source="2"),
+        chunk("n o p q", source="3"),
+    ]
+    assert [doc.metadata["source"] for doc in packer.pack(docs)] == ["1", "3"]
+
+
+def test_pack_truncates_an_oversized_best_passage():
+    packer = ContextPacker(max_tokens=5)
+    packed = packer.pack([chunk("x" * 200)])
+    assert len(packed) == 1 and packed[0].metadata["truncated"]
+    assert packed[0].page_content == "x" * 20
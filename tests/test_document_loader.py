@@ -0,0 +1,62 @@
+import os
+
+import pytest
+
+from rag_system.document_loader import ProgrammingDocumentLoader
+
+
+def make_docs(tmp_path, count=12):
+    paths = []
+    for i in range(count):
+        path = tmp_path / f"doc{i:02d}.txt"
+        # Files of 1 to 3 chunks
+        path.write_text("\n\n".join(f"file {i} paragraph {j} " * 4 for j in range(i % 3 + 1)), encoding="utf-8")
+        paths.append(str(path))
+    return paths
+
+
+@pytest.mark.parametrize("max_workers", [1, 2])
+def test_batches_cover_every_file_once_in_order(tmp_path, max_workers):
+    paths = make_docs(tmp_path)
+    loader = ProgrammingDocumentLoader(chunk_size=100, chunk_overlap=0, max_workers=max_workers)
+
+    batches = list(loader.iter_document_batches(paths, batch_size=4))
+    # A batch is yielded once it reaches the size, so it overshoots by less than one file's chunks
+    assert all(4 <= len(batch) < 4 + 3 for batch in batches[:-1])
+    assert 0 < len(batches[-1]) < 4 + 3
+
+    docs = [doc for batch in batches for doc in batch]
+    sources = [doc.metadata["source"] for doc in docs]
+    assert list(dict.fromkeys(sources)) == paths
+    for path in paths:
+        indexes = [doc.metadata["chunk_index"] for doc in docs if doc.metadata["source"] == path]
+        assert indexes == list(range(len(indexes)))
+    assert all(doc.metadata["source_type"] == "programming_doc" for doc in docs)
+
+
+@pytest.mark.parametrize("max_workers", [1, 2])
+def test_failing_file_is_reported_and_skipped(tmp_path, max_workers):
+    paths = make_docs(tmp_path, count=5)
+    broken = tmp_path / "broken.txt"
+    broken.write_bytes(b"\xff\xfe not utf-8 \xff")
+    paths.insert(2, str(broken))
+    loader = ProgrammingDocumentLoader(chunk_size=100, chunk_overlap=0, max_workers=max_workers)
+
+    errors = []
+    docs = [doc for batch in loader.iter_document_batches(paths, batch_size=2,
+                                                          on_error=lambda path, e: errors.append(path))
+            for doc in batch]
+    assert errors == [str(broken)]
+    assert list(dict.fromkeys(doc.metadata["source"] for doc in docs)) == [p for p in paths if p != str(broken)]
+    assert loader.load_file(str(broken)) == []
+
+
+def test_code_examples_carry_structure_metadata(tmp_path):
+    path = tmp_path / "example.py"
+    path.write_text("def first():\n    return 1\n\n\ndef second():\n    return 2\n", encoding="utf-8")
+    loader = ProgrammingDocumentLoader(chunk_size=30, max_workers=1)
+
+    docs = loader.load_code_examples(str(tmp_path))
+    assert [doc.metadata["qualified_name"] for doc in docs] == ["first", "second"]
+    assert [doc.metadata["chunk_index"] for doc in docs] == [0, 1]
+    assert {doc.metadata["source"] for doc in docs} == {os.path.join(str(tmp_path), "example.py")}
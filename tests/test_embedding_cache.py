@@ -0,0 +1,44 @@
+import numpy as np
+
+from rag_system.embedding_cache import EmbeddingCache
+
+
+def vectors(n: int, start: int = 0, dim: int = 4):
+    return [[float(start + i)] * dim for i in range(n)]
+
+
+def test_orphan_rows_are_dropped_on_load(tmp_path):
+    cache = EmbeddingCache(str(tmp_path), "model")
+    cache.put_many(["a", "b", "c"], vectors(3))
+
+    # A batch whose vectors were written but whose keys never were
+    with open(cache.matrix_path, "ab") as f:
+        f.write(np.full((2, 4), 99.0, dtype=np.float32).tobytes())
+
+    reloaded = EmbeddingCache(str(tmp_path), "model")
+    reloaded.put_many(["d"], vectors(1, start=7))
+    assert reloaded.get_many(["a", "c", "d"]) == [[0.0] * 4, [2.0] * 4, [7.0] * 4]
+    assert EmbeddingCache(str(tmp_path), "model").get_many(["d"]) == [[7.0] * 4]
+
+
+def test_torn_key_line_is_dropped_on_load(tmp_path):
+    cache = EmbeddingCache(str(tmp_path), "model")
+    cache.put_many(["a", "b"], vectors(2))
+    with open(cache.keys_path, "a", encoding="utf-8") as f:
+        f.write("half-written")
+
+    reloaded = EmbeddingCache(str(tmp_path), "model")
+    assert len(reloaded) == 2
+    reloaded.put_many(["e"], vectors(1, start=5))
+    assert EmbeddingCache(str(tmp_path), "model").get_many(["a", "b", "e"]) == [[0.0] * 4, [1.0] * 4, [5.0] * 4]
+
+
+def test_other_model_files_are_not_reused(tmp_path):
+    cache = EmbeddingCache(str(tmp_path), "model")
+    cache.put_many(["a"], vectors(1))
+    with open(cache.meta_path, "w", encoding="utf-8") as f:
+        f.write('{"model_name": "other", "dim": 4}')
+
+    reloaded = EmbeddingCache(str(tmp_path), "model")
+    reloaded.put_many(["b"], vectors(1, start=3))
+    assert reloaded.get_many(["a", "b"]) == [None, [3.0] * 4]
@@ -0,0 +1,77 @@
+import os
+
+from langchain.schema import Document
+
+from rag_system.ingestion_manifest import IngestionManifest
+from rag_system.vector_store import CodeLearningVectorStore
+
+
+def write(path, text):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(text, encoding="utf-8")
+    return os.path.normpath(str(path))
+
+
+def test_plan_reports_new_changed_and_removed_files(tmp_path):
+    docs = tmp_path / "docs"
+    kept = write(docs / "kept.txt", "unchanged")
+    edited = write(docs / "edited.txt", "before")
+    deleted = write(docs / "deleted.txt", "gone soon")
+
+    manifest = IngestionManifest(str(tmp_path / "manifest.json"))
+    changed, removed = manifest.plan([kept, edited, deleted], root=str(docs))
+    assert [path for path, _ in changed] == [kept, edited, deleted] and removed == []
+    for path, content_hash in changed:
+        manifest.record(path, content_hash, [manifest.chunk_id(path, content_hash, 0)])
+    assert manifest.save()
+    deleted_hash = IngestionManifest.hash_file(deleted)
+
+    write(docs / "edited.txt", "after, and longer")
+    added = write(docs / "added.txt", "new")
+    os.remove(deleted)
+
+    manifest = IngestionManifest(str(tmp_path / "manifest.json"))
+    changed, removed = manifest.plan([kept, edited, added], root=str(docs))
+    assert changed == [(edited, IngestionManifest.hash_file(edited)), (added, IngestionManifest.hash_file(added))]
+    assert removed == [deleted]
+    assert manifest.chunk_ids_for([deleted]) == [manifest.chunk_id(deleted, deleted_hash, 0)]
+
+    manifest.forget(deleted)
+    assert manifest.chunk_ids_for([deleted]) == []
+    assert manifest.plan([kept, edited, added], root=str(docs))[1] == []
+
+
+def test_removed_files_are_limited_to_the_root(tmp_path):
+    docs = write(tmp_path / "docs" / "a.txt", "a")
+    other = write(tmp_path / "other" / "b.txt", "b")
+    manifest = IngestionManifest(str(tmp_path / "manifest.json"))
+    for path in (docs, other):
+        manifest.record(path, IngestionManifest.hash_file(path), [])
+
+    assert manifest.plan([], root=str(tmp_path / "docs")) == ([], [docs])
+
+
+def test_failed_load_is_planned_again_until_it_succeeds(tmp_path):
+    path = write(tmp_path / "docs" / "bad.txt", "content")
+    manifest = IngestionManifest(str(tmp_path / "manifest.json"))
+    (_, content_hash), = manifest.plan([path], root=str(tmp_path / "docs"))[0]
+
+    # Size and mtime are unchanged, but the empty hash must not be reused
+    manifest.record(path, "", [])
+    assert manifest.plan([path], root=str(tmp_path / "docs"))[0] == [(path, content_hash)]
+
+    manifest.record(path, content_hash, ["id"])
+    assert manifest.plan([path], root=str(tmp_path / "docs"))[0] == []
+
+
+def test_delete_collection_removes_the_manifest(tmp_path, embeddings):
+    store = CodeLearningVectorStore(str(tmp_path), backend="numpy", use_embedding_cache=False)
+    store.embeddings = embeddings
+    store.add_documents([Document(page_content="chunk")], ids=["c0"])
+    manifest = IngestionManifest(store.manifest_path)
+    manifest.record(write(tmp_path / "docs" / "a.txt", "chunk"), "hash", ["c0"])
+    assert manifest.save()
+
+    assert store.delete_collection()
+    assert not os.path.exists(store.manifest_path)
+    assert IngestionManifest(store.manifest_path).files == {}
@@ -0,0 +1,23 @@
+from rag_system.lexical_index import BM25Index
+
+
+def test_delete_after_reload_removes_only_that_chunk(tmp_path):
+    path = str(tmp_path / "lexical_index.json")
+    index = BM25Index(path)
+    index.add(["a", "b"], ["def parse_json(text)", "def parse_yaml(text)"])
+    assert index.save()
+
+    index = BM25Index(path)
+    assert index.loaded
+    index.delete(["a"])
+    assert "json" not in index.postings
+    assert [doc_id for doc_id, _ in index.search("parse")] == ["b"]
+    assert index.total_length == index.doc_lengths["b"]
+
+
+def test_repeated_id_in_one_batch_keeps_the_last_text():
+    index = BM25Index()
+    index.add(["a", "a"], ["KeyError handling", "list comprehension"])
+    index.delete(["a"])
+    assert index.postings == {}
+    assert len(index) == 0 and index.total_length == 0
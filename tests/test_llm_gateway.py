@@ -0,0 +1,184 @@
+import asyncio
+import gc
+import threading
+import time
+import weakref
+
+import pytest
+from langchain_core.messages import HumanMessage
+
+from llm_gateway.chat_model import GatewayChatModel
+from llm_gateway.fake_provider import FakeChatModel, FakeProviderError, fake_model_from_env
+from llm_gateway.gateway import LLMGateway, TokenBucket
+
+
+def make_gateway(**kwargs) -> LLMGateway:
+    params = {"requests_per_minute": 1e6, "base_delay": 0.001, "max_delay": 0.01}
+    params.update(kwargs)
+    return LLMGateway(**params)
+
+
+def failing_then(codes, result="ok"):
+    """Callable raising FakeProviderError for each code in turn, then returning result"""
+    codes = list(codes)
+    calls = []
+
+    def fn():
+        calls.append(1)
+        if codes:
+            raise FakeProviderError(codes.pop(0))
+        return result
+    return fn, calls
+
+
+def test_token_bucket_spaces_calls_beyond_capacity():
+    bucket = TokenBucket(rate_per_second=10, capacity=2)
+    assert bucket.reserve() == 0.0
+    assert bucket.reserve() == 0.0
+    assert bucket.reserve() == pytest.approx(0.1, abs=0.01)
+    assert bucket.reserve() == pytest.approx(0.2, abs=0.01)
+
+
+def test_retries_rate_limit_and_server_errors():
+    gateway = make_gateway(max_retries=3)
+    fn, calls = failing_then([429, 503])
+    assert gateway.call(fn) == "ok"
+    assert len(calls) == 3
+    assert gateway.stats["retries"] == 2 and gateway.stats["failures"] == 0
+
+
+def test_does_not_retry_client_errors_or_beyond_the_limit():
+    gateway = make_gateway(max_retries=1)
+    fn, calls = failing_then([400])
+    with pytest.raises(FakeProviderError):
+        gateway.call(fn)
+    assert len(calls) == 1
+
+    fn, calls = failing_then([503, 503, 503])
+    with pytest.raises(FakeProviderError):
+        gateway.call(fn)
+    assert len(calls) == 2 and gateway.stats["failures"] == 2
+
+
+def test_backoff_is_jittered_within_the_exponential_cap():
+    gateway = make_gateway(base_delay=1.0, max_delay=5.0)
+    delays = [gateway._backoff(3) for _ in range(200)]
+    assert all(0 <= delay <= 5.0 for delay in delays)
+    assert len(set(delays)) > 100
+    assert max(gateway._backoff(1) for _ in range(200)) <= 2.0
+
+
+def test_fake_provider_errors_are_retried_through_the_chat_model():
+    gateway = make_gateway(max_retries=50)
+    inner = FakeChatModel(latency_ms=0, latency_distribution="fixed", tokens_per_second=1e6,
+                          min_tokens=3, max_tokens=3, error_rate=0.5, seed=1)
+    model = GatewayChatModel(inner=inner, gateway=gateway)
+    for i in range(5):
+        assert model.invoke(f"question {i}").content
+    assert gateway.stats["retries"] > 0 and gateway.stats["failures"] == 0
+
+
+def test_identical_in_flight_calls_are_coalesced():
+    gateway = make_gateway()
+    release = threading.Event()
+    calls = []
+
+    def slow():
+        calls.append(1)
+        release.wait(5)
+        return "shared"
+
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(gateway.call(slow, key="same")))
+               for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    while gateway.stats["coalesced"] < 3:
+        time.sleep(0.001)
+    release.set()
+    for thread in threads:
+        thread.join()
+    assert results == ["shared"] * 4 and len(calls) == 1
+
+
+def test_identical_async_chat_calls_are_coalesced():
+    gateway = make_gateway()
+    inner = FakeChatModel(latency_ms=20, latency_distribution="fixed", tokens_per_second=1e6,
+                          min_tokens=3, max_tokens=3, seed=0)
+    model = GatewayChatModel(inner=inner, gateway=gateway)
+
+    async def ask():
+        message = [HumanMessage(content="What is a list?")]
+        return await asyncio.gather(*(model.ainvoke(message) for _ in range(5)))
+
+    answers = asyncio.run(ask())
+    assert len({answer.content for answer in answers}) == 1
+    assert gateway.stats["calls"] == 1 and gateway.stats["coalesced"] == 4
+
+
+def test_concurrency_bound_is_shared_by_threads_and_event_loops():
+    gateway = make_gateway(max_concurrency=2)
+    lock = threading.Lock()
+    active, peak = [0], [0]
+
+    def enter():
+        with lock:
+            active[0] += 1
+            peak[0] = max(peak[0], active[0])
+
+    def leave():
+        with lock:
+            active[0] -= 1
+
+    def sync_call():
+        enter()
+        time.sleep(0.02)
+        leave()
+
+    async def async_call():
+        enter()
+        await asyncio.sleep(0.02)
+        leave()
+
+    async def many():
+        await asyncio.gather(*(gateway.acall(async_call) for _ in range(4)))
+
+    workers = [threading.Thread(target=gateway.call, args=(sync_call,)) for _ in range(3)]
+    workers += [threading.Thread(target=asyncio.run, args=(many(),)) for _ in range(2)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    assert peak[0] == 2
+    assert gateway.stats["calls"] == 11
+
+
+def test_finished_event_loops_are_not_retained():
+    gateway = make_gateway()
+
+    async def call():
+        async def answer():
+            return 1
+        return await gateway.acall(answer, key="k")
+
+    loops = []
+    for _ in range(20):
+        loop = asyncio.new_event_loop()
+        loop.run_until_complete(call())
+        loop.close()
+        loops.append(weakref.ref(loop))
+    del loop
+    gc.collect()
+    assert all(ref() is None for ref in loops)
+    assert len(gateway._async_inflight) == 0
+
+
+def test_unknown_latency_distribution_is_rejected(monkeypatch):
+    with pytest.raises(ValueError):
+        FakeChatModel(latency_distribution="normal")
+
+    monkeypatch.setenv("FAKE_LLM_LATENCY_DISTRIBUTION", "gaussian")
+    with pytest.raises(ValueError):
+        fake_model_from_env()
+    monkeypatch.setenv("FAKE_LLM_LATENCY_DISTRIBUTION", "uniform")
+    assert fake_model_from_env().latency_distribution == "uniform"
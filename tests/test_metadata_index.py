@@ -0,0 +1,43 @@
+import numpy as np
+
+from rag_system.metadata_index import MetadataIndex
+
+METADATAS = [
+    {"language": "python", "start_line": 1, "source": "a.py"},
+    {"language": "java", "start_line": 40, "source": "b.java"},
+    {"language": "python", "start_line": 120, "source": "c.py"},
+    {"language": "go"},
+]
+
+
+def make_index():
+    index = MetadataIndex()
+    index.add(range(len(METADATAS)), METADATAS)
+    return index
+
+
+def rows(index, where):
+    return np.flatnonzero(index.mask(where)).tolist()
+
+
+def test_equality_and_membership():
+    index = make_index()
+    assert rows(index, {"language": "python"}) == [0, 2]
+    assert rows(index, {"source": {"$in": ["b.java", "c.py", "x.py"]}}) == [1, 2]
+    assert rows(index, {"source": {"$ne": "a.py"}}) == [1, 2]
+    assert rows(index, {"language": {"$nin": ["python"]}}) == [1, 3]
+
+
+def test_ranges_and_boolean_clauses():
+    index = make_index()
+    assert rows(index, {"start_line": {"$lt": 100}}) == [0, 1]
+    assert rows(index, {"start_line": {"$gte": 40, "$lte": 120}}) == [1, 2]
+    assert rows(index, {"$or": [{"language": "go"}, {"start_line": {"$gt": 100}}]}) == [2, 3]
+    assert rows(index, {"language": "python", "start_line": {"$gt": 1}}) == [2]
+
+
+def test_ranges_see_rows_added_later():
+    index = make_index()
+    assert rows(index, {"start_line": {"$gt": 100}}) == [2]
+    index.add([4], [{"start_line": 500}])
+    assert rows(index, {"start_line": {"$gt": 100}}) == [2, 4]
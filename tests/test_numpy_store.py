@@ -0,0 +1,89 @@
+import numpy as np
+import pytest
+
+from rag_system.numpy_store import NumpyVectorStore
+
+TEXTS = [f"t{i}" for i in range(50)]
+
+
+def make_store(tmp_path, embeddings, texts=TEXTS, **kwargs):
+    store = NumpyVectorStore(embeddings, str(tmp_path), **kwargs)
+    store.add_texts(texts, metadatas=[{"n": i} for i in range(len(texts))], ids=texts)
+    return store
+
+
+def test_ivf_probing_every_list_keeps_row_ids(tmp_path, embeddings):
+    store = make_store(tmp_path, embeddings, index_type="ivf",
+                       ann_params={"nlist": 4, "nprobe": 4, "min_train_size": 10})
+    assert store.ann.is_trained
+
+    for text in ("t3", "t17", "t42"):
+        doc, score = store.similarity_search_with_score(text, k=1)[0]
+        assert doc.page_content == text
+        assert score == pytest.approx(1.0, abs=1e-5)
+
+
+def test_batch_search_with_permuted_candidates(tmp_path, embeddings):
+    store = make_store(tmp_path, embeddings)
+    rows = np.random.default_rng(0).permutation(len(TEXTS))
+    queries = np.asarray(embeddings.embed_documents(["t5", "t30"]), dtype=np.float32)
+
+    results = store.index.search_batch(queries, 1, candidate_rows=rows)
+    assert [store.index.ids[hits[0][0]] for hits in results] == ["t5", "t30"]
+
+
+def test_int8_scores_follow_permuted_rows(tmp_path, embeddings):
+    store = make_store(tmp_path, embeddings, index_type="ivf", quantization="int8",
+                       ann_params={"nlist": 4, "nprobe": 4, "min_train_size": 10},
+                       quantization_params={"min_train_size": 10}, rerank_factor=0)
+    assert store.quantized.is_trained
+
+    doc, score = store.similarity_search_with_score("t3", k=1)[0]
+    assert doc.page_content == "t3"
+    assert score == pytest.approx(1.0, abs=0.05)
+
+
+def test_pq_shortlist_follows_permuted_rows(tmp_path, embeddings):
+    texts = [f"t{i}" for i in range(300)]
+    store = make_store(tmp_path, embeddings, texts=texts, index_type="ivf", quantization="pq",
+                       ann_params={"nlist": 4, "nprobe": 4, "min_train_size": 10},
+                       quantization_params={"min_train_size": 256, "train_iters": 5}, rerank_factor=4)
+    assert store.quantized.is_trained
+
+    for text in ("t3", "t150", "t299"):
+        doc, score = store.similarity_search_with_score(text, k=1)[0]
+        assert doc.page_content == text
+        assert score == pytest.approx(1.0, abs=1e-5)
+
+
+def test_flat_index_drops_orphan_rows_on_load(tmp_path, embeddings):
+    store = make_store(tmp_path, embeddings, texts=["t0", "t1"])
+    index_dir = store.index.index_dir
+    # An interrupted add: a vector row was written but its document line was not
+    with open(store.index.vectors_path, "ab") as f:
+        f.write(np.ones(store.index.dim, dtype=np.float32).tobytes())
+
+    store = NumpyVectorStore(embeddings, str(tmp_path))
+    assert store.index.index_dir == index_dir
+    store.add_texts(["t2"], metadatas=[{"n": 2}], ids=["t2"])
+
+    doc, score = store.similarity_search_with_score("t2", k=1)[0]
+    assert doc.page_content == "t2"
+    assert score == pytest.approx(1.0, abs=1e-5)
+
+
+def test_deferred_ivf_saves_are_caught_up_on_load(tmp_path, embeddings):
+    params = {"nlist": 4, "nprobe": 4, "min_train_size": 10}
+    store = make_store(tmp_path, embeddings, index_type="ivf", ann_params=params)
+    assert store.ann.n_rows == len(TEXTS)
+
+    # A bulk run that never reached its flush: the saved IVF lists miss the new rows
+    store.defer_saves = True
+    store.add_texts(["late0", "late1"], ids=["late0", "late1"])
+    assert store._unsaved
+
+    store = NumpyVectorStore(embeddings, str(tmp_path), index_type="ivf", ann_params=params)
+    assert store.ann.n_rows == len(TEXTS) + 2
+    doc, score = store.similarity_search_with_score("late1", k=1)[0]
+    assert doc.page_content == "late1"
+    assert score == pytest.approx(1.0, abs=1e-5)
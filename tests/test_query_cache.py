@@ -0,0 +1,67 @@
+from langchain.schema import Document
+
+from rag_system import query_cache
+from rag_system.query_cache import LRUCache, QueryCache
+from rag_system.vector_store import CodeLearningVectorStore
+
+
+def make_store(path, embeddings):
+    store = CodeLearningVectorStore(str(path), backend="numpy", use_embedding_cache=False)
+    store.embeddings = embeddings
+    return store
+
+
+def test_lru_counts_hits_and_misses_and_evicts_oldest():
+    cache = LRUCache(max_size=2)
+    cache.put("a", 1)
+    cache.put("b", 2)
+    assert cache.get("a") == 1
+    cache.put("c", 3)
+
+    assert cache.get("b") is None
+    assert cache.get("c") == 3
+    assert cache.stats() == {"size": 2, "hits": 2, "misses": 1, "hit_rate": 2 / 3}
+
+
+def test_entries_expire_after_ttl(monkeypatch):
+    now = [100.0]
+    monkeypatch.setattr(query_cache.time, "monotonic", lambda: now[0])
+    cache = LRUCache(ttl_seconds=10)
+    cache.put("a", 1)
+
+    now[0] += 10
+    assert cache.get("a") == 1
+    now[0] += 0.5
+    assert cache.get("a") is None
+    assert len(cache) == 0 and cache.misses == 1
+
+
+def test_cached_results_are_copies():
+    cache = QueryCache()
+    key = QueryCache.result_key("dense", "query", 1, None)
+    computed = [Document(page_content="chunk", metadata={"source": "a.txt"})]
+    assert cache.search(key, lambda: computed) is computed
+
+    computed[0].metadata["source"] = "edited"
+    hit = cache.search(key, lambda: [])
+    assert hit[0].metadata == {"source": "a.txt"}
+    hit[0].page_content = "edited"
+    assert cache.search(key, lambda: [])[0].page_content == "chunk"
+    assert cache.stats()["results"]["hits"] == 2
+
+
+def test_results_are_dropped_when_another_store_writes(tmp_path, embeddings):
+    reader = make_store(tmp_path, embeddings)
+    writer = make_store(tmp_path, embeddings)
+    writer.add_documents([Document(page_content="binary search")], ids=["a"])
+
+    assert [doc.page_content for doc in reader.similarity_search("binary search", k=2)] == ["binary search"]
+    assert len(reader.similarity_search("binary search", k=2)) == 1
+    assert reader.cache_stats()["results"]["hits"] == 1
+
+    # The write bumps the shared index_version file, so the reader searches again
+    writer.add_documents([Document(page_content="binary search tree")], ids=["b"])
+    reader.similarity_search("binary search", k=2)
+    assert reader.cache_stats()["results"]["hits"] == 1
+    assert reader.cache_stats()["results"]["misses"] == 2
+    assert reader.query_cache.index_version == writer.index_version
@@ -0,0 +1,40 @@
+import asyncio
+
+import pytest
+from langchain.schema import Document
+
+from rag_system.retrieval_chain import CodeLearningRAGChain
+from rag_system.vector_store import CodeLearningVectorStore
+
+
+@pytest.fixture
+def rag_chain(tmp_path, embeddings, fake_llm):
+    store = CodeLearningVectorStore(str(tmp_path), backend="numpy", use_embedding_cache=False)
+    store.embeddings = embeddings
+    store.add_documents([Document(page_content=f"Python lists, part {i}", metadata={"n": i}) for i in range(5)])
+
+    chain = CodeLearningRAGChain(store, retrieval_mode="dense", k=2)
+    chain._llm = fake_llm()
+    return chain
+
+
+def test_one_shot_answers_are_cached_across_paths(rag_chain):
+    first = rag_chain.ask_question("How do I create a list?")
+    assert first["answer"] and len(first["source_documents"]) == 2
+    assert "cached" not in first
+
+    events = list(rag_chain.ask_question_stream("How do I create a list?"))
+    assert events[0]["cached"] and events[1]["content"] == first["answer"]
+
+    again = asyncio.run(rag_chain.aask_question("How do I create a list?"))
+    assert again["cached"] and again["answer"] == first["answer"]
+
+
+def test_conversation_turns_are_recorded_by_every_path(rag_chain):
+    rag_chain.condense_mode = "never"
+    rag_chain.ask_question("What is a list?", use_conversation=True, session_id="s")
+    list(rag_chain.ask_question_stream("And a tuple?", use_conversation=True, session_id="s"))
+    result = asyncio.run(rag_chain.aask_question("And a set?", use_conversation=True, session_id="s"))
+
+    assert len(result["chat_history"]) == 6
+    assert "cached" not in result
@@ -0,0 +1,86 @@
+import os
+
+from code_reviewer.review_cache import ReviewCache, code_fingerprint, normalize_code
+
+ORIGINAL = """
+def total(values):
+    result = 0
+    for value in values:
+        result += value
+    return result
+"""
+
+REFORMATTED = """
+# Sum a list
+def total(values):
+
+    result   =   0  # running total
+    for value in values:   result += value
+    return result
+"""
+
+RENAMED = """
+def total(items):
+    acc = 0
+    for item in items:
+        acc += item
+    return acc
+"""
+
+CHANGED = """
+def total(values):
+    result = 0
+    for value in values:
+        result -= value
+    return result
+"""
+
+
+def test_fingerprint_ignores_whitespace_comments_and_local_names():
+    key = code_fingerprint(ORIGINAL)
+    assert code_fingerprint(REFORMATTED) == key
+    assert code_fingerprint(RENAMED) == key
+    assert code_fingerprint(CHANGED) != key
+    assert code_fingerprint(ORIGINAL.replace("def total", "def summed")) != key
+    assert code_fingerprint(ORIGINAL, prompt_version="v2") != key
+
+
+def test_unparsable_code_is_compared_line_by_line():
+    assert normalize_code("def f(:\n    pass  ") == normalize_code("  def f(:\n\n    pass")
+    assert code_fingerprint("int x = 1;", "java") == code_fingerprint("  int x = 1;  \n", "java")
+    assert code_fingerprint("int x = 1;", "java") != code_fingerprint("int x = 2;", "java")
+
+
+def test_reviews_are_appended_and_replayed(tmp_path):
+    cache = ReviewCache(str(tmp_path))
+    cache.put("a", {"review": "first"})
+    cache.put("b", {"review": "second"})
+    cache.put("a", {"review": "replaced"})
+    with open(cache.path, encoding="utf-8") as f:
+        assert len(f.readlines()) == 3
+
+    with open(cache.path, "a", encoding="utf-8") as f:
+        f.write('{"key": "c", "rev')
+
+    cache = ReviewCache(str(tmp_path))
+    assert cache.get("a") == {"review": "replaced"}
+    assert cache.get("b") == {"review": "second"}
+    assert cache.get("c") is None
+    assert cache.stats()["hits"] == 2 and cache.stats()["misses"] == 1
+    with open(cache.path, encoding="utf-8") as f:
+        assert f.read().endswith("\n")
+
+
+def test_log_is_compacted_to_the_live_entries(tmp_path):
+    review = {"review": "x" * 50}
+    cache = ReviewCache(str(tmp_path), max_bytes=200)
+    for i in range(12):
+        cache.put(str(i), review)
+
+    assert cache.total_bytes <= 200
+    assert os.path.getsize(cache.path) < 2 * 200 + 100
+    assert ReviewCache(str(tmp_path), max_bytes=200).entries.keys() == cache.entries.keys()
+
+    cache.clear()
+    assert not os.path.exists(cache.path)
+    assert ReviewCache(str(tmp_path)).stats()["size"] == 0
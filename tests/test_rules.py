@@ -0,0 +1,49 @@
+import pytest
+
+from code_reviewer.rule_engine import RuleEngine
+
+
+def flagged_lines(code, rule):
+    result = RuleEngine(rules=[rule]).analyze(code)
+    return [finding["line"] for finding in result["issues"] + result["suggestions"]]
+
+
+@pytest.mark.parametrize("rule, code, lines", [
+    ("line_too_long", "x = 1\ny = '" + "a" * 100 + "'\n", [2]),
+    ("operator_spacing", "x = 1\ny=x+1\n", [2]),
+    ("unused_variable", "def f():\n    used = 1\n    unused = 2\n    return used\n", [3]),
+    ("mutable_default_argument", "def f(a, items=[]):\n    return items\n", [1]),
+    ("bare_except", "try:\n    pass\nexcept:\n    pass\n", [3]),
+    ("shadowed_builtin", "def f(list):\n    return list\n", [1]),
+    ("nested_loops", "for a in x:\n    for b in x:\n        for c in x:\n            pass\n", [3]),
+    ("none_comparison", "def f(x):\n    return x == None\n", [2]),
+])
+def test_each_rule_reports_its_case(rule, code, lines):
+    assert flagged_lines(code, rule) == lines
+
+
+@pytest.mark.parametrize("code", [
+    "message = 'a+b=c'\n",
+    'query = f"x={value}"\n',
+    "total = 1  # a+b\n",
+    "def f(*args, **kwargs):\n    return g(*args, **kwargs)\n",
+    "merged = {**a, **b}\nfirst, *rest = items\n",
+    "call(key=value, other=-1)\n",
+    "power = base ** 2\n",
+])
+def test_operator_spacing_ignores_strings_comments_and_unpacking(code):
+    assert flagged_lines(code, "operator_spacing") == []
+
+
+def test_rules_leave_clean_code_alone():
+    code = (
+        "def f(values, key=None):\n"
+        "    result = []\n"
+        "    for value in values:\n"
+        "        if key is not None:\n"
+        "            result.append(key(value))\n"
+        "    return result\n"
+    )
+    result = RuleEngine().analyze(code)
+    assert result["syntax_valid"]
+    assert result["issues"] == [] and result["suggestions"] == []
@@ -0,0 +1,78 @@
+from langchain_core.messages import SystemMessage
+
+from rag_system import session_memory
+from rag_system.session_memory import SessionMemory, SessionMemoryStore
+
+
+def contents(messages):
+    return [message.content for message in messages]
+
+
+def test_oldest_turns_leave_the_token_window():
+    memory = SessionMemory(max_tokens=10)
+    for i in range(4):
+        memory.add_turn(f"question {i} " + "q" * 4, f"answer {i} " + "a" * 4)
+
+    # Each turn is 3 + 3 estimated tokens, so only the latest fits
+    assert contents(memory.history()) == ["question 3 qqqq", "answer 3 aaaa"]
+
+
+def test_latest_turn_is_kept_even_over_budget():
+    memory = SessionMemory(max_tokens=1)
+    memory.add_turn("x" * 100, "y" * 100)
+    assert len(memory.history()) == 2
+
+
+def test_dropped_turns_are_folded_into_the_summary():
+    calls = []
+
+    def summarizer(previous, dropped):
+        calls.append(contents(dropped))
+        return (previous + " " if previous else "") + "/".join(contents(dropped))
+
+    memory = SessionMemory(max_tokens=6, summarizer=summarizer)
+    for i in range(3):
+        memory.add_turn(f"q{i} " * 4, f"a{i} " * 4)
+
+    history = memory.history()
+    assert isinstance(history[0], SystemMessage)
+    assert "q0" in history[0].content and "q1" in history[0].content
+    assert contents(history[1:]) == ["q2 " * 4, "a2 " * 4]
+    assert len(calls) == 2
+
+
+def test_sessions_are_isolated():
+    store = SessionMemoryStore()
+    store.get("alice").add_turn("my question", "my answer")
+
+    assert store.get("bob").history() == []
+    assert contents(store.get("alice").history()) == ["my question", "my answer"]
+    store.drop("alice")
+    assert store.get("alice").history() == []
+
+
+def test_idle_sessions_are_evicted(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(session_memory.time, "monotonic", lambda: now[0])
+    store = SessionMemoryStore(idle_ttl_seconds=60)
+    store.get("old")
+    now[0] += 30
+    store.get("recent")
+
+    now[0] += 40
+    store.get("new")
+    assert len(store) == 2 and store.stats()["evicted"] == 1
+    assert store.get("recent").history() == []
+    assert store.stats()["live_sessions"] == 2
+
+
+def test_least_recently_used_session_is_evicted_at_capacity():
+    store = SessionMemoryStore(max_sessions=2, idle_ttl_seconds=None)
+    store.get("a").add_turn("kept", "yes")
+    store.get("b")
+    store.get("a")
+    store.get("c")
+
+    assert store.stats() == {"live_sessions": 2, "evicted": 1}
+    assert contents(store.get("a").history()) == ["kept", "yes"]
+    assert len(store) == 2 and store.stats()["evicted"] == 1
@@ -0,0 +1,15 @@
+from langchain.schema import Document
+
+from rag_system.vector_store import CodeLearningVectorStore
+
+
+def test_batch_search_embeds_queries_without_document_calls(tmp_path, embeddings):
+    store = CodeLearningVectorStore(str(tmp_path), backend="numpy", use_embedding_cache=False)
+    store.embeddings = embeddings
+    store.add_documents([Document(page_content=f"chunk {i}") for i in range(10)],
+                        ids=[f"c{i}" for i in range(10)])
+    document_calls = embeddings.calls
+
+    results = store.similarity_search_batch(["chunk 3", "chunk 7"], k=1)
+    assert [hits[0].page_content for hits in results] == ["chunk 3", "chunk 7"]
+    assert embeddings.calls == document_calls